@@ -0,0 +1,26 @@
+import pytest
+from django.core.cache import cache
+
+HOST_ADMIN = "admin.elsicologico.cl"
+
+
+@pytest.fixture(autouse=True)
+def _limpiar_cache():
+    # los ids se reutilizan entre tests, así que lo cacheado por uno no debe verlo el siguiente
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def host_admin(settings) -> str:
+    """El host con las URLs del admin (gips.admin_urls)."""
+    settings.ALLOWED_HOSTS = [HOST_ADMIN]
+    return HOST_ADMIN
+
+
+@pytest.fixture
+def cliente_admin(admin_client, host_admin):
+    """admin_client (superusuario con sesión iniciada) con las peticiones dirigidas al host del admin."""
+    admin_client.defaults["HTTP_HOST"] = host_admin
+    return admin_client
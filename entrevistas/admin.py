@@ -12,6 +12,8 @@ from django.utils.safestring import mark_safe
 from entrevistas.forms import EntrevistaForm
 from entrevistas.models import Disponibilidad, Sicologo, Bloqueo, Entrevista
 from tests.generadores.base import get_generador
+from tests.generadores.cola import encolar_informe, ultimo_trabajo
+from tests.models import TrabajoInforme
 from utils.admin import link_whatsapp
 
 
@@ -74,6 +76,7 @@ class EntrevistaAdmin(admin.ModelAdmin):
     readonly_fields = (
         "tiempo_test",
         "link_informe",
+        "estado_informe",
         "resultado",
         "previsualizacion",
     )
@@ -87,7 +90,7 @@ class EntrevistaAdmin(admin.ModelAdmin):
                     "observaciones",
                     "resultado_entrevista",
                     "previsualizacion",
-                    "link_informe",
+                    ("link_informe", "estado_informe"),
                 ),
             },
         ),
@@ -200,6 +203,24 @@ class EntrevistaAdmin(admin.ModelAdmin):
         return ""
     link_informe.short_description = "Informe"
 
+    def estado_informe(self, instance: Entrevista) -> str:
+        trabajo = instance and instance.resultado and ultimo_trabajo(instance.resultado)
+
+        if not trabajo:
+            return ""
+
+        if trabajo.estado == TrabajoInforme.Estado.PENDIENTE:
+            return f"En cola desde {timezone.localtime(trabajo.fecha_creacion):%d/%m/%Y %H:%M}"
+
+        if trabajo.estado == TrabajoInforme.Estado.EN_PROCESO:
+            return f"Generándose desde {timezone.localtime(trabajo.fecha_inicio):%d/%m/%Y %H:%M}"
+
+        if trabajo.estado == TrabajoInforme.Estado.ERROR:
+            return f"Error al generar el {timezone.localtime(trabajo.fecha_fin):%d/%m/%Y %H:%M}: {trabajo.error}"
+
+        return f"Generado el {timezone.localtime(trabajo.fecha_fin):%d/%m/%Y %H:%M}"
+    estado_informe.short_description = "Generación del informe"
+
     def tiempo_test(self, instance: Entrevista) -> str:
         return instance.acceso.tiempo_test
     tiempo_test.short_description = "Tiempo de Test"
@@ -255,12 +276,14 @@ class EntrevistaAdmin(admin.ModelAdmin):
             generador.evaluar()
 
     def generar_informe(self, request, object_id):
+        """Deja el informe en la cola de procesar_informes; el estado se ve en la ficha de la entrevista."""
         entrevista = self.get_object(request, object_id)
 
         generador = get_generador(entrevista.resultado, request)
 
-        if generador:
-            generador.generar()
+        if generador and generador.puede_generar_informe():
+            encolar_informe(entrevista.resultado, request.user)
+            self.message_user(request, "Informe en cola de generación", messages.SUCCESS)
 
         change_form_url = reverse('admin:entrevistas_entrevista_change', args=(object_id,))
         return HttpResponseRedirect(change_form_url)
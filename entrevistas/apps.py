@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class EntrevistasConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "entrevistas"
+
+    def ready(self):
+        import entrevistas.signals  # noqa: F401
@@ -0,0 +1,87 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from entrevistas.models import ContadorEntrevistas, Sicologo, lunes_de
+from utils.numbers import obtener_numero_aleatorio
+
+CLAVE_TURNO = "asignacion:turno"
+
+
+def _rotar(entrevistadores: list[Sicologo], desde: int) -> list[Sicologo]:
+    desde %= len(entrevistadores)
+    return entrevistadores[desde:] + entrevistadores[:desde]
+
+
+class EstrategiaAsignacion(ABC):
+    @abstractmethod
+    def ordenar(self, entrevistadores: list[Sicologo], inicio: datetime, acceso_id: int) -> list[Sicologo]:
+        """
+        Devuelve los sicólogos libres en el orden en que se intentará reservar con ellos: si el primero se ocupa
+        entre medio, se sigue con el siguiente.
+        """
+        ...
+
+
+class AsignacionAleatoria(EstrategiaAsignacion):
+    def ordenar(self, entrevistadores: list[Sicologo], inicio: datetime, acceso_id: int) -> list[Sicologo]:
+        if not entrevistadores:
+            return []
+
+        return _rotar(entrevistadores, obtener_numero_aleatorio(0, len(entrevistadores) - 1))
+
+
+class AsignacionMenorCarga(EstrategiaAsignacion):
+    """Primero los sicólogos con menos entrevistas en la semana de la reserva, según ContadorEntrevistas."""
+
+    def ordenar(self, entrevistadores: list[Sicologo], inicio: datetime, acceso_id: int) -> list[Sicologo]:
+        if not entrevistadores:
+            return []
+
+        cantidades = dict(
+            ContadorEntrevistas.objects.filter(
+                entrevistador__in=entrevistadores,
+                semana=lunes_de(inicio),
+            ).values_list(
+                "entrevistador_id", "cantidad",
+            )
+        )
+
+        # a igual carga se parte de una posición que depende del acceso, para que las reservas simultáneas de una
+        # misma hora no compitan todas por el mismo sicólogo
+        return sorted(
+            _rotar(entrevistadores, acceso_id),
+            key=lambda entrevistador: cantidades.get(entrevistador.id, 0),
+        )
+
+
+class AsignacionRoundRobin(EstrategiaAsignacion):
+    """Turnos rotativos con un contador en el cache compartido."""
+
+    def ordenar(self, entrevistadores: list[Sicologo], inicio: datetime, acceso_id: int) -> list[Sicologo]:
+        if not entrevistadores:
+            return []
+
+        cache.add(CLAVE_TURNO, 0, None)
+
+        try:
+            turno = cache.incr(CLAVE_TURNO)
+        except ValueError:  # la clave se expulsó entre medio
+            turno = acceso_id
+
+        return _rotar(entrevistadores, turno)
+
+
+ESTRATEGIAS = {
+    "aleatoria": AsignacionAleatoria,
+    "menor_carga": AsignacionMenorCarga,
+    "round_robin": AsignacionRoundRobin,
+}
+
+
+def get_estrategia(nombre: Optional[str] = None) -> EstrategiaAsignacion:
+    nombre = nombre or getattr(settings, "ENTREVISTAS_ESTRATEGIA_ASIGNACION", "menor_carga")
+    return ESTRATEGIAS[nombre]()
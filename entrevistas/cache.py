@@ -0,0 +1,172 @@
+"""
+Snapshot de disponibilidad por sicólogo y por día, guardado en el cache de Django.
+
+Cada entrada guarda los bloques libres de un sicólogo durante un día completo (hora de Chile) como pares de
+minutos desde la medianoche. Las claves llevan la versión del sicólogo leída antes de consultar la base de datos, y
+entrevistas.signals la cambia al confirmar cualquier cambio de su Disponibilidad, Bloqueo o Entrevista: un cálculo
+que empezó antes del cambio guarda lo suyo bajo la versión anterior, que ya nadie lee, y no puede pisar el snapshot
+nuevo aunque termine después de la invalidación.
+"""
+import time
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.timezone import localtime
+
+from entrevistas.ghd import BloqueHorario, CargaHorarios, Horario, HorarioGlobal, unir_bloques
+from entrevistas.models import Disponibilidad
+from utils.fechas import TZ_CHILE
+
+CLAVE_VERSION_ENTREVISTADORES = "horarios:version"
+
+Intervalos = list[tuple[int, int]]
+
+
+def _clave_version(entrevistador_id: int) -> str:
+    return f"horarios:version:{entrevistador_id}"
+
+
+def _clave_entrevistadores(version: int) -> str:
+    return f"horarios:entrevistadores:{version}"
+
+
+def _clave_dia(entrevistador_id: int, version: int, fecha: date) -> str:
+    return f"horarios:{entrevistador_id}:{version}:{fecha.isoformat()}"
+
+
+def _timeout() -> int:
+    return getattr(settings, "HORARIOS_CACHE_TIMEOUT", 10 * 60)
+
+
+def _version(clave: str) -> int:
+    version = cache.get(clave)
+
+    if version is None:
+        # sin versión conocida no se puede confiar en nada guardado antes: se parte una nueva
+        cache.add(clave, time.time_ns(), None)
+        version = cache.get(clave)
+
+    return version
+
+
+def _medianoche(fecha: date) -> datetime:
+    return datetime(fecha.year, fecha.month, fecha.day, tzinfo=TZ_CHILE)
+
+
+def _fechas(desde: date, hasta: date) -> list[date]:
+    return [desde + timedelta(days=i) for i in range((hasta - desde).days + 1)]
+
+
+class HorarioGlobalCacheado(HorarioGlobal):
+    """
+    HorarioGlobal que arma generar_bloques_disponibles desde el snapshot cacheado y solo calcula (y guarda) los
+    pares sicólogo/día que falten.
+
+    obtener_entrevistadores no se sobreescribe: la reserva de una hora siempre se verifica contra la base de datos.
+    """
+
+    def generar_bloques_disponibles(self, fecha_inicio: datetime, fecha_fin: datetime) -> list[BloqueHorario]:
+        fecha_inicio = localtime(fecha_inicio)
+        fecha_fin = localtime(fecha_fin)
+        fechas = _fechas(fecha_inicio.date(), fecha_fin.date())
+        versiones = self._versiones(self._entrevistadores())
+
+        claves = {
+            (entrevistador_id, fecha): _clave_dia(entrevistador_id, version, fecha)
+            for entrevistador_id, version in versiones.items()
+            for fecha in fechas
+        }
+        snapshot = cache.get_many(claves.values())
+        faltantes = [par for par, clave in claves.items() if clave not in snapshot]
+
+        if faltantes:
+            calculados = self._calcular(faltantes, versiones)
+            snapshot.update(calculados)
+
+        bloques = []
+
+        for (entrevistador_id, fecha), clave in claves.items():
+            medianoche = _medianoche(fecha)
+
+            for inicio, fin in snapshot[clave]:
+                inicio = max(medianoche + timedelta(minutes=inicio), fecha_inicio)
+                fin = min(medianoche + timedelta(minutes=fin), fecha_fin)
+
+                if inicio < fin:
+                    bloques.append(BloqueHorario(inicio, fin))
+
+        return unir_bloques(bloques)
+
+    @staticmethod
+    def _entrevistadores() -> list[int]:
+        clave = _clave_entrevistadores(_version(CLAVE_VERSION_ENTREVISTADORES))
+        entrevistadores = cache.get(clave)
+
+        if entrevistadores is None:
+            entrevistadores = list(
+                Disponibilidad.objects.order_by(
+                    "entrevistador_id",
+                ).values_list(
+                    "entrevistador_id", flat=True,
+                ).distinct()
+            )
+            cache.set(clave, entrevistadores, _timeout())
+
+        return entrevistadores
+
+    @staticmethod
+    def _versiones(entrevistadores: list[int]) -> dict[int, int]:
+        claves = {entrevistador_id: _clave_version(entrevistador_id) for entrevistador_id in entrevistadores}
+        guardadas = cache.get_many(claves.values())
+        versiones = {}
+
+        for entrevistador_id, clave in claves.items():
+            versiones[entrevistador_id] = guardadas[clave] if clave in guardadas else _version(clave)
+
+        return versiones
+
+    @staticmethod
+    def _calcular(faltantes: list[tuple[int, date]], versiones: dict[int, int]) -> dict[str, Intervalos]:
+        fechas = sorted({fecha for _, fecha in faltantes})
+        ids = sorted({entrevistador_id for entrevistador_id, _ in faltantes})
+        desde = _medianoche(fechas[0])
+        hasta = _medianoche(fechas[-1] + timedelta(days=1))
+
+        carga = CargaHorarios(desde, hasta, ids)
+        dias = {
+            (entrevistador_id, fecha): []
+            for entrevistador_id in ids
+            for fecha in _fechas(fechas[0], fechas[-1])
+        }
+
+        for entrevistador in carga.entrevistadores:
+            for bloque in Horario(entrevistador, carga).generar_bloques_disponibles(desde, hasta):
+                inicio = localtime(bloque.inicio)
+                medianoche = _medianoche(inicio.date())
+                dias[(entrevistador.id, inicio.date())].append((
+                    (inicio - medianoche) // timedelta(minutes=1),
+                    (localtime(bloque.fin) - medianoche) // timedelta(minutes=1),
+                ))
+
+        calculados = {
+            _clave_dia(entrevistador_id, versiones[entrevistador_id], fecha): intervalos
+            for (entrevistador_id, fecha), intervalos in dias.items()
+        }
+        cache.set_many(calculados, _timeout())
+
+        return calculados
+
+
+def invalidar_entrevistador(entrevistador_id: int):
+    """Descarta todos los días guardados del sicólogo (por ejemplo, al cambiar su disponibilidad semanal)."""
+    cache.set(_clave_version(entrevistador_id), time.time_ns(), None)
+    cache.set(CLAVE_VERSION_ENTREVISTADORES, time.time_ns(), None)
+
+
+def invalidar_dias(entrevistador_id: int, inicio: datetime, fin: datetime):
+    """
+    Descarta los días guardados del sicólogo que toca el rango [inicio, fin). Se cambia su versión en vez de borrar
+    solo esos días: borrarlos no impide que un cálculo en curso los vuelva a guardar con los datos anteriores.
+    """
+    cache.set(_clave_version(entrevistador_id), time.time_ns(), None)
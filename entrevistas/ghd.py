@@ -1,14 +1,20 @@
-from datetime import datetime, timedelta
-from typing import Union
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Iterable, Iterator, Optional, Union
 
+from django.db.models import Exists, OuterRef
 from django.utils.timezone import localtime
 
-from entrevistas.models import Sicologo
-from utils.fechas import weekday_to_str, TZ_CHILE
+from entrevistas.models import Sicologo, Disponibilidad, Bloqueo, Entrevista, DIAS, MINUTOS_DIA
+from utils.fechas import TZ_CHILE
 
 MINUTOS_BLOQUE_ENTREVISTA = 30
+MINUTOS_BLOQUE_MINIMO = 15
 HORA_FMT = "%Y-%m-%d %H:%M"
 
+_UN_MINUTO = timedelta(minutes=1)
+
 
 class BloqueHorario:
     def __init__(self, hora_inicio: datetime, hora_fin: datetime):
@@ -28,19 +34,161 @@ class BloqueHorario:
         }
 
 
+def unir_bloques(bloques: list[BloqueHorario], minutos_minimos: int = MINUTOS_BLOQUE_MINIMO) -> list[BloqueHorario]:
+    """
+    Une los bloques (posiblemente solapados) en bloques disjuntos, descartando los que duren menos de
+    `minutos_minimos`.
+
+    Los extremos se convierten a minutos enteros relativos al inicio más temprano y se recorren ordenados,
+    por lo que el costo depende de la cantidad de bloques y no de la cantidad de minutos que cubren. Al igual
+    que cuando se unían minuto a minuto, un bloque que empieza un minuto después del término de otro se
+    considera contiguo a él.
+    """
+    if not bloques:
+        return []
+
+    referencia = min(bloque.inicio for bloque in bloques)
+    intervalos = sorted(
+        (
+            -((referencia - bloque.inicio) // _UN_MINUTO),  # redondeo hacia arriba
+            (bloque.fin - referencia) // _UN_MINUTO,
+        )
+        for bloque in bloques
+    )
+
+    unidos = []
+    inicio, fin = intervalos[0]
+
+    for sig_inicio, sig_fin in intervalos[1:]:
+        if sig_inicio <= fin + 1:
+            if sig_fin > fin:
+                fin = sig_fin
+            continue
+
+        if fin - inicio >= minutos_minimos:
+            unidos.append((inicio, fin))
+        inicio, fin = sig_inicio, sig_fin
+
+    if fin - inicio >= minutos_minimos:
+        unidos.append((inicio, fin))
+
+    return [
+        BloqueHorario(referencia + timedelta(minutes=inicio), referencia + timedelta(minutes=fin))
+        for inicio, fin in unidos
+    ]
+
+
+def compilar_plantillas(sicologos: list[Sicologo]):
+    """Compila las plantillas semanales de varios sicólogos con una sola consulta de disponibilidades."""
+    if not sicologos:
+        return
+
+    disponibilidades = defaultdict(list)
+
+    for disp in Disponibilidad.objects.filter(entrevistador__in=sicologos):
+        disponibilidades[disp.entrevistador_id].append(disp)
+
+    for sicologo in sicologos:
+        sicologo.compilar_plantilla_semanal(disponibilidades[sicologo.id])
+
+
+def plantilla_contiene(plantilla: list[list[int]], inicio: int, fin: int) -> bool:
+    """Indica si el intervalo [inicio, fin) (en minutos de la semana) cabe completo en un intervalo de la plantilla."""
+    i = bisect_right(plantilla, inicio, key=lambda intervalo: intervalo[0]) - 1
+    return i >= 0 and fin <= plantilla[i][1]
+
+
+class CargaHorarios:
+    """
+    Plantillas semanales, bloqueos y entrevistas de los sicólogos en la ventana [fecha_inicio, fecha_fin), cargados
+    con una consulta por modelo y agrupados en memoria por sicólogo (y por día de la semana, las plantillas).
+
+    Si no se indican sicólogos se cargan todos los que tengan alguna disponibilidad. Las plantillas las compilan las
+    señales de Disponibilidad; aquí solo se leen.
+    """
+
+    def __init__(
+            self, fecha_inicio: datetime, fecha_fin: datetime, ids_entrevistadores: Optional[Iterable[int]] = None,
+    ):
+        self.fecha_inicio = fecha_inicio
+        self.fecha_fin = fecha_fin
+        self._plantillas: dict[int, list[list[tuple[int, int]]]] = {}
+        self._bloqueos: dict[int, list[BloqueHorario]] = defaultdict(list)
+
+        sicologos = Sicologo.objects.filter(plantilla_semanal__isnull=False).order_by("pk")
+
+        if ids_entrevistadores is not None:
+            sicologos = sicologos.filter(pk__in=ids_entrevistadores)
+
+        self.entrevistadores: list[Sicologo] = [sicologo for sicologo in sicologos if sicologo.plantilla_semanal]
+
+        for entrevistador in self.entrevistadores:
+            plantilla = [[] for _ in DIAS]
+
+            for inicio, fin in entrevistador.plantilla_semanal:
+                dia, inicio = divmod(inicio, MINUTOS_DIA)
+                plantilla[dia].append((inicio, fin - dia * MINUTOS_DIA))
+
+            self._plantillas[entrevistador.id] = plantilla
+
+        if not self._plantillas:
+            return
+
+        ids = list(self._plantillas)
+        bloqueos = Bloqueo.objects.filter(
+            entrevistador_id__in=ids,
+            fecha_inicio__lt=fecha_fin,
+            fecha_fin__gt=fecha_inicio,
+        ).values_list("entrevistador_id", "fecha_inicio", "fecha_fin")
+
+        for entrevistador_id, inicio, fin in bloqueos:
+            self._bloqueos[entrevistador_id].append(BloqueHorario(localtime(inicio), localtime(fin)))
+
+        entrevistas = Entrevista.objects.filter(
+            entrevistador_id__in=ids,
+            fecha_inicio__lt=fecha_fin,
+            fecha_fin__gt=fecha_inicio,
+        ).values_list("entrevistador_id", "fecha_inicio", "fecha_fin")
+
+        for entrevistador_id, inicio, fin in entrevistas:
+            self._bloqueos[entrevistador_id].append(BloqueHorario(inicio, fin))
+
+        for bloqueos_entrevistador in self._bloqueos.values():
+            bloqueos_entrevistador.sort(key=lambda bloqueo: bloqueo.inicio)
+
+    def plantilla(self, entrevistador: Sicologo, dia: int) -> list[tuple[int, int]]:
+        """
+        Intervalos disponibles del sicólogo para el día de la semana (0 es lunes), en minutos desde la medianoche y
+        ordenados.
+        """
+        try:
+            return self._plantillas[entrevistador.id][dia]
+        except KeyError:
+            return []
+
+    def bloqueos(self, entrevistador: Sicologo) -> list[BloqueHorario]:
+        """Bloqueos manuales y entrevistas del sicólogo en la ventana, ordenados por inicio."""
+        return self._bloqueos.get(entrevistador.id, [])
+
+
 class Horario:
-    def __init__(self, entrevistador: Sicologo):
+    def __init__(self, entrevistador: Sicologo, carga: Optional[CargaHorarios] = None):
+        """
+        `carga`, si se indica, debe cubrir la misma ventana que se pasa a generar_bloques_disponibles.
+        """
         self.entrevistador = entrevistador
+        self.carga = carga
 
     def generar_bloques_disponibles(self, fecha_inicio: datetime, fecha_fin: datetime) -> list[BloqueHorario]:
         fecha_inicio = localtime(fecha_inicio)
         fecha_fin = localtime(fecha_fin)
-        disponibilidad = self._get_disponibilidad_base(fecha_inicio, fecha_fin)
+        carga = self.carga or CargaHorarios(fecha_inicio, fecha_fin, [self.entrevistador.id])
+        disponibilidad = self._get_disponibilidad_base(carga, fecha_inicio, fecha_fin)
 
         if not disponibilidad:
             return []
 
-        bloqueos = self._get_bloqueos(fecha_inicio, fecha_fin)
+        bloqueos = self._get_bloqueos(carga)
 
         i_disp = 0
 
@@ -74,19 +222,17 @@ class Horario:
 
         return disponibilidad
 
-    def _get_disponibilidad_base(self, fecha_inicio: datetime, fecha_fin: datetime) -> list[BloqueHorario]:
+    def _get_disponibilidad_base(
+            self, carga: CargaHorarios, fecha_inicio: datetime, fecha_fin: datetime,
+    ) -> list[BloqueHorario]:
         fecha = fecha_inicio.date()
         disponibilidad = []
 
         while fecha <= fecha_fin.date():
-            horarios_disponibles = self.entrevistador.horarios_disponibles.filter(
-                dia=weekday_to_str[fecha.weekday()]
-            ).order_by(
-                "hora_inicio", "minuto_inicio"
-            )
+            medianoche = datetime(fecha.year, fecha.month, fecha.day, tzinfo=TZ_CHILE)
 
-            for disp in horarios_disponibles:
-                inicio = datetime(fecha.year, fecha.month, fecha.day, disp.hora_inicio, disp.minuto_inicio, tzinfo=TZ_CHILE)
+            for minuto_inicio, minuto_fin in carga.plantilla(self.entrevistador, fecha.weekday()):
+                inicio = medianoche + timedelta(minutes=minuto_inicio)
 
                 if inicio >= fecha_fin:  # no more blocks to add
                     break
@@ -94,18 +240,9 @@ class Horario:
                 if inicio < fecha_inicio:
                     inicio = fecha_inicio
 
-                fin = datetime(fecha.year, fecha.month, fecha.day, disp.hora_fin, disp.minuto_fin, tzinfo=TZ_CHILE)
-
-                if fin > fecha_fin:
-                    fin = fecha_fin
-
-                try:
-                    if disponibilidad[-1].fin >= inicio:
-                        disponibilidad[-1].fin = fin
-                        continue
-                except IndexError:
-                    pass
+                fin = min(medianoche + timedelta(minutes=minuto_fin), fecha_fin)
 
+                # la plantilla ya viene unida, así que basta con descartar lo que no alcance para una entrevista
                 if (fin - inicio) >= timedelta(minutes=MINUTOS_BLOQUE_ENTREVISTA):
                     disponibilidad.append(BloqueHorario(inicio, fin))
 
@@ -116,87 +253,84 @@ class Horario:
 
         return disponibilidad
 
-    def _get_bloqueos(self, fecha_inicio: datetime, fecha_fin: datetime) -> list[BloqueHorario]:
-        bloqueos = self.entrevistador.bloqueos.filter(
-            fecha_inicio__lt=fecha_fin,
-            fecha_fin__gt=fecha_inicio,
-        ).order_by(
-            "fecha_inicio",
-        )
-
-        bloqueos_manuales = [
-            BloqueHorario(localtime(bloqueo.fecha_inicio), localtime(bloqueo.fecha_fin))
-            for bloqueo in bloqueos
-        ]
-
-        entrevistas = self.entrevistador.entrevistas.filter(
-            fecha_inicio__lt=fecha_fin,
-            fecha_fin__gt=fecha_inicio,
-        ).order_by(
-            "fecha_inicio",
-        )
-
-        bloqueos_entrevistas = [
-            BloqueHorario(entrevista.fecha_inicio, entrevista.fecha_fin)
-            for entrevista in entrevistas
-        ]
-
-        return sorted(bloqueos_manuales + bloqueos_entrevistas, key=lambda bloqueo: bloqueo.inicio)
+    def _get_bloqueos(self, carga: CargaHorarios) -> list[BloqueHorario]:
+        return carga.bloqueos(self.entrevistador)
 
 
 class HorarioGlobal:
-    def __init__(self):
-        self.entrevistadores = Sicologo.objects.filter(horarios_disponibles__isnull=False)
-
     def generar_bloques_disponibles(self, fecha_inicio: datetime, fecha_fin: datetime) -> list[BloqueHorario]:
         horarios = self._generar_horarios(fecha_inicio, fecha_fin).values()
 
-        minutos = set()
-
-        for horario in horarios:
-            for bloque in horario:
-                minuto = bloque.inicio
-
-                while minuto <= bloque.fin:
-                    minutos.add(minuto)
-                    minuto += timedelta(minutes=1)
+        return unir_bloques([bloque for horario in horarios for bloque in horario])
+
+    def bloques_por_dia(
+            self, fecha_inicio: datetime, fecha_fin: datetime, dias_por_lote: int = 7,
+    ) -> Iterator[tuple[date, list[BloqueHorario]]]:
+        """
+        Bloques disponibles en [fecha_inicio, fecha_fin) agrupados por día (solo los días que tienen alguno). Se
+        calculan de a `dias_por_lote` días y a medida que se consumen, así que quien deja de iterar no paga por los
+        días que no usó.
+        """
+        inicio_lote = localtime(fecha_inicio)
+        fecha_fin = localtime(fecha_fin)
 
-        horario_global = []
-        minutos = list(sorted(minutos))
-        bloque = None
+        while inicio_lote < fecha_fin:
+            siguiente = inicio_lote.date() + timedelta(days=dias_por_lote)
+            fin_lote = min(datetime(siguiente.year, siguiente.month, siguiente.day, tzinfo=TZ_CHILE), fecha_fin)
+            por_dia = defaultdict(list)
 
-        for min in minutos:
-            if bloque is None:
-                bloque = BloqueHorario(min, min)
-            elif min - bloque.fin == timedelta(minutes=1):
-                bloque.fin = min
-            else:
-                if bloque.fin - bloque.inicio >= timedelta(minutes=15):
-                    horario_global.append(bloque)
-                bloque = BloqueHorario(min, min)
+            for bloque in self.generar_bloques_disponibles(inicio_lote, fin_lote):
+                por_dia[bloque.fecha()].append(bloque)
 
-        if bloque and bloque.fin - bloque.inicio >= timedelta(minutes=15):
-            horario_global.append(bloque)
+            yield from por_dia.items()
 
-        return horario_global
+            inicio_lote = fin_lote
 
     def obtener_entrevistadores(self, inicio: Union[datetime, str], fin: Union[datetime, str]) -> list[Sicologo]:
+        """
+        Sicólogos libres durante todo [inicio, fin): la plantilla semanal lo contiene y no tienen bloqueos ni
+        entrevistas que se solapen. Se resuelve con una consulta, sin generar los horarios completos.
+        """
         if isinstance(inicio, str):
             inicio = datetime.strptime(inicio, "%Y-%m-%d %H:%M").astimezone(TZ_CHILE)
 
         if isinstance(fin, str):
             fin = datetime.strptime(fin, "%Y-%m-%d %H:%M").astimezone(TZ_CHILE)
 
-        horarios_dict = self._generar_horarios(inicio, fin)
+        inicio = localtime(inicio)
+        fin = localtime(fin)
+        medianoche = datetime(inicio.year, inicio.month, inicio.day, tzinfo=TZ_CHILE)
+        minuto_inicio = inicio.weekday() * MINUTOS_DIA + (inicio - medianoche) // _UN_MINUTO
+        minuto_fin = minuto_inicio + (fin - inicio) // _UN_MINUTO
+
+        entrevistadores = list(
+            Sicologo.objects.filter(
+                ~Exists(Bloqueo.objects.filter(
+                    entrevistador=OuterRef("pk"),
+                    fecha_inicio__lt=fin,
+                    fecha_fin__gt=inicio,
+                )),
+                ~Exists(Entrevista.objects.filter(
+                    entrevistador=OuterRef("pk"),
+                    fecha_inicio__lt=fin,
+                    fecha_fin__gt=inicio,
+                )),
+                plantilla_semanal__isnull=False,
+            ).order_by(
+                "pk",
+            )
+        )
 
         return [
             entrevistador
-            for entrevistador, horarios in horarios_dict.items()
-            if len(horarios) == 1 and horarios[0].inicio == inicio and horarios[0].fin == fin
+            for entrevistador in entrevistadores
+            if plantilla_contiene(entrevistador.plantilla_semanal, minuto_inicio, minuto_fin)
         ]
 
     def _generar_horarios(self, fecha_inicio: datetime, fecha_fin: datetime) -> dict[Sicologo, list[BloqueHorario]]:
+        carga = CargaHorarios(localtime(fecha_inicio), localtime(fecha_fin))
+
         return {
-            entrevistador: Horario(entrevistador).generar_bloques_disponibles(fecha_inicio, fecha_fin)
-            for entrevistador in self.entrevistadores
+            entrevistador: Horario(entrevistador, carga).generar_bloques_disponibles(fecha_inicio, fecha_fin)
+            for entrevistador in carga.entrevistadores
         }
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("entrevistas", "0012_sicologo_genero_sicologo_titulo"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sicologo",
+            name="plantilla_semanal",
+            field=models.JSONField(
+                editable=False,
+                help_text="Disponibilidades unidas en intervalos [inicio, fin) en minutos desde el lunes a las 00:00.",
+                null=True,
+                verbose_name="plantilla semanal",
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("entrevistas", "0013_sicologo_plantilla_semanal"),
+        ("tests", "0018_resultado_cerrado"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="bloqueo",
+            index=models.Index(
+                fields=["entrevistador", "fecha_fin", "fecha_inicio"],
+                name="entrevistas_entrevi_aeb946_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="entrevista",
+            index=models.Index(
+                fields=["entrevistador", "fecha_fin", "fecha_inicio"],
+                name="entrevistas_entrevi_bfd931_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:29
+
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+
+SIN_SOLAPAMIENTO = "entrevista_sin_solapamiento"
+
+
+def crear_restriccion_sin_solapamiento(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(
+        f"ALTER TABLE entrevistas_entrevista ADD CONSTRAINT {SIN_SOLAPAMIENTO} "
+        "EXCLUDE USING gist (entrevistador_id WITH =, tstzrange(fecha_inicio, fecha_fin) WITH &&)"
+    )
+
+
+def eliminar_restriccion_sin_solapamiento(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(f"ALTER TABLE entrevistas_entrevista DROP CONSTRAINT {SIN_SOLAPAMIENTO}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("entrevistas", "0014_indices_solapamiento"),
+        ("tests", "0018_resultado_cerrado"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="entrevista",
+            constraint=models.UniqueConstraint(fields=("acceso",), name="entrevista_acceso_unico"),
+        ),
+        # solo PostgreSQL: CreateExtension y la restricción EXCLUDE no hacen nada en otros motores
+        BtreeGistExtension(),
+        migrations.RunPython(crear_restriccion_sin_solapamiento, eliminar_restriccion_sin_solapamiento),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:31
+
+from collections import Counter
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.timezone import localtime
+
+
+def contar_entrevistas_existentes(apps, schema_editor):
+    Entrevista = apps.get_model("entrevistas", "Entrevista")
+    ContadorEntrevistas = apps.get_model("entrevistas", "ContadorEntrevistas")
+    cantidades = Counter()
+
+    for entrevistador_id, fecha_inicio in Entrevista.objects.values_list("entrevistador_id", "fecha_inicio"):
+        dia = localtime(fecha_inicio).date()
+        cantidades[(entrevistador_id, dia - timedelta(days=dia.weekday()))] += 1
+
+    ContadorEntrevistas.objects.bulk_create([
+        ContadorEntrevistas(entrevistador_id=entrevistador_id, semana=semana, cantidad=cantidad)
+        for (entrevistador_id, semana), cantidad in cantidades.items()
+    ])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("entrevistas", "0015_reservas_sin_bloqueos"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContadorEntrevistas",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("semana", models.DateField(help_text="Lunes de la semana")),
+                ("cantidad", models.IntegerField(default=0)),
+                (
+                    "entrevistador",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="contadores",
+                        to="entrevistas.sicologo",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Contador de entrevistas",
+                "verbose_name_plural": "Contadores de entrevistas",
+                "unique_together": {("entrevistador", "semana")},
+            },
+        ),
+        migrations.RunPython(contar_entrevistas_existentes, migrations.RunPython.noop),
+    ]
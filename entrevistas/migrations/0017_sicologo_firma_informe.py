@@ -0,0 +1,65 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:57
+
+import logging
+from io import BytesIO
+from pathlib import Path
+
+from django.core.files.base import ContentFile
+from django.db import migrations, models
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+ALTO_FIRMA_INFORME = 300
+
+
+def reducir_imagen(archivo, alto):
+    # copia de utils.imagenes.reducir_imagen al momento de esta migración, para que no cambie si esa función cambia
+    with Image.open(archivo) as imagen:
+        imagen.load()
+
+    if imagen.mode not in ("L", "LA", "RGB", "RGBA"):
+        imagen = imagen.convert("RGBA")
+
+    if imagen.height > alto:
+        imagen = imagen.resize((max(round(imagen.width * alto / imagen.height), 1), alto), Image.LANCZOS)
+
+    salida = BytesIO()
+    imagen.save(salida, format="PNG", optimize=True)
+    return salida.getvalue()
+
+
+def reducir_firmas_existentes(apps, schema_editor):
+    Sicologo = apps.get_model("entrevistas", "Sicologo")
+
+    for sicologo in Sicologo.objects.exclude(firma=""):
+        try:
+            with sicologo.firma.open("rb") as firma:
+                contenido = reducir_imagen(firma, ALTO_FIRMA_INFORME)
+        except OSError:
+            logger.warning("No se pudo reducir la firma %s", sicologo.firma.name, exc_info=True)
+            continue
+
+        sicologo.firma_informe.save(f"{Path(sicologo.firma.name).stem}.png", ContentFile(contenido), save=False)
+        Sicologo.objects.filter(pk=sicologo.pk).update(firma_informe=sicologo.firma_informe.name)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("entrevistas", "0016_contadorentrevistas"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sicologo",
+            name="firma_informe",
+            field=models.ImageField(
+                blank=True,
+                editable=False,
+                help_text="La firma reducida que se incluye en los informes; se genera al guardar la firma.",
+                upload_to="firmas/informe/",
+                verbose_name="firma para informes",
+            ),
+        ),
+        migrations.RunPython(reducir_firmas_existentes, migrations.RunPython.noop),
+    ]
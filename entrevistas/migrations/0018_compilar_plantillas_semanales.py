@@ -0,0 +1,58 @@
+from collections import defaultdict
+
+from django.db import migrations
+
+# copias de entrevistas.models al momento de esta migración, para que no cambie si el modelo cambia
+DIAS = ["lunes", "martes", "miercoles", "jueves", "viernes", "sabado", "domingo"]
+MINUTOS_DIA = 24 * 60
+
+
+def unir_intervalos_semanales(intervalos):
+    unidos = []
+
+    for inicio, fin in sorted(intervalos):
+        if fin <= inicio:
+            continue
+
+        if unidos and unidos[-1][1] >= inicio:
+            unidos[-1][1] = max(unidos[-1][1], fin)
+        else:
+            unidos.append([inicio, fin])
+
+    return unidos
+
+
+def compilar_plantillas(apps, schema_editor):
+    """
+    Compila las plantillas que aún no existen: hasta ahora se compilaban al leer los horarios, y desde esta versión
+    solo las compilan las señales de Disponibilidad.
+    """
+    Sicologo = apps.get_model("entrevistas", "Sicologo")
+    Disponibilidad = apps.get_model("entrevistas", "Disponibilidad")
+    intervalos = defaultdict(list)
+
+    for entrevistador_id, dia, hora_inicio, minuto_inicio, hora_fin, minuto_fin in Disponibilidad.objects.values_list(
+        "entrevistador_id", "dia", "hora_inicio", "minuto_inicio", "hora_fin", "minuto_fin",
+    ):
+        inicio_dia = DIAS.index(dia) * MINUTOS_DIA
+        intervalos[entrevistador_id].append((
+            inicio_dia + hora_inicio * 60 + minuto_inicio,
+            inicio_dia + hora_fin * 60 + minuto_fin,
+        ))
+
+    for sicologo_id in Sicologo.objects.filter(plantilla_semanal__isnull=True).values_list("pk", flat=True):
+        Sicologo.objects.filter(
+            pk=sicologo_id,
+        ).update(
+            plantilla_semanal=unir_intervalos_semanales(intervalos[sicologo_id]),
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("entrevistas", "0017_sicologo_firma_informe"),
+    ]
+
+    operations = [
+        migrations.RunPython(compilar_plantillas, migrations.RunPython.noop),
+    ]
@@ -1,18 +1,46 @@
-from datetime import datetime
+import logging
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Iterable, Optional
 from zoneinfo import ZoneInfo
 
 from django.contrib.auth.models import User
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import models, transaction
+from django.utils.timezone import localtime
 
 from tests.models import Persona, AccesoTestPersona, Resultado, ResultadoEvaluacion, Test
+from utils.imagenes import reducir_imagen
+
+logger = logging.getLogger(__name__)
+
+# el doble de los 150px con que se muestra la firma en el informe, para que se vea nítida impresa
+ALTO_FIRMA_INFORME = 300
 
 
 class Sicologo(models.Model):
     usuario = models.OneToOneField(User, on_delete=models.RESTRICT, related_name="entrevistador")
     nro_registro = models.CharField(max_length=20, blank=False)
     firma = models.ImageField(upload_to="firmas/", blank=False)
+    firma_informe = models.ImageField(
+        "firma para informes",
+        upload_to="firmas/informe/",
+        blank=True,
+        editable=False,
+        help_text="La firma reducida que se incluye en los informes; se genera al guardar la firma.",
+    )
     genero = models.CharField(max_length=1, choices=(("M", "Masculino"), ("F", "Femenino")))
     titulo = models.CharField("título", max_length=100, blank=False, help_text="Ej: Psicólogo Clínico")
+    plantilla_semanal = models.JSONField(
+        "plantilla semanal",
+        null=True,
+        editable=False,
+        help_text="Disponibilidades unidas en intervalos [inicio, fin) en minutos desde el lunes a las 00:00.",
+    )
+
+    # la firma con que se leyó de la base de datos (None si es nuevo o se leyó sin la firma)
+    _firma_original = None
 
     class Meta:
         verbose_name = "Sicólogo"
@@ -20,6 +48,59 @@ class Sicologo(models.Model):
     def __str__(self):
         return self.usuario.get_full_name()
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        sicologo = super().from_db(db, field_names, values)
+
+        if "firma" in sicologo.__dict__:
+            sicologo._firma_original = sicologo.__dict__["firma"]
+
+        return sicologo
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        firma_informe_anterior = None
+
+        if (update_fields is None or "firma" in update_fields) and self._firma_ha_cambiado():
+            firma_informe_anterior = self.firma_informe.name
+            self.generar_firma_informe()
+
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "firma_informe"}
+
+        super().save(*args, **kwargs)
+        self._firma_original = self.firma.name
+
+        if firma_informe_anterior:
+            storage = self.firma_informe.storage
+            transaction.on_commit(lambda: storage.delete(firma_informe_anterior))
+
+    def _firma_ha_cambiado(self) -> bool:
+        return self._firma_original != self.firma.name or not self.firma_informe
+
+    def generar_firma_informe(self):
+        """Deja en firma_informe la firma escalada a ALTO_FIRMA_INFORME píxeles de alto, o nada si no hay firma."""
+        self.firma_informe = None
+
+        if not self.firma:
+            return
+
+        # una firma recién subida todavía no está en el storage: no se cierra, porque falta guardarla
+        guardada = self.firma._committed
+
+        try:
+            self.firma.open("rb")
+            contenido = reducir_imagen(self.firma, ALTO_FIRMA_INFORME)
+        except OSError:
+            # los informes usarán la firma original
+            logger.warning("No se pudo reducir la firma %s", self.firma.name, exc_info=True)
+            return
+        finally:
+            if guardada:
+                self.firma.close()
+
+        self.firma_informe = ContentFile(contenido, name=f"{Path(self.firma.name).stem}.png")
+
     @property
     def first_name(self):
         return self.usuario.first_name
@@ -28,6 +109,49 @@ class Sicologo(models.Model):
     def last_name(self):
         return self.usuario.last_name
 
+    def compilar_plantilla_semanal(
+            self, disponibilidades: Optional[Iterable["Disponibilidad"]] = None,
+    ) -> list[list[int]]:
+        """
+        Ordena y une (si se solapan o son contiguas) las disponibilidades del sicólogo y guarda el resultado en
+        plantilla_semanal. Se llama desde las señales de Disponibilidad: la lectura de horarios no escribe.
+        """
+        if disponibilidades is None:
+            disponibilidades = self.horarios_disponibles.all()
+
+        plantilla = unir_intervalos_semanales(disp.intervalo_semanal for disp in disponibilidades)
+
+        self.plantilla_semanal = plantilla
+        Sicologo.objects.filter(pk=self.pk).update(plantilla_semanal=plantilla)
+
+        return plantilla
+
+
+def unir_intervalos_semanales(intervalos: Iterable[tuple[int, int]]) -> list[list[int]]:
+    """Ordena los intervalos [inicio, fin) y une los que se solapan o son contiguos; descarta los vacíos."""
+    unidos = []
+
+    for inicio, fin in sorted(intervalos):
+        if fin <= inicio:
+            continue
+
+        if unidos and unidos[-1][1] >= inicio:
+            unidos[-1][1] = max(unidos[-1][1], fin)
+        else:
+            unidos.append([inicio, fin])
+
+    return unidos
+
+
+def lunes_de(fecha: datetime) -> date:
+    """Lunes (hora de Chile) de la semana de la fecha."""
+    dia = localtime(fecha).date()
+    return dia - timedelta(days=dia.weekday())
+
+
+RESTRICCION_ACCESO_UNICO = "entrevista_acceso_unico"
+RESTRICCION_SIN_SOLAPAMIENTO = "entrevista_sin_solapamiento"
+
 
 class Entrevista(models.Model):
     entrevistador = models.ForeignKey(Sicologo, on_delete=models.RESTRICT, related_name="entrevistas")
@@ -46,6 +170,17 @@ class Entrevista(models.Model):
         help_text="Si se indica un valor, este tiene precedencia sobre el resultado del test."
     )
 
+    class Meta:
+        indexes = [
+            # búsqueda de solapamientos al reservar: entrevistador = X and fecha_fin > inicio and fecha_inicio < fin
+            models.Index(fields=["entrevistador", "fecha_fin", "fecha_inicio"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["acceso"], name=RESTRICCION_ACCESO_UNICO),
+            # en PostgreSQL además existe RESTRICCION_SIN_SOLAPAMIENTO (EXCLUDE USING gist, ver migración 0015),
+            # que no se declara aquí porque SQLite no la soporta
+        ]
+
     def __str__(self):
         return f"{self.entrevistador} : {self.entrevistado} el {self.fecha}"
 
@@ -96,22 +231,23 @@ MINUTO_CHOICES = (
     (45, "45"),
 )
 
+# en el orden de date.weekday()
+DIA_CHOICES = (
+    ("lunes", "Lunes"),
+    ("martes", "Martes"),
+    ("miercoles", "Miércoles"),
+    ("jueves", "Jueves"),
+    ("viernes", "Viernes"),
+    ("sabado", "Sábado"),
+    ("domingo", "Domingo"),
+)
+DIAS = [dia for dia, _ in DIA_CHOICES]
+MINUTOS_DIA = 24 * 60
+
 
 class Disponibilidad(models.Model):
     entrevistador = models.ForeignKey(Sicologo, on_delete=models.CASCADE, related_name="horarios_disponibles")
-    dia = models.CharField(
-        "día",
-        max_length=9,
-        choices=(
-            ("lunes", "Lunes"),
-            ("martes", "Martes"),
-            ("miercoles", "Miércoles"),
-            ("jueves", "Jueves"),
-            ("viernes", "Viernes"),
-            ("sabado", "Sábado"),
-            ("domingo", "Domingo"),
-        ),
-    )
+    dia = models.CharField("día", max_length=9, choices=DIA_CHOICES)
     hora_inicio = models.IntegerField(choices=HORA_CHOICES)
     minuto_inicio = models.IntegerField(choices=MINUTO_CHOICES)
     hora_fin = models.IntegerField(choices=HORA_CHOICES)
@@ -120,9 +256,52 @@ class Disponibilidad(models.Model):
     class Meta:
         verbose_name_plural = "disponibilidades"
 
+    def clean(self):
+        if self.dia not in DIAS or None in (self.hora_inicio, self.minuto_inicio, self.hora_fin, self.minuto_fin):
+            return  # ya reportado por la validación de cada campo
+
+        inicio, fin = self.intervalo_semanal
+
+        if fin <= inicio:
+            raise ValidationError("La hora de término debe ser posterior a la hora de inicio.")
+
+    @property
+    def intervalo_semanal(self) -> tuple[int, int]:
+        """Inicio y fin en minutos desde el lunes a las 00:00."""
+        dia = DIAS.index(self.dia) * MINUTOS_DIA
+        return dia + self.hora_inicio * 60 + self.minuto_inicio, dia + self.hora_fin * 60 + self.minuto_fin
+
+
+class ContadorEntrevistas(models.Model):
+    """
+    Cantidad de entrevistas de un sicólogo en una semana, mantenida desde entrevistas.signals para elegir
+    entrevistador sin contar filas de Entrevista en cada reserva.
+    """
+    entrevistador = models.ForeignKey(Sicologo, on_delete=models.CASCADE, related_name="contadores")
+    semana = models.DateField(help_text="Lunes de la semana")
+    cantidad = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("entrevistador", "semana")
+        verbose_name = "Contador de entrevistas"
+        verbose_name_plural = "Contadores de entrevistas"
+
+    def __str__(self):
+        return f"{self.entrevistador} - {self.semana}: {self.cantidad}"
+
+    @classmethod
+    def sumar(cls, entrevistador_id: int, fecha: datetime, cantidad: int):
+        contador, _ = cls.objects.get_or_create(entrevistador_id=entrevistador_id, semana=lunes_de(fecha))
+        cls.objects.filter(pk=contador.pk).update(cantidad=models.F("cantidad") + cantidad)
+
 
 class Bloqueo(models.Model):
     entrevistador = models.ForeignKey(Sicologo, on_delete=models.CASCADE, related_name="bloqueos")
     fecha_inicio = models.DateTimeField()
     fecha_fin = models.DateTimeField()
     motivo = models.TextField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["entrevistador", "fecha_fin", "fecha_inicio"]),
+        ]
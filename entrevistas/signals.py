@@ -0,0 +1,99 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from entrevistas import cache
+from entrevistas.models import Bloqueo, ContadorEntrevistas, Disponibilidad, Entrevista, Sicologo, lunes_de
+
+
+def _al_confirmar(fn, *args):
+    # se invalida de inmediato y otra vez al confirmar la transacción, por si entre medio otra petición
+    # alcanzó a recalcular el snapshot con los datos anteriores
+    fn(*args)
+    transaction.on_commit(lambda: fn(*args))
+
+
+@receiver(post_save, sender=Disponibilidad)
+@receiver(post_delete, sender=Disponibilidad)
+def invalidar_disponibilidad(sender, instance: Disponibilidad, **kwargs):
+    _compilar_al_confirmar(instance.entrevistador_id)
+    _al_confirmar(cache.invalidar_entrevistador, instance.entrevistador_id)
+
+
+def _compilar_al_confirmar(entrevistador_id: int):
+    """
+    Compila la plantilla del sicólogo al confirmar la transacción, una sola vez aunque cambien varias de sus
+    disponibilidades (como al guardar el inline del admin), y con lo que haya quedado después de todas.
+    """
+    conexion = transaction.get_connection()
+    pendientes = conexion.__dict__.setdefault("plantillas_pendientes", {})
+    registrada = pendientes.get(entrevistador_id)
+
+    # si la transacción o el savepoint se revirtió, la compilación registrada ya no está en la cola
+    if registrada and any(fn is registrada for _, fn, _ in conexion.run_on_commit):
+        return
+
+    def compilar():
+        if pendientes.get(entrevistador_id) is compilar:
+            del pendientes[entrevistador_id]
+
+        compilar_plantilla(entrevistador_id)
+
+    pendientes[entrevistador_id] = compilar
+    transaction.on_commit(compilar)
+
+
+def compilar_plantilla(entrevistador_id: int):
+    sicologo = Sicologo.objects.filter(pk=entrevistador_id).first()
+
+    # al borrar el sicólogo sus disponibilidades se eliminan antes que él
+    if sicologo:
+        sicologo.compilar_plantilla_semanal()
+
+
+@receiver(pre_save, sender=Bloqueo)
+@receiver(pre_save, sender=Entrevista)
+def recordar_rango_anterior(sender, instance, **kwargs):
+    """Guarda el sicólogo y rango previos, para invalidar también los días que el cambio deja libres."""
+    instance._rango_anterior = None
+
+    if instance.pk:
+        instance._rango_anterior = sender.objects.filter(
+            pk=instance.pk,
+        ).values_list(
+            "entrevistador_id", "fecha_inicio", "fecha_fin",
+        ).first()
+
+
+@receiver(post_save, sender=Bloqueo)
+@receiver(post_save, sender=Entrevista)
+@receiver(post_delete, sender=Bloqueo)
+@receiver(post_delete, sender=Entrevista)
+def invalidar_bloqueo(sender, instance, **kwargs):
+    rango_anterior = getattr(instance, "_rango_anterior", None)
+
+    if rango_anterior:
+        _al_confirmar(cache.invalidar_dias, *rango_anterior)
+
+    _al_confirmar(cache.invalidar_dias, instance.entrevistador_id, instance.fecha_inicio, instance.fecha_fin)
+
+
+@receiver(post_save, sender=Entrevista)
+def contar_entrevista(sender, instance: Entrevista, created: bool, **kwargs):
+    rango_anterior = getattr(instance, "_rango_anterior", None)
+
+    if rango_anterior:
+        entrevistador_id, fecha_inicio, _ = rango_anterior
+
+        if entrevistador_id == instance.entrevistador_id and lunes_de(fecha_inicio) == lunes_de(instance.fecha_inicio):
+            return
+
+        ContadorEntrevistas.sumar(entrevistador_id, fecha_inicio, -1)
+
+    ContadorEntrevistas.sumar(instance.entrevistador_id, instance.fecha_inicio, 1)
+
+
+@receiver(post_delete, sender=Entrevista)
+def descontar_entrevista(sender, instance: Entrevista, **kwargs):
+    ContadorEntrevistas.sumar(instance.entrevistador_id, instance.fecha_inicio, -1)
+
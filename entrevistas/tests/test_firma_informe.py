@@ -0,0 +1,79 @@
+from io import BytesIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+from entrevistas.models import ALTO_FIRMA_INFORME, Sicologo
+from tests.generadores.informe import firma_data_uri
+
+
+@pytest.fixture(autouse=True)
+def _media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+def _firma(ancho: int, alto: int) -> SimpleUploadedFile:
+    contenido = BytesIO()
+    Image.new("RGBA", (ancho, alto), (0, 0, 128, 255)).save(contenido, format="PNG")
+    return SimpleUploadedFile("firma.png", contenido.getvalue(), content_type="image/png")
+
+
+def _crear_sicologo(firma: SimpleUploadedFile) -> Sicologo:
+    return Sicologo.objects.create(usuario=User.objects.create_user(username="sicologo"), firma=firma)
+
+
+@pytest.mark.django_db
+def test_firma_informe_reducida():
+    sicologo = _crear_sicologo(_firma(1800, 900))
+
+    with Image.open(sicologo.firma_informe.path) as imagen:
+        assert imagen.size == (ALTO_FIRMA_INFORME * 2, ALTO_FIRMA_INFORME)
+
+    assert sicologo.firma_informe.size < sicologo.firma.size
+
+
+@pytest.mark.django_db
+def test_firma_informe_solo_se_genera_al_cambiar_la_firma(
+        django_assert_num_queries, django_capture_on_commit_callbacks,
+):
+    sicologo = _crear_sicologo(_firma(200, 100))
+    generada = sicologo.firma_informe.name
+
+    # una firma más chica que ALTO_FIRMA_INFORME no se agranda
+    with Image.open(sicologo.firma_informe.path) as imagen:
+        assert imagen.size == (200, 100)
+
+    # sin consultar la firma guardada: se recuerda la que tenía al leerlo
+    sicologo = Sicologo.objects.get(pk=sicologo.pk)
+    sicologo.nro_registro = "1234"
+
+    with django_assert_num_queries(1):
+        sicologo.save()
+
+    assert Sicologo.objects.get(pk=sicologo.pk).firma_informe.name == generada
+
+    sicologo.firma = _firma(1200, 600)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        sicologo.save(update_fields=["firma"])
+
+    sicologo = Sicologo.objects.get(pk=sicologo.pk)
+    assert sicologo.firma_informe.name != generada
+    assert not sicologo.firma_informe.storage.exists(generada)
+
+    with Image.open(sicologo.firma_informe.path) as imagen:
+        assert imagen.height == ALTO_FIRMA_INFORME
+
+
+@pytest.mark.django_db
+def test_firma_data_uri():
+    sicologo = _crear_sicologo(_firma(600, 300))
+    firma_data_uri.cache_clear()
+
+    uri = firma_data_uri(sicologo.firma_informe.name)
+
+    assert uri.startswith("data:image/png;base64,")
+    assert firma_data_uri(sicologo.firma_informe.name) is uri
+    assert firma_data_uri.cache_info().hits == 1
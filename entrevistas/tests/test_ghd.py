@@ -1,14 +1,21 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import pytest
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.forms import modelform_factory
 
+from entrevistas.asignacion import AsignacionAleatoria, AsignacionMenorCarga, AsignacionRoundRobin
+from entrevistas.cache import HorarioGlobalCacheado, _clave_dia
 from entrevistas.ghd import Horario, HorarioGlobal
-from entrevistas.models import Sicologo
+from entrevistas.models import MINUTOS_DIA, ContadorEntrevistas, Disponibilidad, Sicologo
 from utils.fechas import TZ_CHILE
 
 
-@pytest.mark.django_db
+# con transacciones reales, porque la plantilla semanal se compila al confirmar el cambio de disponibilidad
+@pytest.mark.django_db(transaction=True)
 class TestGeneradorDeHorasDeDisponibilidad:
     def _create_entrevistador(self):
         user = User.objects.create_user(username="entrevistador")
@@ -341,3 +348,267 @@ class TestGeneradorDeHorasDeDisponibilidad:
         assert fn("2024-04-01 12:30", "2024-04-01 13:00") == [user2]
         assert fn("2024-04-01 18:00", "2024-04-01 18:30") == []
         assert fn("2024-04-02 11:30", "2024-04-02 12:00") == []
+
+    def test_plantilla_semanal(self):
+        entrevistador = self._create_entrevistador()
+
+        for dia, hora_inicio, hora_fin in [("martes", 14, 18), ("lunes", 11, 14), ("lunes", 8, 11), ("lunes", 9, 10)]:
+            entrevistador.horarios_disponibles.create(
+                dia=dia,
+                hora_inicio=hora_inicio,
+                minuto_inicio=0,
+                hora_fin=hora_fin,
+                minuto_fin=0,
+            )
+
+        assert entrevistador.compilar_plantilla_semanal() == [[8 * 60, 14 * 60], [24 * 60 + 14 * 60, 24 * 60 + 18 * 60]]
+        entrevistador.refresh_from_db()
+        assert entrevistador.plantilla_semanal == [[480, 840], [2280, 2520]]
+
+        entrevistador.horarios_disponibles.create(
+            dia="lunes",
+            hora_inicio=20,
+            minuto_inicio=0,
+            hora_fin=21,
+            minuto_fin=0,
+        )
+        # la señal de Disponibilidad compila la plantilla al guardar
+        entrevistador.refresh_from_db()
+        assert entrevistador.plantilla_semanal == [[480, 840], [1200, 1260], [2280, 2520]]
+
+        bloques = Horario(entrevistador).generar_bloques_disponibles(
+            fecha_inicio=datetime(2024, 4, 1, 0, 0, tzinfo=TZ_CHILE),  # lunes
+            fecha_fin=datetime(2024, 4, 1, 23, 59, tzinfo=TZ_CHILE),  # lunes
+        )
+
+        assert [(bloque.inicio.hour, bloque.fin.hour) for bloque in bloques] == [(8, 14), (20, 21)]
+
+    def test_plantilla_se_compila_solo_al_cambiar_disponibilidades(self):
+        entrevistador = self._create_entrevistador()
+        disponibilidad = entrevistador.horarios_disponibles.create(
+            dia="lunes",
+            hora_inicio=8,
+            minuto_inicio=0,
+            hora_fin=12,
+            minuto_fin=0,
+        )
+        # bulk_create no pasa por las señales: la plantilla queda desactualizada y la lectura no la corrige
+        Disponibilidad.objects.bulk_create([
+            Disponibilidad(
+                entrevistador=entrevistador,
+                dia="martes",
+                hora_inicio=8,
+                minuto_inicio=0,
+                hora_fin=9,
+                minuto_fin=0,
+            ),
+        ])
+        inicio = datetime(2024, 4, 1, 0, 0, tzinfo=TZ_CHILE)  # lunes
+
+        HorarioGlobal().generar_bloques_disponibles(inicio, inicio + timedelta(days=2))
+        HorarioGlobal().obtener_entrevistadores("2024-04-02 8:00", "2024-04-02 8:30")
+
+        entrevistador.refresh_from_db()
+        assert entrevistador.plantilla_semanal == [[480, 720]]
+
+        disponibilidad.delete()
+
+        entrevistador.refresh_from_db()
+        assert entrevistador.plantilla_semanal == [[MINUTOS_DIA + 480, MINUTOS_DIA + 540]]
+
+    def test_plantilla_se_compila_una_vez_por_transaccion(self, monkeypatch):
+        entrevistador = self._create_entrevistador()
+        compilaciones = []
+        compilar = Sicologo.compilar_plantilla_semanal
+
+        def contar(sicologo, *args, **kwargs):
+            compilaciones.append(sicologo.pk)
+            return compilar(sicologo, *args, **kwargs)
+
+        monkeypatch.setattr(Sicologo, "compilar_plantilla_semanal", contar)
+
+        def crear(dia: str):
+            entrevistador.horarios_disponibles.create(dia=dia, hora_inicio=8, minuto_inicio=0, hora_fin=9, minuto_fin=0)
+
+        with transaction.atomic():
+            for dia in ["lunes", "martes", "miercoles"]:
+                crear(dia)
+
+            assert compilaciones == []
+
+        assert compilaciones == [entrevistador.pk]
+
+        # la compilación registrada en un savepoint revertido se vuelve a registrar con el cambio siguiente
+        with transaction.atomic():
+            with pytest.raises(ValueError):
+                with transaction.atomic():
+                    crear("jueves")
+                    raise ValueError
+
+            crear("viernes")
+
+        assert compilaciones == [entrevistador.pk] * 2
+        entrevistador.refresh_from_db()
+        assert [inicio // MINUTOS_DIA for inicio, _ in entrevistador.plantilla_semanal] == [0, 1, 2, 4]
+
+    def test_disponibilidad_invalida(self):
+        disponibilidad = Disponibilidad(
+            entrevistador=self._create_entrevistador(),
+            dia="lunes",
+            hora_inicio=12,
+            minuto_inicio=0,
+            hora_fin=8,
+            minuto_fin=0,
+        )
+
+        with pytest.raises(ValidationError):
+            disponibilidad.full_clean()
+
+    def test_disponibilidad_sin_dia(self):
+        formulario = modelform_factory(Disponibilidad, fields="__all__")(data={
+            "entrevistador": self._create_entrevistador().pk,
+            "dia": "",
+            "hora_inicio": 8,
+            "minuto_inicio": 0,
+            "hora_fin": 12,
+            "minuto_fin": 0,
+        })
+
+        assert not formulario.is_valid()
+        assert list(formulario.errors) == ["dia"]
+
+    def test_horario_global_consultas_constantes(self, django_assert_num_queries):
+        for i in range(5):
+            sicologo = Sicologo.objects.create(usuario=User.objects.create_user(username=f"entrevistador{i}"))
+
+            for dia in ["lunes", "martes"]:
+                sicologo.horarios_disponibles.create(
+                    dia=dia,
+                    hora_inicio=8,
+                    minuto_inicio=0,
+                    hora_fin=12,
+                    minuto_fin=0,
+                )
+            sicologo.bloqueos.create(
+                fecha_inicio=datetime(2024, 4, 1, 9, 0, tzinfo=TZ_CHILE),
+                fecha_fin=datetime(2024, 4, 1, 10, 0, tzinfo=TZ_CHILE),
+            )
+
+        with django_assert_num_queries(3):
+            horario_global = HorarioGlobal().generar_bloques_disponibles(
+                fecha_inicio=datetime(2024, 3, 30, 0, 0, tzinfo=TZ_CHILE),  # sábado
+                fecha_fin=datetime(2024, 4, 3, 23, 59, tzinfo=TZ_CHILE),  # miércoles
+            )
+
+        assert len(horario_global) == 3
+
+        with django_assert_num_queries(1):
+            assert len(HorarioGlobal().obtener_entrevistadores("2024-04-02 8:00", "2024-04-02 8:30")) == 5
+
+        with django_assert_num_queries(1):
+            assert HorarioGlobal().obtener_entrevistadores("2024-04-01 9:30", "2024-04-01 10:00") == []
+
+    def test_horario_global_cacheado(self, django_assert_num_queries):
+        user1 = self._create_entrevistador1()
+        user2 = self._create_entrevistador2()
+
+        user1.horarios_disponibles.create(
+            dia="lunes",
+            hora_inicio=8,
+            minuto_inicio=0,
+            hora_fin=12,
+            minuto_fin=0,
+        )
+        user2.horarios_disponibles.create(
+            dia="martes",
+            hora_inicio=14,
+            minuto_inicio=0,
+            hora_fin=18,
+            minuto_fin=0,
+        )
+
+        def bloques(horario_global):
+            return [
+                (bloque.inicio, bloque.fin)
+                for bloque in horario_global.generar_bloques_disponibles(
+                    fecha_inicio=datetime(2024, 3, 30, 0, 0, tzinfo=TZ_CHILE),  # sábado
+                    fecha_fin=datetime(2024, 4, 3, 23, 59, tzinfo=TZ_CHILE),  # miércoles
+                )
+            ]
+
+        assert bloques(HorarioGlobalCacheado()) == bloques(HorarioGlobal())
+
+        with django_assert_num_queries(0):
+            assert bloques(HorarioGlobalCacheado()) == [
+                (datetime(2024, 4, 1, 8, 0, tzinfo=TZ_CHILE), datetime(2024, 4, 1, 12, 0, tzinfo=TZ_CHILE)),
+                (datetime(2024, 4, 2, 14, 0, tzinfo=TZ_CHILE), datetime(2024, 4, 2, 18, 0, tzinfo=TZ_CHILE)),
+            ]
+
+        user1.bloqueos.create(
+            fecha_inicio=datetime(2024, 4, 1, 10, 0, tzinfo=TZ_CHILE),
+            fecha_fin=datetime(2024, 4, 1, 12, 0, tzinfo=TZ_CHILE),
+        )
+
+        assert bloques(HorarioGlobalCacheado())[0] == (
+            datetime(2024, 4, 1, 8, 0, tzinfo=TZ_CHILE), datetime(2024, 4, 1, 10, 0, tzinfo=TZ_CHILE),
+        )
+
+        user2.horarios_disponibles.update(hora_fin=16)
+        user2.horarios_disponibles.first().save()
+
+        assert bloques(HorarioGlobalCacheado()) == bloques(HorarioGlobal())
+        assert bloques(HorarioGlobalCacheado())[1][1] == datetime(2024, 4, 2, 16, 0, tzinfo=TZ_CHILE)
+
+    def test_horario_global_cacheado_ignora_calculo_atrasado(self):
+        user1 = self._create_entrevistador1()
+        user1.horarios_disponibles.create(dia="lunes", hora_inicio=8, minuto_inicio=0, hora_fin=12, minuto_fin=0)
+        lunes = datetime(2024, 4, 1, 0, 0, tzinfo=TZ_CHILE)
+
+        def bloques():
+            return [
+                (bloque.inicio, bloque.fin)
+                for bloque in HorarioGlobalCacheado().generar_bloques_disponibles(lunes, lunes + timedelta(days=1))
+            ]
+
+        bloques()
+        versiones = HorarioGlobalCacheado._versiones([user1.id])
+
+        user1.bloqueos.create(fecha_inicio=lunes + timedelta(hours=8), fecha_fin=lunes + timedelta(hours=12))
+
+        # un cálculo que leyó la versión antes del bloqueo guarda el día libre después de la invalidación
+        cache.set(_clave_dia(user1.id, versiones[user1.id], lunes.date()), [(8 * 60, 12 * 60)])
+
+        assert bloques() == []
+
+
+@pytest.mark.django_db
+class TestAsignacion:
+    def _crear_entrevistadores(self, cantidad: int) -> list[Sicologo]:
+        return [
+            Sicologo.objects.create(usuario=User.objects.create_user(username=f"entrevistador{i}"))
+            for i in range(cantidad)
+        ]
+
+    def test_menor_carga(self, django_assert_num_queries):
+        entrevistadores = self._crear_entrevistadores(3)
+        lunes = datetime(2024, 4, 1, 10, 0, tzinfo=TZ_CHILE)
+        ContadorEntrevistas.sumar(entrevistadores[0].id, lunes, 2)
+        ContadorEntrevistas.sumar(entrevistadores[2].id, lunes, 1)
+        ContadorEntrevistas.sumar(entrevistadores[1].id, lunes - timedelta(days=7), 5)
+
+        with django_assert_num_queries(1):
+            orden = AsignacionMenorCarga().ordenar(entrevistadores, lunes + timedelta(days=4), acceso_id=0)
+
+        assert orden == [entrevistadores[1], entrevistadores[2], entrevistadores[0]]
+
+    def test_round_robin(self):
+        entrevistadores = self._crear_entrevistadores(3)
+        primeros = [AsignacionRoundRobin().ordenar(entrevistadores, datetime.now(), 0)[0] for _ in range(6)]
+
+        assert primeros == [entrevistadores[1], entrevistadores[2], entrevistadores[0]] * 2
+
+    def test_aleatoria(self):
+        entrevistadores = self._crear_entrevistadores(3)
+        orden = AsignacionAleatoria().ordenar(entrevistadores, datetime.now(), 0)
+
+        assert sorted(orden, key=lambda entrevistador: entrevistador.id) == entrevistadores
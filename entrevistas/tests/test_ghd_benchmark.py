@@ -0,0 +1,241 @@
+import random
+from datetime import datetime, timedelta
+from time import perf_counter
+
+import pytest
+from django.contrib.auth.models import User
+
+from entrevistas.ghd import BloqueHorario, Horario, HorarioGlobal, compilar_plantillas, unir_bloques
+from entrevistas.models import DIAS as DIAS_SEMANA, Bloqueo, Disponibilidad, Entrevista, Sicologo
+from entrevistas.views import _inicios_bloques, _serializar_bloques
+from tests.models import AccesoTest, AccesoTestPersona, Persona, Test as ModeloTest
+from utils.fechas import TZ_CHILE
+
+DIAS = 8
+
+
+def _unir_bloques_por_minuto(bloques: list[BloqueHorario]) -> list[BloqueHorario]:
+    """Implementación original (un set con cada minuto), usada como referencia."""
+    minutos = set()
+
+    for bloque in bloques:
+        minuto = bloque.inicio
+
+        while minuto <= bloque.fin:
+            minutos.add(minuto)
+            minuto += timedelta(minutes=1)
+
+    horario_global = []
+    bloque = None
+
+    for min in sorted(minutos):
+        if bloque is None:
+            bloque = BloqueHorario(min, min)
+        elif min - bloque.fin == timedelta(minutes=1):
+            bloque.fin = min
+        else:
+            if bloque.fin - bloque.inicio >= timedelta(minutes=15):
+                horario_global.append(bloque)
+            bloque = BloqueHorario(min, min)
+
+    if bloque and bloque.fin - bloque.inicio >= timedelta(minutes=15):
+        horario_global.append(bloque)
+
+    return horario_global
+
+
+def _generar_bloques(cant_sicologos: int, seed: int = 0) -> list[BloqueHorario]:
+    """Entre 1 y 3 bloques por día y sicólogo, en horas y cuartos de hora entre las 8:00 y las 21:00."""
+    rnd = random.Random(seed)
+    base = datetime(2024, 4, 1, tzinfo=TZ_CHILE)
+    bloques = []
+
+    for _ in range(cant_sicologos):
+        for dia in range(DIAS):
+            fecha = base + timedelta(days=dia)
+            cuartos = sorted(rnd.sample(range(8 * 4, 21 * 4), 2 * rnd.randint(1, 3)))
+
+            for inicio, fin in zip(cuartos[::2], cuartos[1::2]):
+                bloques.append(BloqueHorario(
+                    fecha + timedelta(minutes=15 * inicio),
+                    fecha + timedelta(minutes=15 * fin),
+                ))
+
+    return bloques
+
+
+def _medir(fn, *args) -> tuple[float, list[BloqueHorario]]:
+    inicio = perf_counter()
+    resultado = fn(*args)
+    return perf_counter() - inicio, resultado
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("cant_sicologos", [10, 50, 200])
+def test_unir_bloques_vs_por_minuto(cant_sicologos):
+    bloques = _generar_bloques(cant_sicologos)
+
+    t_minutos, esperado = _medir(_unir_bloques_por_minuto, bloques)
+    t_intervalos, obtenido = _medir(unir_bloques, bloques)
+
+    print(
+        f"\n{cant_sicologos} sicólogos, {len(bloques)} bloques: "
+        f"por minuto {t_minutos * 1000:.1f} ms, por intervalos {t_intervalos * 1000:.1f} ms "
+        f"({t_minutos / t_intervalos:.0f}x)"
+    )
+
+    assert [(b.inicio, b.fin) for b in obtenido] == [(b.inicio, b.fin) for b in esperado]
+
+
+def _poblar(cant_sicologos: int, filas_por_dia: int, cant_bloqueos: int, cant_entrevistas: int, seed: int = 0):
+    """
+    Crea `cant_sicologos` sicólogos con `filas_por_dia` disponibilidades (disjuntas, entre las 8:00 y las 20:00) en
+    cada día de la semana, y `cant_bloqueos` bloqueos y `cant_entrevistas` entrevistas de 30 minutos cada uno en los
+    próximos DIAS días. Usa bulk_create, así que no pasa por las señales: las plantillas se compilan al final.
+    """
+    rnd = random.Random(seed)
+    manhana = datetime.now(tz=TZ_CHILE).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    largo_fila = 12 * 60 // filas_por_dia
+
+    usuarios = User.objects.bulk_create([User(username=f"sicologo{i}") for i in range(cant_sicologos)])
+    sicologos = Sicologo.objects.bulk_create([Sicologo(usuario=usuario) for usuario in usuarios])
+
+    Disponibilidad.objects.bulk_create([
+        Disponibilidad(
+            entrevistador=sicologo,
+            dia=dia,
+            hora_inicio=(8 * 60 + fila * largo_fila) // 60,
+            minuto_inicio=(8 * 60 + fila * largo_fila) % 60,
+            hora_fin=(8 * 60 + (fila + 1) * largo_fila - 15) // 60,
+            minuto_fin=(8 * 60 + (fila + 1) * largo_fila - 15) % 60,
+        )
+        for sicologo in sicologos
+        for dia in DIAS_SEMANA
+        for fila in range(filas_por_dia)
+    ])
+
+    def _medias_horas(cantidad: int) -> list[datetime]:
+        return [
+            manhana + timedelta(days=rnd.randrange(DIAS), minutes=30 * rnd.randrange(16, 40))
+            for _ in range(cantidad)
+        ]
+
+    Bloqueo.objects.bulk_create([
+        Bloqueo(entrevistador=sicologo, fecha_inicio=inicio, fecha_fin=inicio + timedelta(minutes=30), motivo="")
+        for sicologo in sicologos
+        for inicio in _medias_horas(cant_bloqueos)
+    ])
+
+    cant_total = cant_sicologos * cant_entrevistas
+    mandante = Persona.objects.create(rut="1-9", nombres="Mandante")
+    acceso_test = AccesoTest.objects.create(
+        test=ModeloTest.objects.create(nombre="test"),
+        mandante=mandante,
+        fecha_vencimiento=manhana + timedelta(days=30),
+    )
+    personas = Persona.objects.bulk_create([
+        Persona(rut=f"{i + 2}-0", nombres=f"Candidato {i}") for i in range(cant_total + 1)
+    ])
+    accesos = AccesoTestPersona.objects.bulk_create([
+        AccesoTestPersona(acceso_test=acceso_test, persona=persona, codigo=f"codigo{i}")
+        for i, persona in enumerate(personas)
+    ])
+    inicios = iter(_medias_horas(cant_total))
+
+    Entrevista.objects.bulk_create([
+        Entrevista(entrevistador=sicologo, acceso=acceso, fecha_inicio=inicio, fecha_fin=inicio + timedelta(minutes=30))
+        for sicologo, acceso, inicio in zip(
+            [sicologo for sicologo in sicologos for _ in range(cant_entrevistas)],
+            accesos,
+            inicios,
+        )
+    ])
+
+    compilar_plantillas(sicologos)
+
+    # el último acceso queda sin entrevista, para consultar la API
+    return sicologos, accesos[-1]
+
+
+def _ventana() -> tuple[datetime, datetime]:
+    """La misma ventana que usa horarios_disponibles."""
+    ahora = datetime.now(tz=TZ_CHILE)
+    manhana = datetime(ahora.year, ahora.month, ahora.day, 10, tzinfo=TZ_CHILE) + timedelta(days=1)
+    return manhana, ahora + timedelta(days=DIAS)
+
+
+ESCENARIOS = [
+    # sicólogos, disponibilidades por día, bloqueos y entrevistas por sicólogo
+    pytest.param(10, 1, 2, 2, id="10x1"),
+    pytest.param(50, 3, 5, 5, id="50x3"),
+    pytest.param(150, 4, 10, 10, id="150x4"),
+]
+
+
+def _reportar(nombre: str, escenario: str, segundos: float, consultas: int):
+    print(f"\n[{escenario}] {nombre}: {segundos * 1000:.1f} ms, {consultas} consultas")
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+@pytest.mark.parametrize("cant_sicologos,filas_por_dia,cant_bloqueos,cant_entrevistas", ESCENARIOS)
+class TestMotorDeHorarios:
+    @pytest.fixture(autouse=True)
+    def _escenario(self, request, cant_sicologos, filas_por_dia, cant_bloqueos, cant_entrevistas):
+        self.nombre = request.node.callspec.id
+        self.sicologos, self.acceso = _poblar(cant_sicologos, filas_por_dia, cant_bloqueos, cant_entrevistas)
+        self.inicio, self.fin = _ventana()
+
+    def test_horario(self, django_assert_max_num_queries):
+        with django_assert_max_num_queries(3) as consultas:
+            segundos, bloques = _medir(Horario(self.sicologos[0]).generar_bloques_disponibles, self.inicio, self.fin)
+
+        _reportar("Horario.generar_bloques_disponibles", self.nombre, segundos, len(consultas))
+        assert bloques
+
+    def test_horario_global(self, django_assert_max_num_queries):
+        with django_assert_max_num_queries(3) as consultas:
+            segundos, bloques = _medir(HorarioGlobal().generar_bloques_disponibles, self.inicio, self.fin)
+
+        _reportar("HorarioGlobal.generar_bloques_disponibles", self.nombre, segundos, len(consultas))
+        assert bloques
+
+    def test_obtener_entrevistadores(self, django_assert_max_num_queries):
+        hora = self.inicio.replace(hour=11) + timedelta(days=1)
+
+        with django_assert_max_num_queries(1) as consultas:
+            segundos, entrevistadores = _medir(
+                HorarioGlobal().obtener_entrevistadores, hora, hora + timedelta(minutes=30),
+            )
+
+        _reportar("HorarioGlobal.obtener_entrevistadores", self.nombre, segundos, len(consultas))
+        assert len(entrevistadores) <= len(self.sicologos)
+
+    def test_serializar_bloques(self):
+        dias = list(HorarioGlobal().bloques_por_dia(self.inicio, self.fin))
+
+        def serializar():
+            return [_serializar_bloques(fecha, _inicios_bloques(bloques)) for fecha, bloques in dias]
+
+        segundos, serializados = _medir(serializar)
+
+        _reportar(f"_serializar_bloques ({sum(map(len, serializados))} bloques)", self.nombre, segundos, 0)
+        assert all(serializados)
+
+    def test_horarios_disponibles(self, client, django_assert_max_num_queries):
+        url = f"/api/entrevistas/horarios-disponibles/?codigo={self.acceso.codigo}"
+
+        # sin cache: acceso, entrevistas del acceso, sicólogos con disponibilidad y CargaHorarios
+        with django_assert_max_num_queries(6) as consultas:
+            segundos, respuesta = _medir(client.get, url)
+
+        _reportar("horarios_disponibles (cache vacío)", self.nombre, segundos, len(consultas))
+        assert respuesta.status_code == 200
+
+        # con el snapshot en cache solo se valida el acceso: el acceso y sus entrevistas
+        with django_assert_max_num_queries(2) as consultas:
+            segundos, respuesta = _medir(client.get, url)
+
+        _reportar("horarios_disponibles (cache lleno)", self.nombre, segundos, len(consultas))
+        assert respuesta.status_code == 200
+        assert respuesta.json()["dias"]
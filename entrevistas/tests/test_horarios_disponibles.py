@@ -0,0 +1,86 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from django.contrib.auth.models import User
+
+from entrevistas.ghd import BloqueHorario
+from entrevistas.models import DIAS, Sicologo
+from entrevistas.views import _inicios_bloques, _serializar_bloques
+from tests.models import AccesoTest, AccesoTestPersona, Persona, Test as ModeloTest
+from utils.fechas import TZ_CHILE
+
+URL = "/api/entrevistas/horarios-disponibles/"
+
+
+@pytest.fixture
+def acceso(transactional_db):  # la plantilla semanal del sicólogo se compila al confirmar cada disponibilidad
+    sicologo = Sicologo.objects.create(usuario=User.objects.create_user(username="sicologo"))
+
+    for dia in DIAS:
+        sicologo.horarios_disponibles.create(dia=dia, hora_inicio=11, minuto_inicio=0, hora_fin=13, minuto_fin=0)
+
+    acceso_test = AccesoTest.objects.create(
+        test=ModeloTest.objects.create(nombre="test"),
+        mandante=Persona.objects.create(rut="1-9", nombres="Mandante"),
+        fecha_vencimiento=datetime.now(tz=TZ_CHILE) + timedelta(days=30),
+    )
+    return AccesoTestPersona.objects.create(
+        acceso_test=acceso_test,
+        persona=Persona.objects.create(rut="2-7", nombres="Candidato"),
+    )
+
+
+def _manhana() -> date:
+    return datetime.now(tz=TZ_CHILE).date() + timedelta(days=1)
+
+
+def test_primera_pagina(client, acceso):
+    respuesta = client.get(URL, {"codigo": acceso.codigo})
+
+    assert respuesta.status_code == 200
+    assert len(respuesta.json()["dias"]) == 8
+    assert respuesta.json()["dias"][0]["bloques"][0]["inicio"] == f"{_manhana().isoformat()} 11:00"
+    assert respuesta.json()["siguiente"] == (_manhana() + timedelta(days=8)).isoformat()
+
+
+def test_paginas_siguientes(client, acceso):
+    desde = _manhana() + timedelta(days=20)
+    hasta = desde + timedelta(days=4)
+
+    respuesta = client.get(URL, {"codigo": acceso.codigo, "desde": desde, "hasta": hasta, "dias": 3})
+
+    assert [dia["bloques"][0]["inicio"][:10] for dia in respuesta.json()["dias"]] == [
+        (desde + timedelta(days=i)).isoformat() for i in range(3)
+    ]
+    assert respuesta.json()["siguiente"] == (desde + timedelta(days=3)).isoformat()
+
+    respuesta = client.get(URL, {"codigo": acceso.codigo, "desde": respuesta.json()["siguiente"], "hasta": hasta})
+
+    assert len(respuesta.json()["dias"]) == 2
+    assert respuesta.json()["siguiente"] is None
+
+
+@pytest.mark.parametrize("parametros", [{"desde": "mañana"}, {"dias": "x"}, {"dias": 0}, {"dias": 100}])
+def test_parametros_invalidos(client, acceso, parametros):
+    respuesta = client.get(URL, {"codigo": acceso.codigo, **parametros})
+
+    assert respuesta.status_code == 400
+
+
+def test_serializar_bloques():
+    lunes = datetime(2024, 4, 1, tzinfo=TZ_CHILE)
+    bloques = [
+        BloqueHorario(lunes.replace(hour=10), lunes.replace(hour=10, minute=45)),
+        BloqueHorario(lunes.replace(hour=11), lunes.replace(hour=12)),
+        BloqueHorario(lunes.replace(hour=23, minute=30), lunes + timedelta(days=1)),
+    ]
+
+    inicios = _inicios_bloques(bloques)
+
+    assert list(inicios) == [10 * 60, 11 * 60, 11 * 60 + 30, 23 * 60 + 30]
+    assert _serializar_bloques(lunes.date(), inicios) == [
+        {"inicio": "2024-04-01 10:00", "fin": "2024-04-01 10:30"},
+        {"inicio": "2024-04-01 11:00", "fin": "2024-04-01 11:30"},
+        {"inicio": "2024-04-01 11:30", "fin": "2024-04-01 12:00"},
+        {"inicio": "2024-04-01 23:30", "fin": "2024-04-02 00:00"},
+    ]
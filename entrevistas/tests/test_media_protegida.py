@@ -0,0 +1,95 @@
+import pytest
+
+CONTENIDO = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def informe(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.MEDIA_ENTREGA = ""
+    (tmp_path / "informes").mkdir()
+    (tmp_path / "informes" / "abc.pdf").write_bytes(CONTENIDO)
+    return "/media/informes/abc.pdf"
+
+
+def test_requiere_sesion(client, db, host_admin, informe):
+    respuesta = client.get(informe, HTTP_HOST=host_admin)
+
+    assert respuesta.status_code == 302
+
+
+def test_archivo_completo(cliente_admin, informe):
+    respuesta = cliente_admin.get(informe)
+
+    assert respuesta.status_code == 200
+    assert respuesta.streaming
+    assert respuesta["Content-Type"] == "application/pdf"
+    assert respuesta["Accept-Ranges"] == "bytes"
+    assert int(respuesta["Content-Length"]) == len(CONTENIDO)
+    assert b"".join(respuesta.streaming_content) == CONTENIDO
+
+
+@pytest.mark.parametrize("rango,inicio,fin", [
+    ("bytes=100-199", 100, 199),
+    ("bytes=10000-", 10000, len(CONTENIDO) - 1),
+    ("bytes=-24", len(CONTENIDO) - 24, len(CONTENIDO) - 1),
+    ("bytes=5000-99999", 5000, len(CONTENIDO) - 1),
+])
+def test_rango(cliente_admin, informe, rango, inicio, fin):
+    respuesta = cliente_admin.get(informe, HTTP_RANGE=rango)
+
+    assert respuesta.status_code == 206
+    assert respuesta["Content-Range"] == f"bytes {inicio}-{fin}/{len(CONTENIDO)}"
+    assert int(respuesta["Content-Length"]) == fin - inicio + 1
+    assert b"".join(respuesta.streaming_content) == CONTENIDO[inicio:fin + 1]
+
+
+@pytest.mark.parametrize("contenido,rango", [
+    (CONTENIDO, f"bytes={len(CONTENIDO)}-"),
+    (CONTENIDO, "bytes=-0"),
+    (b"", "bytes=-10"),
+    (b"", "bytes=0-"),
+])
+def test_rango_no_satisfacible(cliente_admin, informe, settings, contenido, rango):
+    (settings.MEDIA_ROOT / "informes" / "abc.pdf").write_bytes(contenido)
+
+    respuesta = cliente_admin.get(informe, HTTP_RANGE=rango)
+
+    assert respuesta.status_code == 416
+    assert respuesta["Content-Range"] == f"bytes */{len(contenido)}"
+
+
+def test_rango_ignorado_si_cambio_el_archivo(cliente_admin, informe):
+    respuesta = cliente_admin.get(
+        informe,
+        HTTP_RANGE="bytes=0-9",
+        HTTP_IF_RANGE="Mon, 01 Jan 2001 00:00:00 GMT",
+    )
+
+    assert respuesta.status_code == 200
+    assert b"".join(respuesta.streaming_content) == CONTENIDO
+
+
+def test_x_accel_redirect(cliente_admin, informe, settings):
+    settings.MEDIA_ENTREGA = "x-accel-redirect"
+
+    respuesta = cliente_admin.get(informe)
+
+    assert respuesta.status_code == 200
+    assert respuesta["X-Accel-Redirect"] == "/media-protegida/informes/abc.pdf"
+    assert respuesta["Content-Type"] == "application/pdf"
+    assert respuesta.content == b""
+
+
+def test_x_sendfile(cliente_admin, informe, settings, tmp_path):
+    settings.MEDIA_ENTREGA = "x-sendfile"
+
+    respuesta = cliente_admin.get(informe)
+
+    assert respuesta["X-Sendfile"] == str(tmp_path / "informes" / "abc.pdf")
+    assert respuesta.content == b""
+
+
+@pytest.mark.parametrize("path", ["/media/informes/no_existe.pdf", "/media/informes", "/media/../gips/settings.py"])
+def test_no_encontrado(cliente_admin, informe, path):
+    assert cliente_admin.get(path).status_code == 404
@@ -1,36 +1,59 @@
 
 
-from collections import defaultdict
+from array import array
 from datetime import datetime, timedelta, date
-from typing import List
+from functools import lru_cache
+from typing import List, Optional
 
 from babel.dates import format_date
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.db import transaction
+from django.db import IntegrityError, connection, transaction
 from django.http import JsonResponse, HttpResponse
 from django.shortcuts import render
 from django.utils.timezone import make_aware
 from django.views.decorators.csrf import csrf_exempt
-from django.views.static import serve
 from rest_framework.decorators import api_view
 from rest_framework.exceptions import AuthenticationFailed, ValidationError
 
+from entrevistas.asignacion import get_estrategia
+from entrevistas.cache import HorarioGlobalCacheado
 from entrevistas.ghd import HorarioGlobal, MINUTOS_BLOQUE_ENTREVISTA, BloqueHorario, HORA_FMT
-from entrevistas.models import Entrevista, Sicologo
+from entrevistas.models import (
+    Entrevista, Sicologo, MINUTOS_DIA, RESTRICCION_ACCESO_UNICO, RESTRICCION_SIN_SOLAPAMIENTO,
+)
 from entrevistas.serializers import EntrevistaSerializer
 from tests.models import AccesoTestPersona, Resultado
 from utils.fechas import TZ_CHILE
-from utils.numbers import obtener_numero_aleatorio
+from utils.media import servir_media
 from utils.request import get_and_validate_acceso
 
 
+DIAS_POR_PAGINA = 8
+MAX_DIAS_POR_PAGINA = 31
+
+_UN_MINUTO = timedelta(minutes=1)
+_HORAS = [f"{minuto // 60:02d}:{minuto % 60:02d}" for minuto in range(MINUTOS_DIA)]
+
+# SQLSTATE de las violaciones de restricciones UNIQUE en PostgreSQL (psycopg2.errorcodes.UNIQUE_VIOLATION)
+UNIQUE_VIOLATION = "23505"
+
+
 class EntrevistadorConEntrevistasException(Exception):
     pass
 
 
 @csrf_exempt
 def horarios_disponibles(request):
+    """
+    Horarios disponibles paginados por día. Parámetros opcionales (fechas en formato AAAA-MM-DD):
+
+    - desde: primer día de la página (por omisión, mañana).
+    - hasta: último día que se quiere ver (por omisión, HORARIOS_DIAS_MAXIMOS días desde hoy).
+    - dias: cantidad de días de la página (por omisión, DIAS_POR_PAGINA).
+
+    La respuesta incluye en "siguiente" el valor de `desde` para pedir la página que sigue, o null si no hay más.
+    """
     try:
         get_and_validate_acceso(request)
     except AuthenticationFailed:
@@ -40,49 +63,81 @@ def horarios_disponibles(request):
 
     ahora = datetime.now(tz=TZ_CHILE)
     manhana = datetime(ahora.year, ahora.month, ahora.day, 10, tzinfo=TZ_CHILE) + timedelta(days=1)
-    horarios = HorarioGlobal().generar_bloques_disponibles(
-        fecha_inicio=manhana,
-        fecha_fin=ahora + timedelta(days=8),
-    )
-    horarios_dict = defaultdict(list)
+    ultimo_dia = ahora.date() + timedelta(days=settings.HORARIOS_DIAS_MAXIMOS)
+
+    try:
+        desde = max(_parse_fecha(request.GET.get("desde")) or manhana.date(), manhana.date())
+        hasta = min(_parse_fecha(request.GET.get("hasta")) or ultimo_dia, ultimo_dia)
+        dias = int(request.GET.get("dias", DIAS_POR_PAGINA))
+    except ValueError:
+        return JsonResponse({"error": "Parámetros inválidos"}, status=400)
+
+    if not 1 <= dias <= MAX_DIAS_POR_PAGINA:
+        return JsonResponse({"error": f"Se pueden pedir entre 1 y {MAX_DIAS_POR_PAGINA} días"}, status=400)
 
-    for h in horarios:
-        horarios_dict[h.inicio.date()].append(h)
+    fin_pagina = min(desde + timedelta(days=dias - 1), hasta)
+
+    if fin_pagina < desde:
+        return JsonResponse({"dias": [], "siguiente": None})
+
+    dias_disponibles = HorarioGlobalCacheado().bloques_por_dia(
+        fecha_inicio=max(_medianoche(desde), manhana),
+        fecha_fin=_medianoche(fin_pagina + timedelta(days=1)),
+        dias_por_lote=dias,
+    )
 
     return JsonResponse({
         "dias": [
             {
                 "fecha": _format_fecha(fecha),
-                "bloques": [bloque.to_dict() for bloque in _split_bloques(bloques)],
+                "bloques": _serializar_bloques(fecha, _inicios_bloques(bloques)),
             }
-            for fecha, bloques in horarios_dict.items()
-        ]
+            for fecha, bloques in dias_disponibles
+        ],
+        "siguiente": (fin_pagina + timedelta(days=1)).isoformat() if fin_pagina < hasta else None,
     })
 
 
+def _parse_fecha(texto: Optional[str]) -> Optional[date]:
+    return date.fromisoformat(texto) if texto else None
+
+
+def _medianoche(fecha: date) -> datetime:
+    return datetime(fecha.year, fecha.month, fecha.day, tzinfo=TZ_CHILE)
+
+
+@lru_cache(maxsize=512)
 def _format_fecha(fecha: date) -> str:
     texto_fecha = format_date(fecha, "EEEE d 'de' MMMM", locale='es_ES')
     parts = texto_fecha.split(" ")
     return f"{parts[0].capitalize()}|{parts[1]} de {parts[3].capitalize()}"
 
 
-def _split_bloques(bloques: List[BloqueHorario]) -> List[BloqueHorario]:
-    bloques_separados = []
+def _inicios_bloques(bloques: List[BloqueHorario]) -> array:
+    """
+    Minutos desde la medianoche en que empieza cada bloque de entrevista que cabe completo en alguno de `bloques`
+    (todos del mismo día).
+    """
+    inicios = array("H")
 
     for bloque in bloques:
-        inicio = bloque.inicio
-        fin = bloque.fin
+        inicio = bloque.inicio.hour * 60 + bloque.inicio.minute
+        fin = inicio + (bloque.fin - bloque.inicio) // _UN_MINUTO
+        inicios.extend(range(inicio, fin - MINUTOS_BLOQUE_ENTREVISTA + 1, MINUTOS_BLOQUE_ENTREVISTA))
+
+    return inicios
 
-        while inicio < fin:
-            nuevo_fin = inicio + timedelta(minutes=MINUTOS_BLOQUE_ENTREVISTA)
 
-            if nuevo_fin > fin:
-                return bloques_separados
+def _serializar_bloques(fecha: date, inicios: array) -> list[dict[str, str]]:
+    """Lo mismo que BloqueHorario.to_dict para cada bloque de entrevista, sin crear los BloqueHorario."""
+    prefijos = (f"{fecha.isoformat()} ", f"{(fecha + timedelta(days=1)).isoformat()} ")
+    bloques = []
 
-            bloques_separados.append(BloqueHorario(inicio, nuevo_fin))
-            inicio = nuevo_fin
+    for inicio in inicios:
+        dia_fin, fin = divmod(inicio + MINUTOS_BLOQUE_ENTREVISTA, MINUTOS_DIA)
+        bloques.append({"inicio": prefijos[0] + _HORAS[inicio], "fin": prefijos[dia_fin] + _HORAS[fin]})
 
-    return bloques_separados
+    return bloques
 
 
 @csrf_exempt
@@ -111,29 +166,70 @@ def crear_entrevista(request):
 
     termino = inicio + timedelta(minutes=int(MINUTOS_BLOQUE_ENTREVISTA))
 
-    for _ in range(2):
-        entrevistadores = HorarioGlobal().obtener_entrevistadores(inicio, termino)
+    entrevistadores = HorarioGlobal().obtener_entrevistadores(inicio, termino)
 
-        if not entrevistadores:
-            return JsonResponse({"error": "No hay sicólogos disponibles en ese horario"}, status=400)
-
-        entrevistador = entrevistadores[obtener_numero_aleatorio(0, len(entrevistadores) - 1)]
+    if not entrevistadores:
+        return JsonResponse({"error": "No hay sicólogos disponibles en ese horario"}, status=400)
 
+    for entrevistador in get_estrategia().ordenar(entrevistadores, inicio, acceso.id):
         try:
-            entrevista = _safe_crear_entrevista(entrevistador.id, inicio, termino, acceso.id)
+            entrevista = _reservar(entrevistador.id, inicio, termino, acceso.id)
         except ValueError as err:
             return JsonResponse({"error": str(err)}, status=400)
         except EntrevistadorConEntrevistasException:
-            pass
+            continue
         else:
             return JsonResponse({
                 "mensaje": "Entrevista creada",
                 "entrevista": EntrevistaSerializer(entrevista).data,
             }, status=201)
 
+    # los intentos fallaron por solapamiento, pero la causa puede ser una reserva simultánea del mismo acceso
+    if Entrevista.objects.filter(acceso_id=acceso.id).exists():
+        return JsonResponse({"error": "Ya tienes una entrevista programada"}, status=400)
+
     return JsonResponse({"error": "No se pudo crear la entrevista"}, status=500)
 
 
+def _reservar(entrevistador_id: int, inicio: datetime, termino: datetime, acceso_id: int) -> Entrevista:
+    """
+    En PostgreSQL las restricciones de la tabla impiden los solapamientos y las entrevistas repetidas, sin bloquear
+    filas. En otros motores (SQLite en desarrollo) se bloquean el sicólogo y el acceso.
+    """
+    if connection.vendor == "postgresql":
+        return _crear_entrevista_con_restricciones(entrevistador_id, inicio, termino, acceso_id)
+
+    return _safe_crear_entrevista(entrevistador_id, inicio, termino, acceso_id)
+
+
+def _crear_entrevista_con_restricciones(
+        entrevistador_id: int, inicio: datetime, termino: datetime, acceso_id: int,
+) -> Entrevista:
+    try:
+        with transaction.atomic():
+            return Entrevista.objects.create(
+                entrevistador_id=entrevistador_id,
+                fecha_inicio=inicio,
+                fecha_fin=termino,
+                acceso_id=acceso_id,
+                resultado=Resultado.objects.get(acceso_id=acceso_id),
+            )
+    except IntegrityError as err:
+        restriccion = getattr(getattr(err.__cause__, "diag", None), "constraint_name", None)
+        codigo = getattr(err.__cause__, "pgcode", None)
+
+        if restriccion == RESTRICCION_SIN_SOLAPAMIENTO:
+            raise EntrevistadorConEntrevistasException() from err
+
+        # además de RESTRICCION_ACCESO_UNICO está el índice único (de nombre generado) del OneToOne resultado, de
+        # las migraciones 0007/0008, que PostgreSQL puede revisar primero: ambos indican que el acceso ya tiene
+        # entrevista
+        if restriccion == RESTRICCION_ACCESO_UNICO or codigo == UNIQUE_VIOLATION:
+            raise ValueError("Ya tienes una entrevista programada") from err
+
+        raise
+
+
 def _safe_crear_entrevista(entrevistador_id: int, inicio: datetime, termino: datetime, acceso_id: int) -> Entrevista:
     with transaction.atomic():
         # Obtener el entrevistador y bloquearlo
@@ -181,7 +277,7 @@ def verificar(request, clave_acceso):
 @login_required
 def serve_protected_media(request, path):
     """
-    Sirve los archivos de media con protección basada en autenticación.
+    Sirve los archivos de media con protección basada en autenticación. Con MEDIA_ENTREGA configurado el archivo lo
+    envía el proxy y el worker queda libre apenas autoriza.
     """
-    document_root = settings.MEDIA_ROOT
-    return serve(request, path, document_root=document_root)
+    return servir_media(request, path)
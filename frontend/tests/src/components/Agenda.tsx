@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react'
+import React, { useState, useEffect, useCallback } from 'react'
 import {
   Box,
   Button,
@@ -22,6 +22,11 @@ type FechaDisponible = {
   bloques: Bloque[]
 }
 
+type PaginaHorarios = {
+  dias: FechaDisponible[]
+  siguiente: string | null
+}
+
 const hora = (datetime: string): string => {
   return datetime.split(' ')[1]
 }
@@ -29,6 +34,7 @@ const hora = (datetime: string): string => {
 const Agenda = ({codigo, successCallback}: {codigo: string, successCallback: () => void}) => {
   const [availableDates, setAvailableDates] = useState<FechaDisponible[]>([])
   const [currentIndex, setCurrentIndex] = useState(0)
+  const [siguiente, setSiguiente] = useState<string | null>(null)
   const [selectedTime, setSelectedTime] = useState<Bloque | null>(null)
   const toast = useToast()
   const agendarEntrevista = useMutation(
@@ -61,9 +67,12 @@ const Agenda = ({codigo, successCallback}: {codigo: string, successCallback: ()
     window.scrollTo(0, 0)
   })
 
-  useEffect( () => {
-    axios.get(`/api/entrevistas/horarios-disponibles/?codigo=${codigo}`).then(response => {
-      setAvailableDates(response.data.dias)
+  const cargarHorarios = useCallback((desde: string | null) => {
+    const params = desde ? `&desde=${desde}` : ''
+    return axios.get<PaginaHorarios>(`/api/entrevistas/horarios-disponibles/?codigo=${codigo}${params}`).then(response => {
+      setAvailableDates(current => desde ? [...current, ...response.data.dias] : response.data.dias)
+      setSiguiente(response.data.siguiente)
+      return response.data.dias.length
     }).catch(error => {
       toast({
         title: "Error cargando horarios disponibles",
@@ -72,11 +81,24 @@ const Agenda = ({codigo, successCallback}: {codigo: string, successCallback: ()
         duration: 9000,
         isClosable: true
       })
+      return 0
     })
   }, [codigo, toast])
 
+  useEffect( () => {
+    cargarHorarios(null)
+  }, [cargarHorarios])
+
   const handleNextDay = () => {
-    setCurrentIndex(current => current + 1)
+    if (currentIndex < availableDates.length - 1) {
+      setCurrentIndex(current => current + 1)
+    } else if (siguiente) {
+      cargarHorarios(siguiente).then(cantidad => {
+        if (cantidad > 0) {
+          setCurrentIndex(current => current + 1)
+        }
+      })
+    }
   }
 
   const handlePreviousDay = () => {
@@ -100,7 +122,7 @@ const Agenda = ({codigo, successCallback}: {codigo: string, successCallback: ()
       <Box display="flex" justifyContent="space-between" width="100%">
         <Button onClick={handlePreviousDay} isDisabled={currentIndex === 0}><ArrowLeftIcon /></Button>
         <Heading size="lg" textAlign="center">{nombreDia}<br />{fecha}</Heading>
-        <Button onClick={handleNextDay} isDisabled={currentIndex === availableDates.length - 1}><ArrowRightIcon /></Button>
+        <Button onClick={handleNextDay} isDisabled={currentIndex >= availableDates.length - 1 && !siguiente}><ArrowRightIcon /></Button>
       </Box>
       <Text>Entrevista de 20 minutos.</Text>
       <SimpleGrid columns={3} spacing={4}>
@@ -1,4 +1,4 @@
-import {PreguntaLikertNOAS, RespuestaParams} from "../interfaces"
+import {PreguntaLikertNOAS} from "../interfaces"
 import React, {useCallback, useEffect, useRef, useState} from "react"
 import {useMutation} from "react-query"
 import {
@@ -19,15 +19,19 @@ import {
 } from "@chakra-ui/react"
 import axios from "axios"
 
-const submitRespuesta = async ({codigo, idPregunta, respuesta}: RespuestaParams): Promise<void> => {
+// las respuestas se guardan localmente y se envían juntas: al responder la última, o tras un rato sin responder
+// (o al salir de la pestaña) para no perder el avance
+const ESPERA_GUARDADO_MS = 30000
+
+const submitRespuestas = async (codigo: string, respuestas: { [preguntaId: number]: string }): Promise<void> => {
     await axios.post(
-        `/api/tests/respuestas-likert-noas/?codigo=${codigo}`,
-        {
-            pregunta: idPregunta,
+        `/api/tests/respuestas-likert-noas/lote/?codigo=${codigo}`,
+        Object.entries(respuestas).map(([idPregunta, respuesta]) => ({
+            pregunta: Number(idPregunta),
             alternativa: respuesta,
-        },
+        })),
         {
-            timeout: 5000,
+            timeout: 10000,
         }
     )
 }
@@ -82,9 +86,9 @@ export const Preguntas = ({preguntas, codigo, successCallback, terminar, error,
     const preguntaRefs = useRef<(HTMLDivElement | null)[]>([])
     const [preguntaEnFoco, setPreguntaEnFoco] = useState<number | null>(null)
     const [preguntaRespondida, setPreguntaRespondida] = useState<number | null>(null)
-    const [respuestasPendientes, setRespuestasPendientes] = useState<number[]>([])
-    const [respuestasConError, setRespuestasConError] = useState<number[]>([])
-    const [reintentando, setReintentando] = useState(false)
+    // respuestas marcadas que aún no se guardan en el servidor
+    const [porGuardar, setPorGuardar] = useState<{ [preguntaId: number]: string }>({})
+    const [errorGuardando, setErrorGuardando] = useState(false)
 
     const space = 100
     const paddingBottom = 100
@@ -93,45 +97,60 @@ export const Preguntas = ({preguntas, codigo, successCallback, terminar, error,
     const heightNotFromQuestions = parentHeight + paddingBottom + space + bottomBoxHeight
     const heightBeforeQuestions = parentHeightTop + space
 
-    const removeFromPendientes = (id: number) => (prev: number[]) => {
-        const newPendientes = prev.filter(i => i !== id)
-        if (!newPendientes.length) {
-            setReintentando(false)
-        }
-        return newPendientes
-    }
+    const todasRespondidas = Object.keys(respuestas).length === preguntas.length
+    const hayPorGuardar = Object.keys(porGuardar).length > 0
 
-    const mutation = useMutation(
-        ({codigo, idPregunta, respuesta}: RespuestaParams) => submitRespuesta({
-            codigo,
-            idPregunta,
-            respuesta
-        }),
+    const {mutate: enviarRespuestas, isLoading: guardando} = useMutation(
+        (lote: { [preguntaId: number]: string }) => submitRespuestas(codigo, lote),
         {
-            onSuccess: async (data, variables) => {
-                setRespuestasPendientes(removeFromPendientes(variables.idPregunta))
-                setRespuestasConError(prev => (prev.filter(id => id !== variables.idPregunta)))
+            onSuccess: async (data, lote) => {
+                // si alguna se cambió mientras se enviaba, queda pendiente con el valor nuevo
+                setPorGuardar(prev => Object.fromEntries(
+                    Object.entries(prev).filter(([idPregunta, respuesta]) => lote[Number(idPregunta)] !== respuesta)
+                ))
             },
-            onError: async (error, variables) => {
-                console.log('Error guardando respuesta para pregunta', variables.idPregunta)
-                setRespuestasConError(prev => ([...prev, variables.idPregunta]))
-                setRespuestasPendientes(removeFromPendientes(variables.idPregunta))
+            onError: async () => {
+                setErrorGuardando(true)
             },
             retry: 3,
             retryDelay: 1000,
         }
     )
 
-    const reintentarGuardarRespuestas = () => {
-        const respuestasAReintentar = Array.from(new Set(respuestasConError))
-        if (respuestasAReintentar.length) {
-            setReintentando(true)
-            for (const idPregunta of respuestasAReintentar) {
-                setRespuestasPendientes(prev => ([...prev, idPregunta]))
-                mutation.mutate({codigo, idPregunta, respuesta: respuestas[idPregunta]})
+    const guardarRespuestas = useCallback(() => {
+        if (hayPorGuardar && !guardando) {
+            setErrorGuardando(false)
+            enviarRespuestas(porGuardar)
+        }
+    }, [hayPorGuardar, porGuardar, guardando, enviarRespuestas])
+
+    useEffect(() => {
+        if (!hayPorGuardar || guardando || errorGuardando) {
+            return
+        }
+
+        if (todasRespondidas) {
+            guardarRespuestas()
+            return
+        }
+
+        const timer = setTimeout(guardarRespuestas, ESPERA_GUARDADO_MS)
+        return () => clearTimeout(timer)
+    }, [hayPorGuardar, todasRespondidas, errorGuardando, guardando, guardarRespuestas])
+
+    useEffect(() => {
+        const guardarAlSalir = () => {
+            if (document.visibilityState === 'hidden') {
+                guardarRespuestas()
             }
         }
-    }
+
+        document.addEventListener('visibilitychange', guardarAlSalir)
+
+        return () => {
+            document.removeEventListener('visibilitychange', guardarAlSalir)
+        }
+    }, [guardarRespuestas])
 
     useEffect(() => {
         if (preguntaRefs.current[0]) {
@@ -177,9 +196,8 @@ export const Preguntas = ({preguntas, codigo, successCallback, terminar, error,
     const handleAnswerSelect = (idPregunta: number, respuesta: string) => {
         setPreguntaRespondida(idPregunta)
         setRespuestas(prev => ({...prev, [idPregunta]: respuesta}))
-
-        setRespuestasPendientes(prev => ([...prev, idPregunta]))
-        mutation.mutate({codigo, idPregunta, respuesta})
+        setPorGuardar(prev => ({...prev, [idPregunta]: respuesta}))
+        setErrorGuardando(false)
     }
 
     const enfocarPregunta = useCallback((index: number) => {
@@ -264,26 +282,20 @@ export const Preguntas = ({preguntas, codigo, successCallback, terminar, error,
                                             key={code}
                                             value={code}
                                             opacity={preguntaEnFoco === pregunta.id ? 1 : 0.5}
-                                            isDisabled={reintentando || respuestasPendientes.includes(pregunta.id)}
                                         >
                                             {text}
                                         </Radio>
                                     ))}
                                 </Stack>
                             </RadioGroup>
-                            {!reintentando && respuestasPendientes.includes(pregunta.id) ? (
-                                <Spinner />
-                            ) : null}
                         </Box>
                     </Box>
                 ))
             }
             <Box h={`${bottomBoxHeight}px`}>
                 {
-                    Object.keys(respuestas).length === preguntas.length ? (
-                        respuestasPendientes.length ? (
-                            <Spinner />
-                        ) : respuestasConError.length || reintentando ? (
+                    todasRespondidas ? (
+                        errorGuardando ? (
                             <Stack spacing="30px" align="center">
                                 <Alert status="error">
                                     <AlertIcon />
@@ -292,19 +304,17 @@ export const Preguntas = ({preguntas, codigo, successCallback, terminar, error,
                                         pincha el botón reintentar.
                                     </AlertDescription>
                                 </Alert>
-                                { reintentando ? (
-                                    <Spinner />
-                                ) : (
-                                    <Button
-                                        width="50%"
-                                        onClick={reintentarGuardarRespuestas}
-                                        variant="solid"
-                                        colorScheme="green"
-                                    >
-                                        Reintentar
-                                    </Button>
-                                )}
+                                <Button
+                                    width="50%"
+                                    onClick={guardarRespuestas}
+                                    variant="solid"
+                                    colorScheme="green"
+                                >
+                                    Reintentar
+                                </Button>
                             </Stack>
+                        ) : hayPorGuardar || guardando ? (
+                            <Spinner />
                         ) : (
                             <Card p="10px">
                                 <Box
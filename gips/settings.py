@@ -96,6 +96,27 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# LocMemCache solo sirve con un proceso (runserver, tests): el snapshot de horarios, los tests compilados y el
+# turno de AsignacionRoundRobin deben verse igual en todos los workers de gunicorn. docker-compose.yml usa
+# DatabaseCache (run_gunicorn.sh y run_informes.sh crean la tabla con createcachetable), que es correcto para el
+# snapshot porque sus claves llevan la versión del sicólogo (ver entrevistas/cache.py) y un cálculo atrasado no pisa
+# uno nuevo. Pero cada lectura del cache es una consulta y su incr no es atómico (dos reservas simultáneas pueden
+# tomar el mismo turno del round robin): con varios workers de verdad conviene Redis o Memcached, por ejemplo
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache y CACHE_LOCATION=redis://redis:6379/1.
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "gips"),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", "10000")),
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -141,6 +162,10 @@ STATICFILES_DIRS = [
 
 MEDIA_ROOT = os.getenv("MEDIA_ROOT", BASE_DIR / "media")
 MEDIA_URL = os.getenv("MEDIA_URL", "/media/")
+# quién envía la media protegida: "x-accel-redirect" (nginx), "x-sendfile" (lighttpd) o vacío para que la
+# transmita Django. MEDIA_PREFIJO_INTERNO es la location interna de nginx que apunta a MEDIA_ROOT
+MEDIA_ENTREGA = os.getenv("MEDIA_ENTREGA", "")
+MEDIA_PREFIJO_INTERNO = os.getenv("MEDIA_PREFIJO_INTERNO", "/media-protegida/")
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
@@ -180,3 +205,7 @@ LOGGING = {
 # Custom settings
 BASE_URL = os.getenv("BASE_URL", "https://elsicologico.cl")
 SURVEY_MONKEY_API_KEY = os.getenv("SURVEY_MONKEY_API_KEY")
+HORARIOS_CACHE_TIMEOUT = int(os.getenv("HORARIOS_CACHE_TIMEOUT", 10 * 60))
+HORARIOS_DIAS_MAXIMOS = int(os.getenv("HORARIOS_DIAS_MAXIMOS", 90))
+ENTREVISTAS_ESTRATEGIA_ASIGNACION = os.getenv("ENTREVISTAS_ESTRATEGIA_ASIGNACION", "menor_carga")
+INFORMES_MINUTOS_ABANDONO = int(os.getenv("INFORMES_MINUTOS_ABANDONO", 15))
@@ -1,2 +1,3 @@
 ./wait_for_db.sh
+poetry run python manage.py createcachetable
 poetry run gunicorn gips.wsgi -w 4 -b 0.0.0.0:8000 --timeout 0
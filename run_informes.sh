@@ -0,0 +1,3 @@
+./wait_for_db.sh
+poetry run python manage.py createcachetable
+poetry run python manage.py procesar_informes
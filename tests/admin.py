@@ -5,7 +5,7 @@ from urllib.parse import urlencode
 
 from django import forms
 from django.conf import settings
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.html import format_html
@@ -13,8 +13,10 @@ from django.utils.safestring import mark_safe
 from django.utils.timezone import make_aware
 
 from entrevistas.models import Entrevista
+from tests.compilado import errores_tramos
+from tests.generadores.cola import encolar_informes, resultados_sin_informe
 from tests.models import Persona, Test, PreguntaLikertNOAS, AccesoTest, AccesoTestPersona, Resultado, \
-    RespuestaLikertNOAS, TramoCategoriaEvaluacion, Gentilicio, ResultadoEvaluacion
+    RespuestaLikertNOAS, TramoCategoriaEvaluacion, Gentilicio, ResultadoEvaluacion, TrabajoInforme
 from utils.admin import link_whatsapp
 from utils.fechas import month_to_str, weekday_to_str, TZ_CHILE
 
@@ -53,8 +55,24 @@ class PreguntaLikertNOASInline(ShortTextoInlineMixin, admin.TabularInline):
         }
 
 
+class TramoCategoriaEvaluacionFormSet(forms.BaseInlineFormSet):
+    def clean(self):
+        super().clean()
+
+        rangos = [
+            (form.cleaned_data["categoria"], form.cleaned_data["puntaje_minimo"], form.cleaned_data["puntaje_maximo"])
+            for form in self.forms
+            if not form.errors and form.cleaned_data and not form.cleaned_data.get("DELETE")
+        ]
+        errores = errores_tramos(rangos)
+
+        if errores:
+            raise forms.ValidationError(errores)
+
+
 class TramoCategoriaEvaluacionInline(ShortTextoInlineMixin, admin.TabularInline):
     model = TramoCategoriaEvaluacion
+    formset = TramoCategoriaEvaluacionFormSet
     extra = 0
     style_height = "50px"
 
@@ -83,6 +101,12 @@ class TestAdmin(admin.ModelAdmin):
     ordering = ('-id',)
     inlines = [TramoCategoriaEvaluacionInline, ResultadoEvaluacionInline, PreguntaLikertNOASInline]
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # save_model ya actualizó fecha_actualizacion, pero antes de guardar los inlines: si entre medio alguien
+        # compiló el test, quedó guardado con los inlines anteriores bajo la fecha nueva
+        form.instance.tocar()
+
 
 class AccesoTestPersonaInline(admin.TabularInline):
     model = AccesoTestPersona
@@ -256,11 +280,23 @@ class AccesoTestAdmin(admin.ModelAdmin):
     date_hierarchy = 'fecha_creacion'
     list_filter = ('test', 'mandante__es_natural')
     inlines = [AccesoTestPersonaSinEntrevista, AccesoTestPersonaConEntrevista, AccesoTestPersonaConInforme]
+    actions = ['generar_informes_pendientes']
 
     @staticmethod
     def cant_evaluaciones(obj: AccesoTest):
         return obj.ruts.count()
 
+    @admin.action(description="Generar informes pendientes")
+    def generar_informes_pendientes(self, request, queryset):
+        """Encola los informes de los resultados con entrevista y sin informe; los genera procesar_informes."""
+        resultados = resultados_sin_informe().filter(acceso__acceso_test__in=queryset)
+        trabajos = encolar_informes(resultados, request.user)
+
+        if trabajos:
+            self.message_user(request, f"{len(trabajos)} informes en cola de generación", messages.SUCCESS)
+        else:
+            self.message_user(request, "No hay informes pendientes", messages.WARNING)
+
 
 class RespuestaLikertNOASInline(admin.TabularInline):
     model = RespuestaLikertNOAS
@@ -347,3 +383,24 @@ class ResultadoAdmin(admin.ModelAdmin):
             queryset = queryset.filter(entrevista__entrevistador__usuario=request.user)
 
         return queryset
+
+
+@admin.register(TrabajoInforme)
+class TrabajoInformeAdmin(admin.ModelAdmin):
+    list_display = ('resultado', 'estado', 'solicitado_por', 'fecha_creacion', 'fecha_inicio', 'fecha_fin', 'intentos')
+    list_filter = ('estado',)
+    list_select_related = ('resultado__acceso__persona', 'resultado__acceso__acceso_test__test', 'solicitado_por')
+    date_hierarchy = 'fecha_creacion'
+    readonly_fields = (
+        'resultado',
+        'solicitado_por',
+        'fecha_creacion',
+        'fecha_inicio',
+        'fecha_fin',
+        'intentos',
+        'error',
+    )
+
+    def has_add_permission(self, request):
+        # se encolan desde la ficha de la entrevista
+        return False
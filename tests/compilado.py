@@ -0,0 +1,165 @@
+"""
+Definición compilada de un Test: preguntas con el puntaje de cada alternativa, tramos por categoría ordenados por
+puntaje y resultados posibles por nombre, como estructuras de Python que no se modifican.
+
+Se guarda en memoria del proceso y en el cache de Django con una clave que incluye Test.fecha_actualizacion, que se
+actualiza (Test.tocar) cada vez que cambian sus preguntas, tramos o resultados posibles: una definición guardada
+nunca queda desactualizada, simplemente deja de pedirse.
+"""
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from django.core.cache import cache
+
+from tests.models import PreguntaLikertNOAS, ResultadoEvaluacion, Test
+
+TIMEOUT = 24 * 60 * 60
+
+ALTERNATIVAS = "NOAS"  # en el orden de PreguntaCompilada.puntajes
+
+
+class PreguntaCompilada(NamedTuple):
+    id: int
+    texto: str
+    categoria: str
+    puntajes: Tuple[int, int, int, int]
+
+    def puntaje(self, alternativa: str) -> int:
+        return self.puntajes[ALTERNATIVAS.index(alternativa)]
+
+
+class TramoCompilado(NamedTuple):
+    puntaje_minimo: int
+    puntaje_maximo: int
+    nombre: str
+    texto: str
+
+
+class IndiceTramos(NamedTuple):
+    """Tramos de una categoría ordenados por puntaje mínimo, con los puntajes mínimos aparte para usar bisect."""
+    tramos: Tuple[TramoCompilado, ...]
+    minimos: Tuple[int, ...]
+
+    @classmethod
+    def crear(cls, tramos: List[TramoCompilado]) -> "IndiceTramos":
+        tramos = tuple(sorted(tramos))
+        return cls(tramos, tuple(tramo.puntaje_minimo for tramo in tramos))
+
+    def buscar(self, puntaje: int) -> Optional[TramoCompilado]:
+        """El tramo que contiene el puntaje (si los tramos se solapan, el de mayor puntaje mínimo)."""
+        i = bisect_right(self.minimos, puntaje) - 1
+
+        if i >= 0 and puntaje <= self.tramos[i].puntaje_maximo:
+            return self.tramos[i]
+
+        return None
+
+
+def errores_tramos(rangos: Iterable[Tuple[str, int, int]]) -> List[str]:
+    """
+    Revisa que los tramos (categoría, puntaje mínimo, puntaje máximo) de cada categoría sean contiguos y no se
+    solapen. Devuelve los problemas encontrados, en orden de categoría y puntaje.
+    """
+    errores = []
+    anterior = None
+
+    for categoria, minimo, maximo in sorted(rangos):
+        if minimo > maximo:
+            errores.append(f"{categoria}: el tramo {minimo}-{maximo} tiene el mínimo mayor que el máximo")
+
+        if anterior and anterior[0] == categoria:
+            if minimo <= anterior[2]:
+                errores.append(f"{categoria}: los tramos {anterior[1]}-{anterior[2]} y {minimo}-{maximo} se solapan")
+            elif minimo > anterior[2] + 1:
+                errores.append(f"{categoria}: faltan los puntajes entre {anterior[2]} y {minimo}")
+
+        anterior = (categoria, minimo, maximo)
+
+    return errores
+
+
+class ResultadoPosible(NamedTuple):
+    id: int
+    nombre: str
+    texto: str
+
+
+class TestCompilado(NamedTuple):
+    id: int
+    fecha_actualizacion: datetime
+    preguntas: Dict[int, PreguntaCompilada]  # por id, en orden de id
+    tramos: Dict[str, IndiceTramos]  # por categoría
+    resultados_posibles: Dict[str, ResultadoPosible]  # por nombre
+
+    @property
+    def categorias_preguntas(self) -> FrozenSet[str]:
+        return frozenset(pregunta.categoria for pregunta in self.preguntas.values())
+
+    def resultado_evaluacion(self, nombre: str) -> Optional[ResultadoEvaluacion]:
+        """El ResultadoEvaluacion con ese nombre, armado sin consultar la base de datos."""
+        posible = self.resultados_posibles.get(nombre)
+
+        if posible is None:
+            return None
+
+        return ResultadoEvaluacion(id=posible.id, test_id=self.id, nombre=posible.nombre, texto=posible.texto)
+
+
+_compilados: Dict[int, TestCompilado] = {}
+
+
+def obtener_test_compilado(test: Test) -> TestCompilado:
+    compilado = _compilados.get(test.pk)
+
+    if compilado and compilado.fecha_actualizacion == test.fecha_actualizacion:
+        return compilado
+
+    clave = f"test_compilado:{test.pk}:{test.fecha_actualizacion.isoformat()}"
+    compilado = cache.get(clave)
+
+    if compilado is None:
+        compilado = compilar_test(test)
+        cache.set(clave, compilado, TIMEOUT)
+
+    anterior = _compilados.get(test.pk)
+
+    # una instancia de Test leída antes de tocarlo no debe reemplazar una definición más nueva
+    if not anterior or anterior.fecha_actualizacion < compilado.fecha_actualizacion:
+        _compilados[test.pk] = compilado
+
+    return compilado
+
+
+def compilar_test(test: Test) -> TestCompilado:
+    preguntas = PreguntaLikertNOAS.objects.filter(
+        test=test,
+    ).order_by(
+        "pk",
+    ).values_list(
+        "pk", "texto", "categoria", "puntaje_nunca", "puntaje_ocasionalmente", "puntaje_a_menudo", "puntaje_siempre",
+    )
+    filas_tramos = test.tramos.order_by(
+        "categoria", "puntaje_minimo",
+    ).values_list(
+        "categoria", "puntaje_minimo", "puntaje_maximo", "nombre", "texto",
+    )
+    tramos = defaultdict(list)
+
+    for categoria, *tramo in filas_tramos:
+        tramos[categoria].append(TramoCompilado(*tramo))
+
+    return TestCompilado(
+        id=test.pk,
+        fecha_actualizacion=test.fecha_actualizacion,
+        preguntas={
+            pk: PreguntaCompilada(pk, texto, categoria, tuple(puntajes))
+            for pk, texto, categoria, *puntajes in preguntas
+        },
+        tramos={categoria: IndiceTramos.crear(tramos_categoria) for categoria, tramos_categoria in tramos.items()},
+        resultados_posibles={
+            nombre: ResultadoPosible(pk, nombre, texto)
+            for pk, nombre, texto in test.resultados_posibles.values_list("pk", "nombre", "texto")
+        },
+    )
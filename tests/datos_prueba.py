@@ -0,0 +1,74 @@
+"""Datos de prueba compartidos por los tests de pytest de la app."""
+from datetime import datetime, timedelta
+from typing import Optional
+
+from rut_chile import rut_chile
+
+from tests.models import (
+    AccesoTest, AccesoTestPersona, Persona, PreguntaLikertNOAS, RespuestaLikertNOAS, Resultado, Test as ModeloTest,
+)
+from utils.fechas import TZ_CHILE
+
+CATEGORIAS = ["COGNITIVA", "MOTORA", "NO_PLANIFICADA"]
+
+
+def crear_test(preguntas_por_categoria: int) -> ModeloTest:
+    """Un test BIS-11 con la cantidad de preguntas indicada por categoría y tres tramos por categoría."""
+    test = ModeloTest.objects.create(nombre="BIS-11")
+
+    for categoria in ["GENERAL", *CATEGORIAS]:
+        maximo = 4 * preguntas_por_categoria * (len(CATEGORIAS) if categoria == "GENERAL" else 1)
+        tercio = maximo // 3
+        rangos = [("BAJO", 0, tercio), ("MODERADO", tercio + 1, 2 * tercio), ("ALTO", 2 * tercio + 1, maximo)]
+
+        for nombre, desde, hasta in rangos:
+            test.tramos.create(
+                categoria=categoria,
+                nombre=nombre,
+                texto=f"{categoria} {nombre}",
+                puntaje_minimo=desde,
+                puntaje_maximo=hasta,
+            )
+
+    for nombre in ["APTO", "CON_RESERVAS", "NO_APTO"]:
+        test.resultados_posibles.create(nombre=nombre, texto=nombre.lower())
+
+    for categoria in CATEGORIAS:
+        for i in range(preguntas_por_categoria):
+            PreguntaLikertNOAS.objects.create(test=test, categoria=categoria, texto=f"{categoria} {i}")
+
+    return test
+
+
+def crear_resultado(test: ModeloTest, alternativas: Optional[dict[str, str]] = None, numero: int = 0) -> Resultado:
+    """
+    Un resultado del test con todas sus respuestas, cada categoría con su alternativa (por omisión "N"). `numero`
+    distingue el RUT de cada candidato.
+    """
+    alternativas = alternativas or {categoria: "N" for categoria in CATEGORIAS}
+    acceso_test = test.accesos.first() or AccesoTest.objects.create(
+        test=test,
+        mandante=Persona.objects.create(rut="1-9", nombres="Mandante"),
+        fecha_vencimiento=datetime.now(tz=TZ_CHILE) + timedelta(days=30),
+    )
+    rut = str(1000000 + numero)
+    acceso = AccesoTestPersona.objects.create(
+        acceso_test=acceso_test,
+        persona=Persona.objects.create(rut=f"{rut}-{rut_chile.get_verification_digit(rut)}", nombres="Candidato"),
+        fin_respuestas_ts=datetime.now(tz=TZ_CHILE),
+    )
+    resultado = Resultado.objects.create(acceso=acceso)
+    preguntas = test.preguntalikertnoas_set.all()
+
+    RespuestaLikertNOAS.objects.bulk_create([
+        RespuestaLikertNOAS(
+            resultado=resultado,
+            pregunta=pregunta,
+            alternativa=alternativas[pregunta.categoria],
+            puntaje="NOAS".index(alternativas[pregunta.categoria]) + 1,
+        )
+        for pregunta in preguntas
+    ])
+
+    return Resultado.objects.get(pk=resultado.pk)
+
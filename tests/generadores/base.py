@@ -1,4 +1,6 @@
+import base64
 from abc import ABC, abstractmethod
+from functools import lru_cache
 from typing import Optional, Tuple
 
 import qrcode
@@ -10,11 +12,26 @@ from django.http import HttpRequest
 
 from tests.gips_service import GIPSService
 from tests.models import Resultado, ResultadoEvaluacion
+from utils.imagenes import png_monocromo
 from utils.text import numerico_random
 
 LONGITUD_CLAVE_ARCHIVO = 5
 
 
+@lru_cache(maxsize=256)
+def qr_verificacion(codigo: str) -> str:
+    """
+    El código QR con la URL de verificación del acceso, como data URI de un PNG de 1 bit. Se arma directamente
+    desde la matriz del código, sin pasar por PIL, y queda en memoria para volver a generar el informe del mismo
+    acceso.
+    """
+    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, border=0)
+    qr.add_data(f"{settings.BASE_URL}/verificar/{codigo}")
+    qr.make(fit=True)
+    png = png_monocromo(qr.get_matrix(), escala=2)
+    return f"data:image/png;base64,{base64.b64encode(png).decode('ascii')}"
+
+
 class Generador(ABC, GIPSService):
     def __init__(self, resultado: Optional[Resultado], request: Optional[HttpRequest]):
         self.resultado = resultado
@@ -35,7 +52,7 @@ class Generador(ABC, GIPSService):
     def _validate(self):
         ...
 
-    def generar(self):
+    def generar(self, raise_exception: bool = False):
         """
         Genera el informe en formato pdf y lo devuelve como un objeto File.
         Almacena en self.resultado.evaluacion el registro de los puntajes calculados.
@@ -43,14 +60,14 @@ class Generador(ABC, GIPSService):
         try:
             self.puede_generar_informe(raise_exception=True)
         except ValidationError as e:
+            if raise_exception:
+                raise
             self._add_error_message(f"Error al generar informe: {e}")
             return
 
         self.resultado.clave_archivo = numerico_random(LONGITUD_CLAVE_ARCHIVO)
 
-        qr_image = self._generar_qr(self.resultado.acceso.codigo)
-
-        informe = self._generar_informe(qr_image)
+        informe = self._generar_informe(qr_verificacion(self.resultado.acceso.codigo))
         informe_file = ContentFile(informe)
         django_file = File(informe_file, name=f"{self.resultado.acceso.codigo}.pdf")
 
@@ -63,17 +80,6 @@ class Generador(ABC, GIPSService):
     def generar_html_evaluacion(self) -> str:
         ...
 
-    @staticmethod
-    def _generar_qr(codigo: str) -> bytes:
-        url = f"{settings.BASE_URL}/verificar/{codigo}"
-        return qrcode.make(
-            url,
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=2,
-            border=0,
-        )
-
     def evaluar(self):
         try:
             if self.is_valid(raise_exception=True):
@@ -113,7 +119,7 @@ class Generador(ABC, GIPSService):
         ...
 
     @abstractmethod
-    def _generar_informe(self, qr_image: bytes) -> bytes:
+    def _generar_informe(self, qr_uri: str) -> bytes:
         ...
 
 
@@ -0,0 +1,218 @@
+"""
+Cola de generación de informes en la base de datos: el admin solo registra un TrabajoInforme y el comando
+procesar_informes lo atiende en otros procesos, cada uno tomando el trabajo pendiente más antiguo con
+SELECT ... FOR UPDATE SKIP LOCKED (en SQLite, sin bloqueo, la actualización condicionada al estado evita que dos
+procesos tomen el mismo trabajo).
+"""
+import logging
+import time
+from datetime import date, timedelta
+from typing import List, NamedTuple, Optional
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from tests.generadores.base import get_generador
+from tests.models import Resultado, TrabajoInforme
+
+logger = logging.getLogger(__name__)
+
+Estado = TrabajoInforme.Estado
+
+
+def encolar_informe(resultado: Resultado, usuario=None) -> TrabajoInforme:
+    """Registra un trabajo para el resultado, o devuelve el que ya está pendiente o en proceso."""
+    activo = TrabajoInforme.objects.filter(resultado=resultado, estado__in=TrabajoInforme.ACTIVOS).first()
+
+    if activo:
+        return activo
+
+    try:
+        with transaction.atomic():
+            return TrabajoInforme.objects.create(resultado=resultado, solicitado_por=usuario)
+    except IntegrityError:
+        # otra petición lo encoló entre medio
+        return TrabajoInforme.objects.get(resultado=resultado, estado__in=TrabajoInforme.ACTIVOS)
+
+
+def encolar_informes(resultados: QuerySet, usuario=None) -> List[TrabajoInforme]:
+    """Como encolar_informe, para muchos resultados a la vez. Devuelve los trabajos activos de esos resultados."""
+    ids = list(resultados.values_list("pk", flat=True))
+    activos = set(
+        TrabajoInforme.objects.filter(
+            resultado_id__in=ids,
+            estado__in=TrabajoInforme.ACTIVOS,
+        ).values_list(
+            "resultado_id", flat=True,
+        )
+    )
+    TrabajoInforme.objects.bulk_create(
+        [TrabajoInforme(resultado_id=pk, solicitado_por=usuario) for pk in ids if pk not in activos],
+        ignore_conflicts=True,
+    )
+
+    return list(
+        TrabajoInforme.objects.filter(
+            resultado_id__in=ids,
+            estado__in=TrabajoInforme.ACTIVOS,
+        ).order_by(
+            "pk",
+        )
+    )
+
+
+def resultados_sin_informe(
+        acceso_test_id: Optional[int] = None, desde: Optional[date] = None, hasta: Optional[date] = None,
+) -> QuerySet:
+    """Resultados con entrevista y sin informe, opcionalmente de un AccesoTest o con la entrevista entre dos fechas."""
+    resultados = Resultado.objects.filter(
+        Q(informe__isnull=True) | Q(informe=""),
+        entrevista__isnull=False,
+    )
+
+    if acceso_test_id:
+        resultados = resultados.filter(acceso__acceso_test_id=acceso_test_id)
+
+    if desde:
+        resultados = resultados.filter(entrevista__fecha_inicio__date__gte=desde)
+
+    if hasta:
+        resultados = resultados.filter(entrevista__fecha_inicio__date__lte=hasta)
+
+    return resultados
+
+
+def ultimo_trabajo(resultado: Resultado) -> Optional[TrabajoInforme]:
+    return resultado.trabajos_informe.order_by("-fecha_creacion", "-pk").first()
+
+
+def tomar_trabajo(pk: Optional[int] = None) -> Optional[TrabajoInforme]:
+    """
+    Marca como en proceso el trabajo pendiente más antiguo (o el indicado, si sigue pendiente) que no esté tomando
+    otro proceso, y lo devuelve.
+    """
+    pendientes = TrabajoInforme.objects.filter(estado=Estado.PENDIENTE)
+
+    if pk is not None:
+        pendientes = pendientes.filter(pk=pk)
+
+    while True:
+        with transaction.atomic():
+            trabajo = pendientes.select_for_update(
+                skip_locked=True,
+            ).order_by(
+                "fecha_creacion", "pk",
+            ).first()
+
+            if trabajo is None:
+                return None
+
+            trabajo.estado = Estado.EN_PROCESO
+            trabajo.fecha_inicio = timezone.now()
+            trabajo.intentos += 1
+            tomado = TrabajoInforme.objects.filter(
+                pk=trabajo.pk,
+                estado=Estado.PENDIENTE,
+            ).update(
+                estado=trabajo.estado,
+                fecha_inicio=trabajo.fecha_inicio,
+                intentos=trabajo.intentos,
+            )
+
+        if tomado:
+            return trabajo
+
+
+def procesar_trabajo(trabajo: TrabajoInforme):
+    """Genera el informe del trabajo y deja registrado cómo terminó."""
+    generador = get_generador(Resultado.objects.select_related("acceso__persona").get(pk=trabajo.resultado_id))
+
+    try:
+        generador.generar(raise_exception=True)
+    except ValidationError as err:
+        trabajo.estado = Estado.ERROR
+        trabajo.error = "; ".join(err.messages)
+    except Exception as err:
+        logger.exception("Error al generar el informe del resultado %s", trabajo.resultado_id)
+        trabajo.estado = Estado.ERROR
+        trabajo.error = str(err) or err.__class__.__name__
+    else:
+        trabajo.estado = Estado.TERMINADO
+        trabajo.error = ""
+
+    trabajo.fecha_fin = timezone.now()
+    trabajo.save(update_fields=["estado", "error", "fecha_fin"])
+
+
+def reencolar_abandonados() -> int:
+    """
+    Vuelve a dejar pendientes los trabajos que llevan más de INFORMES_MINUTOS_ABANDONO en proceso (el proceso que
+    los tomó terminó sin registrar el resultado).
+    """
+    limite = timezone.now() - timedelta(minutes=settings.INFORMES_MINUTOS_ABANDONO)
+
+    return TrabajoInforme.objects.filter(
+        estado=Estado.EN_PROCESO,
+        fecha_inicio__lt=limite,
+    ).update(
+        estado=Estado.PENDIENTE,
+    )
+
+
+class InformeGenerado(NamedTuple):
+    trabajo_id: int
+    resultado_id: int
+    estado: str
+    error: str
+    segundos: float
+
+
+def generar_informe_encolado(trabajo_id: int) -> Optional[InformeGenerado]:
+    """Toma y procesa un trabajo determinado; None si ya no estaba pendiente (lo tomó otro proceso)."""
+    close_old_connections()
+    trabajo = tomar_trabajo(trabajo_id)
+
+    if trabajo is None:
+        return None
+
+    inicio = time.perf_counter()
+    procesar_trabajo(trabajo)
+
+    segundos = time.perf_counter() - inicio
+
+    return InformeGenerado(trabajo.pk, trabajo.resultado_id, trabajo.estado, trabajo.error, segundos)
+
+
+def atender_cola(segundos_espera: float, hasta_vaciar: bool = False, segundos_reencolado: float = 60) -> int:
+    """
+    Procesa trabajos uno tras otro y devuelve cuántos procesó. Cuando no hay pendientes espera `segundos_espera`,
+    o termina si `hasta_vaciar`. Cada `segundos_reencolado` vuelve a dejar pendientes los trabajos abandonados, para
+    que un proceso caído no deje los suyos en proceso hasta el próximo reinicio del comando.
+    """
+    procesados = 0
+    proximo_reencolado = time.monotonic() + segundos_reencolado
+
+    while True:
+        close_old_connections()
+
+        if time.monotonic() >= proximo_reencolado:
+            reencolados = reencolar_abandonados()
+            proximo_reencolado = time.monotonic() + segundos_reencolado
+
+            if reencolados:
+                logger.warning("%s trabajos abandonados vuelven a quedar pendientes", reencolados)
+
+        trabajo = tomar_trabajo()
+
+        if trabajo is None:
+            if hasta_vaciar:
+                return procesados
+
+            time.sleep(segundos_espera)
+            continue
+
+        procesar_trabajo(trabajo)
+        procesados += 1
@@ -0,0 +1,161 @@
+"""
+Datos y HTML del informe de un resultado. ContextoInforme reúne todo lo que el informe muestra con un número fijo de
+consultas (el resultado con su persona, acceso y entrevista en una, y el gentilicio en otra), y el HTML se arma
+solo a partir de él.
+"""
+import base64
+from datetime import date
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from rut_chile import rut_chile
+
+from tests.models import Gentilicio, Resultado
+
+APTO_NO_APTO = {
+    "BAJO": "apto",
+    "MODERADO": "apto con reservas",
+}
+
+
+class ContextoInforme(NamedTuple):
+    nombre_completo: str
+    run: str
+    nacionalidad: str
+    cargo: str
+    puntajes: dict
+    observaciones: str
+    apto_no_apto: str
+    sicologo: str
+    nro_registro: str
+    firma_path: str
+    firma_informe: str
+    codigo: str
+    clave_archivo: str
+    fecha_emision: Optional[date]
+    fecha_vencimiento: Optional[date]
+
+    @classmethod
+    def cargar(cls, resultado: Resultado) -> "ContextoInforme":
+        """
+        Lee los datos relacionados del resultado; los del propio resultado (evaluación, clave del archivo, fechas) se
+        toman de la instancia, que puede tener cambios sin guardar.
+        """
+        relacionado = Resultado.objects.select_related(
+            "acceso__persona",
+            "entrevista__entrevistador__usuario",
+            "entrevista__resultado_entrevista",
+        ).get(
+            pk=resultado.pk,
+        )
+        acceso = relacionado.acceso
+        persona = acceso.persona
+        # la entrevista del acceso: cada acceso tiene a lo más una (RESTRICCION_ACCESO_UNICO)
+        entrevista = relacionado.entrevista
+        sicologo = entrevista.entrevistador
+        puntajes = resultado.evaluacion["puntajes"]
+
+        if entrevista.resultado_entrevista:
+            apto_no_apto = entrevista.resultado_entrevista.texto
+        else:
+            apto_no_apto = APTO_NO_APTO.get(puntajes["GENERAL"]["nivel"], "no apto")
+
+        return cls(
+            nombre_completo=persona.nombre_completo,
+            run=rut_chile.format_rut_with_dots(persona.rut),
+            nacionalidad=Gentilicio.objects.values_list("gentilicio", flat=True).get(pais=persona.nacionalidad),
+            cargo=acceso.get_cargo_display(),
+            puntajes=puntajes,
+            observaciones=entrevista.observaciones,
+            apto_no_apto=apto_no_apto,
+            sicologo=str(sicologo),
+            nro_registro=sicologo.nro_registro,
+            # la previsualización en el admin no muestra la firma: no debe fallar si falta el archivo
+            firma_path=sicologo.firma.path if sicologo.firma else "",
+            firma_informe=sicologo.firma_informe.name or "",
+            codigo=acceso.codigo,
+            clave_archivo=resultado.clave_archivo,
+            fecha_emision=resultado.fecha_emision,
+            fecha_vencimiento=resultado.fecha_vencimiento,
+        )
+
+
+@lru_cache(maxsize=32)
+def firma_data_uri(nombre: str) -> str:
+    """
+    La firma reducida (Sicologo.firma_informe) como data URI. Cada firma nueva se guarda con otro nombre, así que lo
+    leído queda en memoria del proceso.
+    """
+    with default_storage.open(nombre, "rb") as archivo:
+        return f"data:image/png;base64,{base64.b64encode(archivo.read()).decode('ascii')}"
+
+
+def src_firma(contexto: ContextoInforme) -> str:
+    # sin firma reducida (sicólogos anteriores a firma_informe) WeasyPrint carga y escala la original
+    return firma_data_uri(contexto.firma_informe) if contexto.firma_informe else contexto.firma_path
+
+
+def html_evaluacion(contexto: ContextoInforme) -> str:
+    puntajes = contexto.puntajes
+    p1 = (
+        "El profesional que firma este documento certifica que el Sr(a) "
+        f"<b>{contexto.nombre_completo}</b> RUN <b>{contexto.run}</b> Nacionalidad <b>{contexto.nacionalidad}</b> "
+        "ha realizado una evaluación psicológica del control de los impulsos."
+    )
+    p2 = (
+        f"Pruebas psicológicas indican {puntajes['GENERAL']['texto']}. Sub-escalas de impulsividad no planificada, "
+        "atencional y motora (BIS-11) arrojan el siguiente resultado:"
+    )
+
+    return f"""
+            <p>{p1}</p>
+            <p>{p2}</p>
+            <ul>
+              <li>{puntajes["NO_PLANIFICADA"]["texto"]}</li>
+              <li>{puntajes["COGNITIVA"]["texto"]}</li>
+              <li>{puntajes["MOTORA"]["texto"]}</li>
+            </ul>
+            <p>{contexto.observaciones}</p>
+            <p>En conclusión, se determina que el Sr(a) <b>{contexto.nombre_completo}</b>
+             es <b>{contexto.apto_no_apto}</b> para el cargo de <b>{contexto.cargo}</b>.</p>
+        """
+
+
+def html_informe(contexto: ContextoInforme, qr_uri: str) -> str:
+    """El informe completo, sin estilos: RenderizadorInforme aplica ESTILOS al generar el PDF."""
+    domain = settings.BASE_URL.replace("http://", "").replace("https://", "")
+
+    return f"""
+                <html>
+                  <head></head>
+                  <body>
+                    <h1>CERTIFICADO EVALUACIÓN PSICOLÓGICA<br />CONTROL DE LOS IMPULSOS</h1>
+                    <div class="informe">
+                        {html_evaluacion(contexto)}
+                    </div>
+                    <div class="box-firma">
+                      <img src="{src_firma(contexto)}" alt="Firma {contexto.sicologo}" class="firma-img" />
+                      <hr>
+                      <p>{contexto.sicologo}<br>Psicólogo<br><span>N° Reg: {contexto.nro_registro}</span></p>
+                    </div>
+                    <div class="verification">
+                        <hr>
+                        <div class="column image-column">
+                            <img src="{qr_uri}" alt="Código QR">
+                        </div>
+                        <div class="column content-column">
+                            Para verificar la autenticidad escanee el código QR o visite<br>
+                            <a
+                             href="{settings.BASE_URL}/verificar/{contexto.codigo}"
+                             >
+                                {domain}/verificar/{contexto.codigo}
+                            </a> e ingrese el código <b>{contexto.clave_archivo}</b><br>
+                            Este documento fue emitido el {contexto.fecha_emision.strftime("%d/%m/%Y")} y caducará
+                            el {contexto.fecha_vencimiento.strftime("%d/%m/%Y")}
+                        </div>
+                    </div>
+                  </body>
+                </html>
+                """
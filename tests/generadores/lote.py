@@ -0,0 +1,146 @@
+"""
+Evaluación de muchos resultados a la vez (por ejemplo, para volver a puntuar el historial cuando cambian los tramos
+de un test): las sumas de puntajes se cargan con una consulta por lote, las definiciones de los tests se compilan
+una vez por test, los puntajes se calculan en memoria y se escriben con bulk_update.
+"""
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import QuerySet, Sum
+from rut_chile import rut_chile
+
+from tests.compilado import TestCompilado
+from tests.generadores.puntaje_escala import calcular_evaluacion, validar_test
+from tests.models import RespuestaLikertNOAS, Resultado, Test
+
+TAMANHO_LOTE = 500
+
+Errores = List[Tuple[int, str]]
+
+
+def resultados_pendientes(todos: bool = False, incluir_cerrados: bool = False) -> QuerySet:
+    """
+    Resultados de tests terminados. Por omisión solo los que no se han evaluado y no están cerrados; con `todos`
+    también los ya evaluados.
+    """
+    resultados = Resultado.objects.filter(acceso__fin_respuestas_ts__isnull=False)
+
+    if not todos:
+        resultados = resultados.filter(evaluacion={})
+
+    if not incluir_cerrados:
+        resultados = resultados.filter(cerrado=False)
+
+    return resultados
+
+
+def evaluar_resultados(
+        resultados: QuerySet,
+        tamanho_lote: int = TAMANHO_LOTE,
+        al_avanzar: Optional[Callable[[int, int], None]] = None,
+) -> Tuple[int, Errores]:
+    """
+    Evalúa los resultados de a `tamanho_lote` y devuelve cuántos se evaluaron y los que no se pudieron evaluar
+    (id y motivo). `al_avanzar(procesados, total)` se llama al terminar cada lote.
+    """
+    ids = list(resultados.order_by("pk").values_list("pk", flat=True))
+    tests = {}
+    evaluados = 0
+    errores = []
+
+    for i in range(0, len(ids), tamanho_lote):
+        evaluados_lote, errores_lote = _evaluar_lote(ids[i:i + tamanho_lote], tests)
+        evaluados += evaluados_lote
+        errores += errores_lote
+
+        if al_avanzar:
+            al_avanzar(min(i + tamanho_lote, len(ids)), len(ids))
+
+    return evaluados, errores
+
+
+def _compilar(test: Test) -> Tuple[TestCompilado, Optional[str]]:
+    compilado = test.compilado()
+
+    try:
+        validar_test(compilado)
+    except ValidationError as err:
+        return compilado, err.message
+
+    return compilado, None
+
+
+def _evaluar_lote(ids: List[int], tests: Dict[int, Tuple[TestCompilado, Optional[str]]]) -> Tuple[int, Errores]:
+    from entrevistas.models import Entrevista
+
+    resultados = list(
+        Resultado.objects.filter(
+            pk__in=ids,
+        ).select_related(
+            "acceso__persona", "acceso__acceso_test__test", "entrevista",
+        )
+    )
+
+    for resultado in resultados:
+        if resultado.test.pk not in tests:
+            tests[resultado.test.pk] = _compilar(resultado.test)
+
+    totales = defaultdict(dict)
+    sumas = RespuestaLikertNOAS.objects.filter(
+        resultado_id__in=ids,
+    ).values_list(
+        "resultado_id", "pregunta__categoria",
+    ).annotate(
+        total=Sum("puntaje"),
+    ).order_by()
+
+    for resultado_id, categoria, total in sumas:
+        totales[resultado_id][categoria] = total
+
+    evaluados = []
+    entrevistas = []
+    errores = []
+
+    for resultado in resultados:
+        test, error = tests[resultado.test.pk]
+
+        if error:
+            errores.append((resultado.pk, error))
+            continue
+
+        if not rut_chile.is_valid_rut(resultado.persona.rut):
+            errores.append((resultado.pk, f"El rut {resultado.persona.rut} no es válido"))
+            continue
+
+        try:
+            evaluacion, nombre_resultado = calcular_evaluacion(totales[resultado.pk], test.tramos)
+        except ValidationError as err:
+            errores.append((resultado.pk, err.message))
+            continue
+
+        resultado_test = test.resultado_evaluacion(nombre_resultado)
+
+        if not resultado_test:
+            errores.append((resultado.pk, f"El test no tiene el resultado posible {nombre_resultado}"))
+            continue
+
+        resultado.evaluacion = evaluacion
+        resultado.resultado_test = resultado_test
+        evaluados.append(resultado)
+
+        # igual que Generador.evaluar: la entrevista parte con las observaciones sugeridas por la evaluación
+        entrevista = getattr(resultado, "entrevista", None)
+
+        if entrevista and not entrevista.observaciones and evaluacion.get("observaciones_initial"):
+            entrevista.observaciones = evaluacion["observaciones_initial"]
+            entrevistas.append(entrevista)
+
+    with transaction.atomic():
+        Resultado.objects.bulk_update(evaluados, ["evaluacion", "resultado_test"])
+
+        if entrevistas:
+            Entrevista.objects.bulk_update(entrevistas, ["observaciones"])
+
+    return len(evaluados), errores
@@ -1,14 +1,80 @@
-import base64
-from io import BytesIO
+from typing import Dict, Tuple
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from qrcode.image.pil import PilImage
+from django.db.models import Sum
 from rut_chile import rut_chile
-from weasyprint import HTML
 
+from tests.compilado import IndiceTramos, TestCompilado, errores_tramos
 from tests.generadores.base import Generador
-from tests.models import Gentilicio
+from tests.generadores.informe import ContextoInforme, html_evaluacion, html_informe
+from tests.generadores.renderizador import ESTILOS, obtener_renderizador
+from tests.models import Gentilicio, ResultadoEvaluacion
+
+OBSERVACIONES_INICIALES_NIVEL_BAJO = (
+    "En entrevista presenta una conducta adecuada, ajustada a la situación, motivación por logro de "
+    "objetivos, manejo de la ansiedad, preocupación por el autocuidado, tolerancia a la frustración "
+    "frente a situaciones desconocidas o que requieren concentración y procesamiento cognitivo "
+    "para toma de decisiones."
+)
+
+
+def validar_test(test: TestCompilado):
+    if not test.tramos:
+        raise ValidationError("El test no tiene tramos")
+
+    for categoria in sorted(test.categorias_preguntas):
+        if categoria not in test.tramos:
+            raise ValidationError(f"La categoría {categoria} no está en los tramos de la prueba")
+
+    if "GENERAL" not in test.tramos:
+        raise ValidationError("La categoría General no está en los tramos de la prueba")
+
+    errores = errores_tramos(
+        (categoria, tramo.puntaje_minimo, tramo.puntaje_maximo)
+        for categoria, indice in test.tramos.items()
+        for tramo in indice.tramos
+    )
+
+    if errores:
+        raise ValidationError(f"Tramos mal configurados: {'; '.join(errores)}")
+
+
+def calcular_evaluacion(totales: Dict[str, int], tramos: Dict[str, IndiceTramos]) -> Tuple[dict, str]:
+    """
+    Evaluación (puntaje, nivel y texto por categoría) a partir de la suma de puntajes por categoría de pregunta y los
+    tramos del test compilado. Devuelve también el nombre del ResultadoEvaluacion que corresponde.
+    """
+    evaluacion = {}
+    puntajes = {categoria: {"puntaje": 0} for categoria in tramos}
+
+    for categoria, total in totales.items():
+        puntajes[categoria]["puntaje"] += total
+        puntajes["GENERAL"]["puntaje"] += total
+
+    for categoria, indice in tramos.items():
+        tramo = indice.buscar(puntajes[categoria]["puntaje"])
+
+        if tramo is None:
+            raise ValidationError(
+                f"El puntaje {puntajes[categoria]['puntaje']} de la categoría {categoria} no cae en ningún tramo"
+            )
+
+        puntajes[categoria]["nivel"] = tramo.nombre
+        puntajes[categoria]["texto"] = tramo.texto
+
+    if puntajes["GENERAL"]["nivel"] == "BAJO":
+        evaluacion["observaciones_initial"] = OBSERVACIONES_INICIALES_NIVEL_BAJO
+
+    evaluacion["puntajes"] = puntajes
+
+    nombre_resultado = (
+        "APTO" if puntajes["GENERAL"]["nivel"] == "BAJO"
+        else "CON_RESERVAS" if puntajes["GENERAL"]["nivel"] == "MODERADO"
+        else "NO_APTO"
+    )
+
+    return evaluacion, nombre_resultado
 
 
 class GeneradorPuntajeEscala(Generador):
@@ -21,19 +87,7 @@ class GeneradorPuntajeEscala(Generador):
         if not rut_chile.is_valid_rut(rut):
             raise ValidationError(f"El rut {rut} no es válido")
 
-        test = self.resultado.test
-
-        if not test.tramos.exists():
-            raise ValidationError("El test no tiene tramos")
-
-        categorias_preguntas = test.preguntalikertnoas_set.values_list('categoria', flat=True).distinct()
-
-        for categoria in categorias_preguntas:
-            if categoria not in test.categorias_tramos:
-                raise ValidationError(f"La categoría {categoria} no está en los tramos de la prueba")
-
-        if "GENERAL" not in test.categorias_tramos:
-            raise ValidationError("La categoría General no está en los tramos de la prueba")
+        validar_test(self.resultado.test.compilado())
 
     def _validar_puede_generar_informe(self):
         self._validate()
@@ -63,222 +117,31 @@ class GeneradorPuntajeEscala(Generador):
             raise ValidationError("Falta la nacionalidad de la persona")
 
     def _evaluar(self) -> dict:
-        evaluacion = {}
-
-        puntajes = {
-            **{
-                categoria: {"puntaje": 0}
-                for categoria in self.resultado.test.categorias_tramos
-            }
-        }
-
-        for respuesta in self.resultado.respuestalikertnoas_set.all():
-            categoria = respuesta.pregunta.categoria
-            puntajes[categoria]["puntaje"] += respuesta.puntaje
-            puntajes["GENERAL"]["puntaje"] += respuesta.puntaje
-
-        for categoria in self.resultado.test.categorias_tramos:
-            for tramo in self.resultado.test.tramos.filter(categoria=categoria):
-                if tramo.puntaje_minimo <= puntajes[categoria]["puntaje"] <= tramo.puntaje_maximo:
-                    puntajes[categoria]["nivel"] = tramo.nombre
-                    puntajes[categoria]["texto"] = tramo.texto
-                    break
-
-        if puntajes["GENERAL"]["nivel"] == "BAJO":
-            evaluacion["observaciones_initial"] = (
-                "En entrevista presenta una conducta adecuada, ajustada a la situación, motivación por logro de "
-                "objetivos, manejo de la ansiedad, preocupación por el autocuidado, tolerancia a la frustración "
-                "frente a situaciones desconocidas o que requieren concentración y procesamiento cognitivo "
-                "para toma de decisiones."
-            )
+        test = self.resultado.test.compilado()
 
-        evaluacion["puntajes"] = puntajes
+        totales = self.resultado.respuestalikertnoas_set.values_list(
+            "pregunta__categoria",
+        ).annotate(
+            total=Sum("puntaje"),
+        ).order_by()
 
-        nombre_resultado = (
-            "APTO" if puntajes["GENERAL"]["nivel"] == "BAJO"
-            else "CON_RESERVAS" if puntajes["GENERAL"]["nivel"] == "MODERADO"
-            else "NO_APTO"
-        )
-        resultado_evaluacion = self.resultado.test.resultados_posibles.get(nombre=nombre_resultado)
+        evaluacion, nombre_resultado = calcular_evaluacion(dict(totales), test.tramos)
+        resultado_evaluacion = test.resultado_evaluacion(nombre_resultado)
 
-        return evaluacion, resultado_evaluacion
+        if not resultado_evaluacion:
+            raise ResultadoEvaluacion.DoesNotExist(f"El test no tiene el resultado posible {nombre_resultado}")
 
-    def _generar_informe(self, qr_image: PilImage) -> bytes:
-        output = BytesIO()
-        qr_image.save(output, format="PNG")
-        qr_image_uri = base64.b64encode(output.getvalue()).decode('ascii')
+        return evaluacion, resultado_evaluacion
 
-        html = self._generar_html_informe(qr_image_uri)
+    def _generar_informe(self, qr_uri: str) -> bytes:
+        html = html_informe(ContextoInforme.cargar(self.resultado), qr_uri)
 
         if settings.DEBUG:
             with open("informe.html", "w") as file:
-                file.write(html)
-
-        return HTML(string=self._generar_html_informe(qr_image_uri), base_url=settings.BASE_DIR).write_pdf()
-
-    def _generar_html_informe(self, qr_image_uri: str) -> str:
-        domain = settings.BASE_URL.replace("http://", "").replace("https://", "")
-        sicologo = self.resultado.acceso.entrevistas.last().entrevistador
-
-        html = f"""
-                <html>
-                  <head>{self._estilos()}</head>
-                  <body>
-                    <h1>CERTIFICADO EVALUACIÓN PSICOLÓGICA<br />CONTROL DE LOS IMPULSOS</h1>
-                    <div class="informe">
-                        {self.generar_html_evaluacion()}
-                    </div>
-                    <div class="box-firma">
-                      <img src="{sicologo.firma.path}" alt="Firma {sicologo}" class="firma-img" />
-                      <hr>
-                      <p>{sicologo}<br>Psicólogo<br><span>N° Reg: {sicologo.nro_registro}</span></p>
-                    </div>
-                    <div class="verification">
-                        <hr>
-                        <div class="column image-column">
-                            <img src="data:image/png;base64,{qr_image_uri}" alt="Código QR">
-                        </div>
-                        <div class="column content-column">
-                            Para verificar la autenticidad escanee el código QR o visite<br>
-                            <a
-                             href="{settings.BASE_URL}/verificar/{self.resultado.acceso.codigo}"
-                             >
-                                {domain}/verificar/{self.resultado.acceso.codigo}
-                            </a> e ingrese el código <b>{self.resultado.clave_archivo}</b><br>
-                            Este documento fue emitido el {self.resultado.fecha_emision.strftime("%d/%m/%Y")} y caducará
-                            el {self.resultado.fecha_vencimiento.strftime("%d/%m/%Y")}
-                        </div>
-                    </div>
-                  </body>
-                </html>
-                """
-
-        return html
+                file.write(html.replace("<head>", f"<head><style>{ESTILOS}</style>", 1))
+
+        return obtener_renderizador().renderizar(html)
 
     def generar_html_evaluacion(self) -> str:
-        p1 = self._generar_parrafo1()
-        p2 = self._generar_parrafo2()
-        p3 = self._generar_parrafo3()
-        texto_no_planificada = self.resultado.evaluacion["puntajes"]["NO_PLANIFICADA"]["texto"]
-        texto_atencional = self.resultado.evaluacion["puntajes"]["COGNITIVA"]["texto"]
-        texto_motora = self.resultado.evaluacion["puntajes"]["MOTORA"]["texto"]
-
-        entrevista = self.resultado.acceso.entrevistas.last()
-
-        if entrevista and entrevista.resultado_entrevista:
-            apto_no_apto = entrevista.resultado_entrevista.texto
-        else:
-            tramo_general = self.resultado.evaluacion["puntajes"]["GENERAL"]["nivel"]
-
-            if tramo_general == "BAJO":
-                apto_no_apto = "apto"
-            elif tramo_general == "MODERADO":
-                apto_no_apto = "apto con reservas"
-            else:
-                apto_no_apto = "no apto"
-
-        labor = self.resultado.acceso.get_cargo_display()
-
-        return f"""
-            <p>{p1}</p>
-            <p>{p2}</p>
-            <ul>
-              <li>{texto_no_planificada}</li>
-              <li>{texto_atencional}</li>
-              <li>{texto_motora}</li>
-            </ul>
-            <p>{p3}</p>
-            <p>En conclusión, se determina que el Sr(a) <b>{self.resultado.persona.nombre_completo}</b>
-             es <b>{apto_no_apto}</b> para el cargo de <b>{labor}</b>.</p>
-        """
-
-    @staticmethod
-    def _estilos() -> str:
-        return """
-        <style>
-            @page {
-                size: Letter;
-                margin: 20mm; /* Set margin on each page */
-                margin-top: 12mm;
-                margin-bottom: 12mm;
-            }
-            body {
-                font-size: 13px;
-                font-family: 'DejaVu Serif', serif;
-            }
-            h1 {
-                font-size: 18px;
-                text-align: center;
-            }
-            p {
-                text-align: justify;
-            }
-            li {
-                text-align: justify;
-                margin: 10px 0 10px 0;
-            }
-            
-            .informe {
-                margin: 20px 0 20px 0;
-            }
-            
-            .firma-img {
-                height: 150px;
-                width: auto;
-                display: block;
-                margin: auto;
-            }
-            .box-firma {
-                width: 250px;
-                margin: auto;
-            }
-            .box-firma p {
-                text-align: center;
-            }
-            
-            .verification {
-                font-size: 0;
-                position: fixed;
-                bottom: 0;
-                width: 100%;
-            }
-            
-            .column {
-                font-size: 12px;
-                display: inline-block;
-                vertical-align: bottom;
-                margin-top: 10px;
-            }
-            
-            .image-column {
-                width: 20%;
-            }
-            
-            .content-column {
-                text-align: right;
-                width: 80%;
-            }
-        </style>
-        """
-
-    def _generar_parrafo1(self) -> str:
-        persona = self.resultado.persona
-        nombre_completo = persona.nombre_completo
-        run = rut_chile.format_rut_with_dots(persona.rut)
-        nacionalidad = Gentilicio.objects.get(pais=persona.nacionalidad).gentilicio
-
-        return (
-            "El profesional que firma este documento certifica que el Sr(a) "
-            f"<b>{nombre_completo}</b> RUN <b>{run}</b> Nacionalidad <b>{nacionalidad}</b> ha realizado una evaluación "
-            f"psicológica del control de los impulsos."
-        )
-
-    def _generar_parrafo2(self):
-        texto_general = self.resultado.evaluacion["puntajes"]["GENERAL"]["texto"]
-        return (
-            f"Pruebas psicológicas indican {texto_general}. Sub-escalas de impulsividad no planificada, atencional "
-            "y motora (BIS-11) arrojan el siguiente resultado:"
-        )
-
-    def _generar_parrafo3(self):
-        return self.resultado.entrevista.observaciones
+        return html_evaluacion(ContextoInforme.cargar(self.resultado))
+
@@ -0,0 +1,103 @@
+"""
+Renderizado a PDF de los informes con WeasyPrint. La hoja de estilos se interpreta una sola vez por proceso y la
+configuración de fuentes (donde WeasyPrint guarda las fuentes que ya encontró) se comparte entre informes.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from weasyprint import CSS, HTML
+from weasyprint.text.fonts import FontConfiguration
+
+ESTILOS = """
+@page {
+    size: Letter;
+    margin: 20mm; /* Set margin on each page */
+    margin-top: 12mm;
+    margin-bottom: 12mm;
+}
+body {
+    font-size: 13px;
+    font-family: 'DejaVu Serif', serif;
+}
+h1 {
+    font-size: 18px;
+    text-align: center;
+}
+p {
+    text-align: justify;
+}
+li {
+    text-align: justify;
+    margin: 10px 0 10px 0;
+}
+
+.informe {
+    margin: 20px 0 20px 0;
+}
+
+.firma-img {
+    height: 150px;
+    width: auto;
+    display: block;
+    margin: auto;
+}
+.box-firma {
+    width: 250px;
+    margin: auto;
+}
+.box-firma p {
+    text-align: center;
+}
+
+.verification {
+    font-size: 0;
+    position: fixed;
+    bottom: 0;
+    width: 100%;
+}
+
+.column {
+    font-size: 12px;
+    display: inline-block;
+    vertical-align: bottom;
+    margin-top: 10px;
+}
+
+.image-column {
+    width: 20%;
+}
+
+.content-column {
+    text-align: right;
+    width: 80%;
+}
+"""
+
+
+class RenderizadorInforme:
+    def __init__(self, estilos: str = ESTILOS):
+        self.font_config = FontConfiguration()
+        self.css = CSS(string=estilos, font_config=self.font_config)
+
+    def renderizar(self, html: str) -> bytes:
+        return HTML(
+            string=html,
+            base_url=settings.BASE_DIR,
+        ).write_pdf(
+            stylesheets=[self.css],
+            font_config=self.font_config,
+        )
+
+
+@lru_cache(maxsize=1)
+def obtener_renderizador() -> RenderizadorInforme:
+    """El renderizador del proceso (los procesos creados con fork heredan el del proceso padre, si ya existía)."""
+    return RenderizadorInforme()
+
+
+def precalentar_weasyprint():
+    """
+    Crea el renderizador del proceso y genera un documento mínimo, para que WeasyPrint cargue las fuentes antes del
+    primer informe.
+    """
+    obtener_renderizador().renderizar("<html><body><p>.</p></body></html>")
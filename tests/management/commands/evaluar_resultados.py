@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tests.generadores.lote import TAMANHO_LOTE, evaluar_resultados, resultados_pendientes
+
+
+class Command(BaseCommand):
+    help = "Evalúa en lote los resultados de tests terminados que no se han evaluado (o todos, con --todos)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--todos", action="store_true", help="Vuelve a evaluar también los ya evaluados")
+        parser.add_argument("--incluir-cerrados", action="store_true", help="Incluye resultados cerrados")
+        parser.add_argument("--test", type=int, help="Solo los resultados de este test (id)")
+        parser.add_argument("--lote", type=int, default=TAMANHO_LOTE, help="Resultados por lote")
+
+    def handle(self, *args, **options):
+        resultados = resultados_pendientes(todos=options["todos"], incluir_cerrados=options["incluir_cerrados"])
+
+        if options["test"]:
+            resultados = resultados.filter(acceso__acceso_test__test_id=options["test"])
+
+        inicio = time.perf_counter()
+
+        def al_avanzar(procesados: int, total: int):
+            segundos = time.perf_counter() - inicio
+            self.stdout.write(f"{procesados}/{total} resultados ({procesados / segundos:.0f} por segundo)")
+
+        evaluados, errores = evaluar_resultados(resultados, tamanho_lote=options["lote"], al_avanzar=al_avanzar)
+
+        for resultado_id, error in errores:
+            self.stderr.write(f"Resultado {resultado_id}: {error}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{evaluados} resultados evaluados, {len(errores)} con errores, en {time.perf_counter() - inicio:.1f} s"
+        ))
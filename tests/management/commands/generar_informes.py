@@ -0,0 +1,72 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from tests.generadores.cola import encolar_informes, generar_informe_encolado, resultados_sin_informe
+from tests.generadores.renderizador import precalentar_weasyprint
+from tests.models import TrabajoInforme
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera en varios procesos los informes pendientes (resultados con entrevista y sin informe) de un AccesoTest "
+        "o de las entrevistas entre dos fechas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--acceso-test", type=int, help="Solo los resultados de este AccesoTest (id)")
+        parser.add_argument("--desde", type=date.fromisoformat, help="Entrevistas desde esta fecha (AAAA-MM-DD)")
+        parser.add_argument("--hasta", type=date.fromisoformat, help="Entrevistas hasta esta fecha (AAAA-MM-DD)")
+        parser.add_argument("--procesos", type=int, default=os.cpu_count(), help="Procesos que generan informes")
+
+    def handle(self, *args, **options):
+        resultados = resultados_sin_informe(options["acceso_test"], options["desde"], options["hasta"])
+        # quedan en la cola, así que su estado se ve en el admin y procesar_informes puede tomar parte de ellos
+        ids = [trabajo.pk for trabajo in encolar_informes(resultados)]
+
+        if not ids:
+            self.stdout.write("No hay informes pendientes")
+            return
+
+        self.stdout.write(f"{len(ids)} informes por generar")
+        inicio = time.perf_counter()
+        generados = []
+
+        for generado in self._generar(ids, max(options["procesos"], 1)):
+            if generado is None:
+                continue
+
+            generados.append(generado)
+
+            if generado.estado == TrabajoInforme.Estado.TERMINADO:
+                self.stdout.write(f"Resultado {generado.resultado_id}: {generado.segundos:.2f} s")
+            else:
+                self.stderr.write(f"Resultado {generado.resultado_id}: {generado.error}")
+
+        errores = sum(generado.estado == TrabajoInforme.Estado.ERROR for generado in generados)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(generados) - errores} informes generados, {errores} con errores, "
+            f"{len(ids) - len(generados)} tomados por otro proceso, en {time.perf_counter() - inicio:.1f} s"
+        ))
+
+    @staticmethod
+    def _generar(ids: list[int], procesos: int):
+        if procesos == 1:
+            precalentar_weasyprint()
+            yield from map(generar_informe_encolado, ids)
+            return
+
+        # cada proceso abre sus propias conexiones: no deben heredar las de este
+        connections.close_all()
+
+        with ProcessPoolExecutor(
+                min(procesos, len(ids)),
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=precalentar_weasyprint,
+        ) as executor:
+            yield from executor.map(generar_informe_encolado, ids)
@@ -0,0 +1,46 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from tests.generadores.cola import atender_cola, reencolar_abandonados
+from tests.generadores.renderizador import precalentar_weasyprint
+
+
+class Command(BaseCommand):
+    help = "Genera los informes encolados desde el admin, en varios procesos a la vez."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--procesos", type=int, default=os.cpu_count(), help="Procesos que generan informes")
+        parser.add_argument("--espera", type=float, default=5, help="Segundos entre consultas cuando no hay trabajos")
+        parser.add_argument("--hasta-vaciar", action="store_true", help="Termina cuando no quedan trabajos pendientes")
+
+    def handle(self, *args, **options):
+        reencolados = reencolar_abandonados()
+
+        if reencolados:
+            self.stdout.write(f"{reencolados} trabajos abandonados vuelven a quedar pendientes")
+
+        procesos = max(options["procesos"], 1)
+
+        if procesos == 1:
+            precalentar_weasyprint()
+            procesados = atender_cola(options["espera"], options["hasta_vaciar"])
+        else:
+            # cada proceso abre sus propias conexiones: no deben heredar las de este
+            connections.close_all()
+
+            with ProcessPoolExecutor(
+                    procesos,
+                    mp_context=multiprocessing.get_context("fork"),
+                    initializer=precalentar_weasyprint,
+            ) as executor:
+                futuros = [
+                    executor.submit(atender_cola, options["espera"], options["hasta_vaciar"])
+                    for _ in range(procesos)
+                ]
+                procesados = sum(futuro.result() for futuro in futuros)
+
+        self.stdout.write(self.style.SUCCESS(f"{procesados} informes procesados"))
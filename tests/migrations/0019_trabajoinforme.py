@@ -0,0 +1,86 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("tests", "0018_resultado_cerrado"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TrabajoInforme",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "estado",
+                    models.CharField(
+                        choices=[
+                            ("PENDIENTE", "Pendiente"),
+                            ("EN_PROCESO", "En proceso"),
+                            ("TERMINADO", "Terminado"),
+                            ("ERROR", "Error"),
+                        ],
+                        default="PENDIENTE",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "fecha_creacion",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="fecha de creación"
+                    ),
+                ),
+                ("fecha_inicio", models.DateTimeField(blank=True, null=True)),
+                ("fecha_fin", models.DateTimeField(blank=True, null=True)),
+                ("intentos", models.PositiveSmallIntegerField(default=0)),
+                ("error", models.TextField(blank=True)),
+                (
+                    "resultado",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="trabajos_informe",
+                        to="tests.resultado",
+                    ),
+                ),
+                (
+                    "solicitado_por",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "trabajo de informe",
+                "verbose_name_plural": "trabajos de informe",
+                "indexes": [
+                    models.Index(
+                        fields=["estado", "fecha_creacion"],
+                        name="tests_traba_estado_fe71b0_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("estado__in", ["PENDIENTE", "EN_PROCESO"])),
+                        fields=("resultado",),
+                        name="trabajo_informe_activo_unico",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -1,11 +1,12 @@
 from datetime import datetime, date, timedelta
-from typing import Dict, Set, Optional
+from typing import TYPE_CHECKING, Dict, List, Set, Optional, Tuple
 from urllib.parse import urlencode
 
 import reversion
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 from django.utils.timezone import make_aware
 from django_countries.fields import CountryField
 from django_hosts import reverse
@@ -14,6 +15,9 @@ from rut_chile import rut_chile
 from utils.fechas import TZ_CHILE
 from utils.text import alfanumerico_random
 
+if TYPE_CHECKING:
+    from tests.compilado import TestCompilado
+
 
 class RUTField(models.CharField):
     def __init__(self, *args, **kwargs):
@@ -75,7 +79,16 @@ class Test(models.Model):
 
     @property
     def categorias_tramos(self) -> Set[str]:
-        return set(self.tramos.values_list("categoria", flat=True).distinct())
+        return set(self.compilado().tramos)
+
+    def compilado(self) -> "TestCompilado":
+        from tests.compilado import obtener_test_compilado
+        return obtener_test_compilado(self)
+
+    def tocar(self):
+        """Actualiza fecha_actualizacion, con lo que se deja de usar la definición compilada anterior."""
+        self.fecha_actualizacion = timezone.now()
+        Test.objects.filter(pk=self.pk).update(fecha_actualizacion=self.fecha_actualizacion)
 
 
 class TramoCategoriaEvaluacion(models.Model):
@@ -191,13 +204,14 @@ class AccesoTestPersona(models.Model):
         self.codigo = self.codigo or alfanumerico_random(20)
         super().save(*args, **kwargs)
 
+    # solo el campo que cambia, para no pisar lo que otra petición haya guardado en la fila entre medio
     def iniciar(self):
         self.inicio_respuestas_ts = make_aware(datetime.now(), timezone=TZ_CHILE)
-        self.save()
+        self.save(update_fields=["inicio_respuestas_ts"])
 
     def finalizar(self):
         self.fin_respuestas_ts = make_aware(datetime.now(), timezone=TZ_CHILE)
-        self.save()
+        self.save(update_fields=["fin_respuestas_ts"])
 
     @property
     def tiempo_test(self) -> str:
@@ -229,6 +243,9 @@ class AccesoTestPersona(models.Model):
         return url_with_query_params
 
 
+RESTRICCION_TRABAJO_ACTIVO_UNICO = "trabajo_informe_activo_unico"
+
+
 class Resultado(models.Model):
     acceso = models.OneToOneField(AccesoTestPersona, on_delete=models.CASCADE, related_name="resultado")
     fecha_creacion = models.DateTimeField("fecha de creación", auto_now_add=True)
@@ -280,6 +297,46 @@ class Resultado(models.Model):
         return (resultado_entrevista or self.resultado_test).texto
 
 
+class TrabajoInforme(models.Model):
+    """Solicitud de generar el informe de un resultado, que atiende el comando procesar_informes."""
+
+    class Estado(models.TextChoices):
+        PENDIENTE = "PENDIENTE", "Pendiente"
+        EN_PROCESO = "EN_PROCESO", "En proceso"
+        TERMINADO = "TERMINADO", "Terminado"
+        ERROR = "ERROR", "Error"
+
+    ACTIVOS = (Estado.PENDIENTE, Estado.EN_PROCESO)
+
+    resultado = models.ForeignKey(Resultado, on_delete=models.CASCADE, related_name="trabajos_informe")
+    estado = models.CharField(max_length=20, choices=Estado.choices, default=Estado.PENDIENTE)
+    solicitado_por = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    fecha_creacion = models.DateTimeField("fecha de creación", auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        verbose_name = "trabajo de informe"
+        verbose_name_plural = "trabajos de informe"
+        indexes = [
+            # la cola: pendientes por orden de llegada
+            models.Index(fields=["estado", "fecha_creacion"]),
+        ]
+        constraints = [
+            # a lo más un trabajo pendiente o en proceso por resultado
+            models.UniqueConstraint(
+                fields=["resultado"],
+                condition=models.Q(estado__in=["PENDIENTE", "EN_PROCESO"]),
+                name=RESTRICCION_TRABAJO_ACTIVO_UNICO,
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.resultado} - {self.get_estado_display()}"
+
+
 class RespuestaBase(models.Model):
     resultado = models.ForeignKey(Resultado, on_delete=models.CASCADE)
 
@@ -313,6 +370,33 @@ class RespuestaLikertNOAS(RespuestaBase):
         self.puntaje = self.puntajes.get(self.alternativa)
         super().save(*args, **kwargs)
 
+    @classmethod
+    def guardar(
+            cls, resultado: Resultado, test: "TestCompilado", respuestas: List[Tuple[int, str]],
+    ) -> List["RespuestaLikertNOAS"]:
+        """
+        Guarda (o reemplaza) las respuestas (pregunta_id, alternativa) del resultado con un solo INSERT ... ON
+        CONFLICT, tomando los puntajes de las preguntas del test compilado en vez de leerlas de la base de datos.
+        Las preguntas deben ser del test; si una viene repetida, vale la última.
+        """
+        # PostgreSQL no permite que un mismo INSERT ... ON CONFLICT actualice dos veces la misma fila
+        respuestas = dict(respuestas).items()
+
+        return cls.objects.bulk_create(
+            [
+                cls(
+                    resultado=resultado,
+                    pregunta_id=pregunta_id,
+                    alternativa=alternativa,
+                    puntaje=test.preguntas[pregunta_id].puntaje(alternativa),
+                )
+                for pregunta_id, alternativa in respuestas
+            ],
+            update_conflicts=True,
+            unique_fields=["resultado", "pregunta"],
+            update_fields=["alternativa", "puntaje"],
+        )
+
     @property
     def puntajes(self) -> Dict[str, int]:
         return {
@@ -17,23 +17,38 @@ class TestSerializer(serializers.ModelSerializer):
         fields = ("preguntalikertnoas_set",)
 
 
+class RespuestasLikertNOASListSerializer(serializers.ListSerializer):
+    def create(self, validated_data):
+        return RespuestaLikertNOAS.guardar(
+            self.context["resultado"],
+            self.context["test"],
+            [(respuesta["pregunta_id"], respuesta["alternativa"]) for respuesta in validated_data],
+        )
+
+
 class RespuestaLikertNOASSerializer(serializers.ModelSerializer):
+    # la pregunta se valida contra el test compilado, sin consultarla
+    pregunta = serializers.IntegerField(source="pregunta_id")
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.resultado = self.context["resultado"]
+        self.test = self.context["test"]
 
     class Meta:
         model = RespuestaLikertNOAS
         fields = ("pregunta", "alternativa")
+        list_serializer_class = RespuestasLikertNOASListSerializer
+
+    def validate_pregunta(self, value: int) -> int:
+        if value not in self.test.preguntas:
+            raise serializers.ValidationError("La pregunta no es de este test.")
+        return value
 
     def create(self, validated_data):
-        respuesta = self.Meta.model(**validated_data)
-        respuesta, created = RespuestaLikertNOAS.objects.update_or_create(
-            resultado=self.resultado,
-            pregunta=respuesta.pregunta,
-            defaults={
-                "alternativa": respuesta.alternativa,
-                "puntaje": respuesta.puntaje,  # actualizado en RespuestaLikertNOAS.save()
-            },
+        respuestas = RespuestaLikertNOAS.guardar(
+            self.resultado,
+            self.test,
+            [(validated_data["pregunta_id"], validated_data["alternativa"])],
         )
-        return respuesta
+        return respuestas[0]
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from tests.models import PreguntaLikertNOAS, ResultadoEvaluacion, Test, TramoCategoriaEvaluacion
+
+
+@receiver(post_save, sender=PreguntaLikertNOAS)
+@receiver(post_delete, sender=PreguntaLikertNOAS)
+@receiver(post_save, sender=TramoCategoriaEvaluacion)
+@receiver(post_delete, sender=TramoCategoriaEvaluacion)
+@receiver(post_save, sender=ResultadoEvaluacion)
+@receiver(post_delete, sender=ResultadoEvaluacion)
+def tocar_test(sender, instance, **kwargs):
+    # cambios hechos fuera de TestAdmin (que toca el test una vez al terminar de guardar los inlines)
+    Test.objects.filter(pk=instance.test_id).update(fecha_actualizacion=timezone.now())
+
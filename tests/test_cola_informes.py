@@ -0,0 +1,176 @@
+from datetime import datetime, timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.utils import timezone
+
+from entrevistas.models import Entrevista, Sicologo
+from tests.datos_prueba import crear_resultado, crear_test
+from tests.generadores.base import Generador
+from tests.generadores.cola import (
+    atender_cola, encolar_informe, encolar_informes, procesar_trabajo, reencolar_abandonados, resultados_sin_informe,
+    tomar_trabajo, ultimo_trabajo,
+)
+from tests.models import Resultado, TrabajoInforme
+from utils.fechas import TZ_CHILE
+
+Estado = TrabajoInforme.Estado
+
+
+@pytest.fixture
+def resultados(db) -> list[Resultado]:
+    test = crear_test(1)
+    return [crear_resultado(test, numero=numero) for numero in range(3)]
+
+
+@pytest.fixture
+def generar_sin_pdf(monkeypatch, settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+    def generar(self, raise_exception=False):
+        self.resultado.informe = ContentFile(b"%PDF", name=f"{self.resultado.acceso.codigo}.pdf")
+        self.resultado.save()
+
+    monkeypatch.setattr(Generador, "generar", generar)
+
+
+def test_encolar_informe(resultados):
+    trabajo = encolar_informe(resultados[0])
+
+    assert encolar_informe(resultados[0]) == trabajo
+    assert trabajo.estado == Estado.PENDIENTE
+
+    TrabajoInforme.objects.filter(pk=trabajo.pk).update(estado=Estado.TERMINADO)
+
+    assert encolar_informe(resultados[0]) != trabajo
+    assert ultimo_trabajo(resultados[0]).estado == Estado.PENDIENTE
+
+
+def test_tomar_trabajo(resultados):
+    trabajos = [encolar_informe(resultado) for resultado in reversed(resultados)]
+
+    for esperado in trabajos:
+        trabajo = tomar_trabajo()
+
+        assert trabajo == esperado
+        assert (trabajo.estado, trabajo.intentos) == (Estado.EN_PROCESO, 1)
+        assert TrabajoInforme.objects.get(pk=trabajo.pk).estado == Estado.EN_PROCESO
+
+    assert tomar_trabajo() is None
+
+
+def test_procesar_trabajo(resultados, generar_sin_pdf):
+    encolar_informe(resultados[0])
+    trabajo = tomar_trabajo()
+
+    procesar_trabajo(trabajo)
+
+    trabajo.refresh_from_db()
+    assert (trabajo.estado, trabajo.error) == (Estado.TERMINADO, "")
+    assert trabajo.fecha_fin
+    assert Resultado.objects.get(pk=resultados[0].pk).informe
+
+
+def test_procesar_trabajo_con_error(resultados):
+    encolar_informe(resultados[0])  # sin evaluar ni entrevista
+    trabajo = tomar_trabajo()
+
+    procesar_trabajo(trabajo)
+
+    trabajo.refresh_from_db()
+    assert trabajo.estado == Estado.ERROR
+    assert trabajo.error
+    assert not Resultado.objects.get(pk=resultados[0].pk).informe
+
+
+def test_reencolar_abandonados(resultados):
+    encolar_informe(resultados[0])
+    encolar_informe(resultados[1])
+    abandonado = tomar_trabajo()
+    reciente = tomar_trabajo()
+    TrabajoInforme.objects.filter(pk=abandonado.pk).update(fecha_inicio=timezone.now() - timedelta(hours=1))
+
+    assert reencolar_abandonados() == 1
+    assert TrabajoInforme.objects.get(pk=abandonado.pk).estado == Estado.PENDIENTE
+    assert TrabajoInforme.objects.get(pk=reciente.pk).estado == Estado.EN_PROCESO
+
+
+def test_atender_cola_reencola_abandonados(resultados, generar_sin_pdf):
+    encolar_informe(resultados[0])
+    abandonado = tomar_trabajo()
+    TrabajoInforme.objects.filter(pk=abandonado.pk).update(fecha_inicio=timezone.now() - timedelta(hours=1))
+
+    assert atender_cola(0, hasta_vaciar=True) == 0
+    assert atender_cola(0, hasta_vaciar=True, segundos_reencolado=0) == 1
+    assert TrabajoInforme.objects.get(pk=abandonado.pk).estado == Estado.TERMINADO
+
+
+def test_comando_procesar_informes(resultados, generar_sin_pdf, capsys):
+    for resultado in resultados:
+        encolar_informe(resultado)
+
+    call_command("procesar_informes", "--procesos", "1", "--hasta-vaciar")
+
+    assert "3 informes procesados" in capsys.readouterr().out
+    assert set(TrabajoInforme.objects.values_list("estado", flat=True)) == {Estado.TERMINADO}
+
+
+def _entrevistar(resultados: list[Resultado], inicio: datetime):
+    sicologo = Sicologo.objects.create(usuario=User.objects.create_user(username="sicologo"))
+
+    for i, resultado in enumerate(resultados):
+        Entrevista.objects.create(
+            entrevistador=sicologo,
+            acceso=resultado.acceso,
+            resultado=resultado,
+            fecha_inicio=inicio + timedelta(days=i),
+            fecha_fin=inicio + timedelta(days=i, minutes=30),
+        )
+
+
+def test_resultados_sin_informe(resultados):
+    inicio = datetime(2024, 5, 30, 10, tzinfo=TZ_CHILE)
+    _entrevistar(resultados[:2], inicio)
+
+    assert set(resultados_sin_informe()) == set(resultados[:2])
+    assert list(resultados_sin_informe(desde=inicio.date() + timedelta(days=1))) == [resultados[1]]
+    assert list(resultados_sin_informe(hasta=inicio.date())) == [resultados[0]]
+    assert not resultados_sin_informe(acceso_test_id=resultados[0].acceso.acceso_test_id + 1).exists()
+
+
+def test_encolar_informes(resultados):
+    activo = encolar_informe(resultados[0])
+    trabajos = encolar_informes(Resultado.objects.all())
+
+    assert activo in trabajos
+    assert sorted(trabajo.resultado_id for trabajo in trabajos) == sorted(resultado.pk for resultado in resultados)
+    assert encolar_informes(Resultado.objects.all()) == trabajos
+
+
+def test_comando_generar_informes(resultados, generar_sin_pdf, capsys):
+    _entrevistar(resultados[:2], datetime.now(tz=TZ_CHILE))
+
+    call_command("generar_informes", "--acceso-test", resultados[0].acceso.acceso_test_id, "--procesos", "1")
+
+    salida = capsys.readouterr().out
+    assert "2 informes generados, 0 con errores" in salida
+    assert f"Resultado {resultados[0].pk}: " in salida
+    assert not resultados_sin_informe().exists()
+
+    call_command("generar_informes")
+
+    assert "No hay informes pendientes" in capsys.readouterr().out
+
+
+def test_accion_generar_informes_pendientes(cliente_admin, resultados):
+    _entrevistar(resultados, datetime.now(tz=TZ_CHILE))
+
+    respuesta = cliente_admin.post(
+        "/tests/accesotest/",
+        {"action": "generar_informes_pendientes", "_selected_action": [resultados[0].acceso.acceso_test_id]},
+    )
+
+    assert respuesta.status_code == 302
+    assert TrabajoInforme.objects.filter(estado=Estado.PENDIENTE).count() == 3
@@ -0,0 +1,54 @@
+import pytest
+
+from tests.datos_prueba import crear_resultado, crear_test
+from tests.models import AccesoTestPersona
+
+URL = "/api/tests/tests/"
+
+
+@pytest.fixture
+def acceso(db) -> AccesoTestPersona:
+    return crear_resultado(crear_test(2)).acceso
+
+
+def test_cuestionario(client, acceso, django_assert_num_queries):
+    respuesta = client.get(URL, {"codigo": acceso.codigo})
+    preguntas = acceso.acceso_test.test.preguntalikertnoas_set.order_by("pk")
+
+    assert respuesta.status_code == 200
+    assert respuesta.json() == {"preguntalikertnoas_set": [{"id": p.pk, "texto": p.texto} for p in preguntas]}
+    assert respuesta["Cache-Control"] == "private, no-cache"
+    etag = respuesta["ETag"]
+
+    # con el cuestionario en cache solo se valida el acceso: el acceso (con su test) y sus entrevistas
+    with django_assert_num_queries(2):
+        respuesta = client.get(URL, {"codigo": acceso.codigo}, HTTP_IF_NONE_MATCH=etag)
+
+    assert respuesta.status_code == 304
+    assert respuesta["ETag"] == etag
+
+    with django_assert_num_queries(2):
+        respuesta = client.get(URL, {"codigo": acceso.codigo}, HTTP_IF_NONE_MATCH='"otro"')
+
+    assert respuesta.status_code == 200
+    assert respuesta["ETag"] == etag
+
+
+def test_cuestionario_cambia_etag_al_editar_el_test(client, acceso):
+    etag = client.get(URL, {"codigo": acceso.codigo})["ETag"]
+
+    pregunta = acceso.acceso_test.test.preguntalikertnoas_set.first()
+    pregunta.texto = "Otra pregunta"
+    pregunta.save()
+
+    respuesta = client.get(URL, {"codigo": acceso.codigo}, HTTP_IF_NONE_MATCH=etag)
+
+    assert respuesta.status_code == 200
+    assert respuesta["ETag"] != etag
+    assert {"id": pregunta.pk, "texto": "Otra pregunta"} in respuesta.json()["preguntalikertnoas_set"]
+
+
+def test_cuestionario_valida_el_acceso(client, db):
+    respuesta = client.get(URL, {"codigo": "no-existe"}, HTTP_IF_NONE_MATCH='"cualquiera"')
+
+    assert respuesta.status_code in (401, 403)
@@ -0,0 +1,185 @@
+import base64
+from datetime import date, datetime, timedelta
+from io import BytesIO
+from time import perf_counter
+
+import pytest
+import qrcode
+from django.conf import settings
+from django.contrib.auth.models import User
+from PIL import Image
+from weasyprint import HTML
+
+from entrevistas.models import Entrevista, Sicologo
+from tests.datos_prueba import crear_resultado, crear_test
+from tests.generadores import informe, puntaje_escala
+from tests.generadores.base import qr_verificacion
+from tests.generadores.informe import ContextoInforme
+from tests.generadores.puntaje_escala import GeneradorPuntajeEscala
+from tests.generadores.renderizador import ESTILOS, RenderizadorInforme
+from tests.models import Gentilicio, Resultado
+from utils.fechas import TZ_CHILE
+
+CATEGORIAS = ["GENERAL", "COGNITIVA", "MOTORA", "NO_PLANIFICADA"]
+
+
+def _crear_resultados_evaluados(cantidad: int) -> list[Resultado]:
+    """Resultados evaluados, con entrevista y todo lo que el informe necesita."""
+    test = crear_test(3)
+    Gentilicio.objects.create(pais="CL", gentilicio="chilena")
+    sicologo = Sicologo.objects.create(
+        usuario=User.objects.create_user(username="sicologo", first_name="Ana", last_name="Rojas"),
+        nro_registro="1234",
+        firma="firmas/ana.png",
+        genero="F",
+        titulo="Psicóloga",
+    )
+    inicio = datetime.now(tz=TZ_CHILE) + timedelta(days=1)
+    resultados = []
+
+    for numero in range(cantidad):
+        resultado = crear_resultado(test, numero=numero)
+        persona = resultado.persona
+        persona.apellido_paterno = f"Apellido{numero}"
+        persona.nacionalidad = "CL"
+        persona.save()
+        Entrevista.objects.create(
+            entrevistador=sicologo,
+            acceso=resultado.acceso,
+            resultado=resultado,
+            fecha_inicio=inicio + timedelta(hours=numero),
+            fecha_fin=inicio + timedelta(hours=numero, minutes=30),
+        )
+        resultado = Resultado.objects.get(pk=resultado.pk)
+        GeneradorPuntajeEscala(resultado, None).evaluar()
+        resultado.fecha_emision = date.today()
+        resultado.clave_archivo = "12345"
+        resultado.save(update_fields=["fecha_emision", "clave_archivo"])
+        resultados.append(resultado)
+
+    return [Resultado.objects.get(pk=resultado.pk) for resultado in resultados]
+
+
+@pytest.mark.django_db
+def test_contexto_informe(django_assert_num_queries):
+    resultado = _crear_resultados_evaluados(1)[0]
+    resultado.clave_archivo = "54321"  # sin guardar, como en Generador.generar
+
+    # el resultado con su persona, acceso y entrevista, y el gentilicio
+    with django_assert_num_queries(2):
+        contexto = ContextoInforme.cargar(resultado)
+
+    assert contexto.nombre_completo == "Candidato Apellido0"
+    assert contexto.nacionalidad == "chilena"
+    assert (contexto.sicologo, contexto.nro_registro) == ("Ana Rojas", "1234")
+    assert contexto.apto_no_apto == "apto"
+    assert contexto.clave_archivo == "54321"
+    assert contexto.observaciones == puntaje_escala.OBSERVACIONES_INICIALES_NIVEL_BAJO
+
+
+@pytest.mark.django_db
+def test_generar_informe_arma_el_html_una_vez(monkeypatch, django_assert_num_queries):
+    resultado = _crear_resultados_evaluados(1)[0]
+    generador = GeneradorPuntajeEscala(resultado, None)
+    armados = []
+    renderizados = []
+
+    def html_informe(*args):
+        armados.append(informe.html_informe(*args))
+        return armados[-1]
+
+    def renderizar(self, html):
+        renderizados.append(html)
+        return b"%PDF"
+
+    monkeypatch.setattr(puntaje_escala, "html_informe", html_informe)
+    monkeypatch.setattr(RenderizadorInforme, "renderizar", renderizar)
+
+    qr_uri = qr_verificacion(resultado.acceso.codigo)
+
+    with django_assert_num_queries(2):
+        pdf = generador._generar_informe(qr_uri)
+
+    assert pdf == b"%PDF"
+    assert len(armados) == 1
+    assert renderizados == armados
+    assert "Candidato Apellido0" in armados[0]
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+@pytest.mark.parametrize("cantidad", [10, 50])
+def test_benchmark_html_informe(cantidad, django_assert_max_num_queries):
+    resultados = _crear_resultados_evaluados(cantidad)
+
+    with django_assert_max_num_queries(2 * cantidad) as consultas:
+        inicio = perf_counter()
+
+        for resultado in resultados:
+            informe.html_informe(ContextoInforme.cargar(resultado), "")
+
+        segundos = perf_counter() - inicio
+
+    print(
+        f"\n{cantidad} informes: {segundos / cantidad * 1000:.2f} ms y "
+        f"{len(consultas) / cantidad:.0f} consultas por informe (sin el PDF)"
+    )
+
+
+@pytest.mark.benchmark
+def test_benchmark_renderizador():
+    contexto = ContextoInforme(
+        nombre_completo="Candidato de Prueba",
+        run="12.345.678-5",
+        nacionalidad="chilena",
+        cargo="Guardia de Seguridad",
+        puntajes={categoria: {"texto": f"Texto {categoria}", "nivel": "BAJO"} for categoria in CATEGORIAS},
+        observaciones=puntaje_escala.OBSERVACIONES_INICIALES_NIVEL_BAJO,
+        apto_no_apto="apto",
+        sicologo="Ana Rojas",
+        nro_registro="1234",
+        firma_path="",
+        firma_informe="",
+        codigo="codigo",
+        clave_archivo="12345",
+        fecha_emision=date.today(),
+        fecha_vencimiento=date.today() + timedelta(days=90),
+    )
+    html = informe.html_informe(contexto, "")
+    cantidad = 5
+
+    # antes: los estilos dentro del HTML, interpretados de nuevo en cada PDF y sin compartir las fuentes
+    inicio = perf_counter()
+    con_estilos = html.replace("<head>", f"<head><style>{ESTILOS}</style>", 1)
+    antes = [HTML(string=con_estilos, base_url=settings.BASE_DIR).write_pdf() for _ in range(cantidad)]
+    t_antes = (perf_counter() - inicio) / cantidad
+
+    inicio = perf_counter()
+    renderizador = RenderizadorInforme()
+    despues = [renderizador.renderizar(html) for _ in range(cantidad)]
+    t_despues = (perf_counter() - inicio) / cantidad
+
+    print(f"\nPDF del informe: {t_antes * 1000:.1f} ms antes, {t_despues * 1000:.1f} ms con RenderizadorInforme")
+    assert all(pdf.startswith(b"%PDF") for pdf in antes + despues)
+
+
+def test_qr_verificacion():
+    qr_verificacion.cache_clear()
+    uri = qr_verificacion("codigo")
+    # lo que generaba antes Generador._generar_qr, pasando por PIL
+    esperado = qrcode.make(
+        f"{settings.BASE_URL}/verificar/codigo",
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=2,
+        border=0,
+    ).get_image()
+
+    assert uri.startswith("data:image/png;base64,")
+
+    with Image.open(BytesIO(base64.b64decode(uri.split(",", 1)[1]))) as imagen:
+        assert imagen.size == esperado.size
+        assert imagen.convert("1").tobytes() == esperado.convert("1").tobytes()
+
+    assert qr_verificacion("codigo") is uri
+    assert qr_verificacion.cache_info().hits == 1
@@ -0,0 +1,219 @@
+from time import perf_counter
+from types import SimpleNamespace
+
+import pytest
+from django.contrib import admin
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+
+from tests.admin import TestAdmin as ModeloTestAdmin
+from tests.compilado import IndiceTramos, TramoCompilado, errores_tramos
+from tests.datos_prueba import crear_resultado, crear_test
+from tests.generadores.lote import evaluar_resultados, resultados_pendientes
+from tests.generadores.puntaje_escala import GeneradorPuntajeEscala
+from tests.models import Resultado, Test as ModeloTest
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("preguntas_por_categoria", [3, 30])
+def test_evaluar_consultas_constantes(django_assert_num_queries, preguntas_por_categoria):
+    test = crear_test(preguntas_por_categoria)
+    resultado = crear_resultado(test, {"COGNITIVA": "N", "MOTORA": "S", "NO_PLANIFICADA": "O"})
+
+    # acceso, acceso_test y test; suma por categoría; preguntas, tramos y resultados posibles al compilar el test
+    with django_assert_num_queries(7):
+        GeneradorPuntajeEscala(resultado, None)._evaluar()
+
+    resultado = Resultado.objects.get(pk=resultado.pk)
+
+    # con el test ya compilado
+    with django_assert_num_queries(4):
+        evaluacion, resultado_evaluacion = GeneradorPuntajeEscala(resultado, None)._evaluar()
+
+    puntajes = evaluacion["puntajes"]
+    assert puntajes["COGNITIVA"] == {"puntaje": preguntas_por_categoria, "nivel": "BAJO", "texto": "COGNITIVA BAJO"}
+    assert puntajes["MOTORA"]["puntaje"] == 4 * preguntas_por_categoria
+    assert puntajes["MOTORA"]["nivel"] == "ALTO"
+    assert puntajes["NO_PLANIFICADA"]["nivel"] == "MODERADO"
+    assert puntajes["GENERAL"]["puntaje"] == 7 * preguntas_por_categoria
+    assert puntajes["GENERAL"]["nivel"] == "MODERADO"
+    assert resultado_evaluacion.nombre == "CON_RESERVAS"
+
+
+@pytest.mark.django_db
+def test_test_compilado(django_assert_num_queries):
+    test = crear_test(2)
+    compilado = test.compilado()
+
+    assert [pregunta.categoria for pregunta in compilado.preguntas.values()] == [
+        "COGNITIVA", "COGNITIVA", "MOTORA", "MOTORA", "NO_PLANIFICADA", "NO_PLANIFICADA",
+    ]
+    assert next(iter(compilado.preguntas.values())).puntaje("A") == 3
+    assert compilado.tramos["GENERAL"].tramos[0] == (0, 8, "BAJO", "GENERAL BAJO")
+    assert compilado.resultado_evaluacion("APTO") == test.resultados_posibles.get(nombre="APTO")
+
+    with django_assert_num_queries(0):
+        assert test.compilado() is compilado
+        assert ModeloTest(pk=test.pk, fecha_actualizacion=test.fecha_actualizacion).compilado() is compilado
+
+
+@pytest.mark.django_db
+def test_test_compilado_se_invalida():
+    test = crear_test(1)
+    test.compilado()
+
+    test.tramos.filter(categoria="GENERAL", nombre="BAJO").get().delete()
+    test.refresh_from_db()
+
+    assert [tramo.nombre for tramo in test.compilado().tramos["GENERAL"].tramos] == ["MODERADO", "ALTO"]
+
+
+@pytest.mark.parametrize(
+    "puntaje,nombre",
+    [(-1, None), (0, "BAJO"), (4, "BAJO"), (5, "MODERADO"), (12, "ALTO"), (13, None)],
+)
+def test_indice_tramos(puntaje, nombre):
+    indice = IndiceTramos.crear([
+        TramoCompilado(9, 12, "ALTO", ""),
+        TramoCompilado(0, 4, "BAJO", ""),
+        TramoCompilado(5, 8, "MODERADO", ""),
+    ])
+
+    tramo = indice.buscar(puntaje)
+
+    assert (tramo and tramo.nombre) == nombre
+
+
+def test_errores_tramos():
+    assert errores_tramos([("GENERAL", 0, 4), ("GENERAL", 5, 9), ("MOTORA", 3, 6)]) == []
+    assert errores_tramos([("GENERAL", 5, 9), ("GENERAL", 0, 5), ("MOTORA", 0, 2), ("MOTORA", 4, 6)]) == [
+        "GENERAL: los tramos 0-5 y 5-9 se solapan",
+        "MOTORA: faltan los puntajes entre 2 y 4",
+    ]
+
+
+@pytest.mark.django_db
+def test_evaluar_puntaje_fuera_de_los_tramos():
+    test = crear_test(1)
+    test.tramos.filter(categoria="MOTORA", nombre="ALTO").delete()
+    resultado = crear_resultado(test, {"COGNITIVA": "N", "MOTORA": "S", "NO_PLANIFICADA": "O"})
+
+    with pytest.raises(ValidationError, match="El puntaje 4 de la categoría MOTORA no cae en ningún tramo"):
+        GeneradorPuntajeEscala(resultado, None)._evaluar()
+
+
+@pytest.mark.django_db
+def test_admin_valida_tramos(cliente_admin):
+    test = crear_test(1)
+    tramos = list(test.tramos.order_by("pk"))
+    datos = {
+        "nombre": test.nombre,
+        **_datos_inline("tramos", tramos, ["categoria", "nombre", "texto", "puntaje_minimo", "puntaje_maximo"]),
+        **_datos_inline("resultados_posibles", list(test.resultados_posibles.all()), ["nombre", "texto"]),
+        **_datos_inline(
+            "preguntalikertnoas_set", list(test.preguntalikertnoas_set.all()),
+            ["texto", "categoria", "puntaje_nunca", "puntaje_ocasionalmente", "puntaje_a_menudo", "puntaje_siempre"],
+        ),
+    }
+    url = f"/tests/test/{test.pk}/change/"
+
+    assert cliente_admin.post(url, datos).status_code == 302
+
+    datos["tramos-0-puntaje_maximo"] = tramos[1].puntaje_minimo  # el primer tramo de GENERAL choca con el segundo
+    respuesta = cliente_admin.post(url, datos)
+
+    assert respuesta.status_code == 200
+    assert "GENERAL: los tramos 0-5 y 5-8 se solapan" in respuesta.content.decode()
+
+
+@pytest.mark.django_db
+def test_test_admin_invalida_test_compilado(rf):
+    test = crear_test(1)
+    fecha_anterior = test.fecha_actualizacion
+    test.compilado()
+    form = SimpleNamespace(instance=test, save_m2m=lambda: None)
+
+    ModeloTestAdmin(ModeloTest, admin.site).save_related(rf.post("/"), form, [], change=True)
+
+    test.refresh_from_db()
+    assert test.fecha_actualizacion > fecha_anterior
+    assert test.compilado().fecha_actualizacion == test.fecha_actualizacion
+
+
+ALTERNATIVAS = [
+    {"COGNITIVA": "N", "MOTORA": "N", "NO_PLANIFICADA": "O"},
+    {"COGNITIVA": "N", "MOTORA": "S", "NO_PLANIFICADA": "O"},
+    {"COGNITIVA": "S", "MOTORA": "S", "NO_PLANIFICADA": "A"},
+]
+
+
+@pytest.mark.django_db
+def test_evaluar_en_lote_igual_que_de_a_uno():
+    test = crear_test(5)
+    resultados = [crear_resultado(test, alternativas, i) for i, alternativas in enumerate(ALTERNATIVAS)]
+    esperados = [GeneradorPuntajeEscala(resultado, None)._evaluar() for resultado in resultados]
+
+    evaluados, errores = evaluar_resultados(resultados_pendientes(), tamanho_lote=2)
+
+    assert (evaluados, errores) == (3, [])
+    assert not resultados_pendientes().exists()
+
+    for resultado, (evaluacion, resultado_test) in zip(resultados, esperados):
+        resultado.refresh_from_db()
+        assert resultado.evaluacion == evaluacion
+        assert resultado.resultado_test == resultado_test
+
+
+@pytest.mark.django_db
+def test_evaluar_en_lote_informa_errores():
+    test = crear_test(1)
+    test.resultados_posibles.filter(nombre="NO_APTO").delete()
+    crear_resultado(test, ALTERNATIVAS[0], 0)
+    con_error = crear_resultado(test, ALTERNATIVAS[2], 1)
+
+    evaluados, errores = evaluar_resultados(resultados_pendientes())
+
+    assert evaluados == 1
+    assert errores == [(con_error.pk, "El test no tiene el resultado posible NO_APTO")]
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_evaluar_en_lote_rendimiento(django_assert_max_num_queries):
+    cantidad = 300
+    test = crear_test(10)
+
+    for i in range(cantidad):
+        crear_resultado(test, ALTERNATIVAS[i % len(ALTERNATIVAS)], i)
+
+    # por lote: resultados, sumas y bulk_update (más preguntas, tramos y resultados posibles la primera vez)
+    with django_assert_max_num_queries(20):
+        inicio = perf_counter()
+        evaluados, _ = evaluar_resultados(resultados_pendientes(), tamanho_lote=100)
+        segundos = perf_counter() - inicio
+
+    print(f"\n{evaluados} resultados en {segundos * 1000:.0f} ms ({evaluados / segundos:.0f} por segundo)")
+    assert evaluados == cantidad
+
+
+@pytest.mark.django_db
+def test_comando_evaluar_resultados(capsys):
+    crear_resultado(crear_test(1), ALTERNATIVAS[0])
+
+    call_command("evaluar_resultados")
+
+    assert "1 resultados evaluados, 0 con errores" in capsys.readouterr().out
+
+
+def _datos_inline(prefijo: str, objetos: list, campos: list[str]) -> dict:
+    datos = {
+        f"{prefijo}-TOTAL_FORMS": len(objetos),
+        f"{prefijo}-INITIAL_FORMS": len(objetos),
+    }
+
+    for i, objeto in enumerate(objetos):
+        datos[f"{prefijo}-{i}-id"] = objeto.pk
+        datos[f"{prefijo}-{i}-test"] = objeto.test_id
+        datos.update({f"{prefijo}-{i}-{campo}": getattr(objeto, campo) for campo in campos})
+
+    return datos
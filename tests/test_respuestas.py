@@ -0,0 +1,97 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from django.contrib.auth.models import User
+
+from entrevistas.models import Entrevista, Sicologo
+from tests.datos_prueba import crear_resultado, crear_test
+from tests.models import AccesoTestPersona, RespuestaLikertNOAS, Resultado
+from utils.fechas import TZ_CHILE
+
+URL = "/api/tests/respuestas-likert-noas/"
+URL_LOTE = "/api/tests/respuestas-likert-noas/lote/"
+
+
+@pytest.fixture
+def acceso(db) -> AccesoTestPersona:
+    resultado = crear_resultado(crear_test(2))
+    resultado.respuestalikertnoas_set.all().delete()
+    resultado.test.compilado()  # como si otra petición ya lo hubiera compilado
+    return resultado.acceso
+
+
+def _responder(client, acceso: AccesoTestPersona, datos, url: str = URL):
+    return client.post(f"{url}?codigo={acceso.codigo}", json.dumps(datos), content_type="application/json")
+
+
+def test_responder_pregunta(client, acceso, django_assert_num_queries):
+    pregunta = acceso.acceso_test.test.preguntalikertnoas_set.order_by("pk").first()
+
+    # acceso (con acceso_test y test), entrevistas del acceso, resultado y el INSERT ... ON CONFLICT
+    with django_assert_num_queries(4):
+        respuesta = _responder(client, acceso, {"pregunta": pregunta.pk, "alternativa": "A"})
+
+    assert respuesta.status_code == 201
+    assert respuesta.json() == {"pregunta": pregunta.pk, "alternativa": "A"}
+
+    with django_assert_num_queries(4):
+        _responder(client, acceso, {"pregunta": pregunta.pk, "alternativa": "S"})
+
+    guardada = RespuestaLikertNOAS.objects.get(resultado__acceso=acceso)
+    assert (guardada.pregunta_id, guardada.alternativa, guardada.puntaje) == (pregunta.pk, "S", 4)
+
+
+@pytest.mark.parametrize("datos", [{"pregunta": 0, "alternativa": "A"}, {"pregunta": None, "alternativa": "X"}])
+def test_responder_datos_invalidos(client, acceso, datos):
+    if datos["pregunta"] is None:
+        datos["pregunta"] = acceso.acceso_test.test.preguntalikertnoas_set.first().pk
+
+    respuesta = _responder(client, acceso, datos)
+
+    assert respuesta.status_code == 400
+    assert not Resultado.objects.get(acceso=acceso).respuestalikertnoas_set.exists()
+
+
+def test_responder_en_lote(client, acceso, django_assert_num_queries):
+    preguntas = list(acceso.acceso_test.test.preguntalikertnoas_set.order_by("pk").values_list("pk", flat=True))
+    datos = [{"pregunta": pregunta, "alternativa": "O"} for pregunta in preguntas]
+    datos.append({"pregunta": preguntas[0], "alternativa": "S"})  # repetida: vale la última
+
+    # las mismas consultas que para una sola respuesta
+    with django_assert_num_queries(4):
+        respuesta = _responder(client, acceso, datos, URL_LOTE)
+
+    assert respuesta.status_code == 201
+    guardadas = dict(
+        RespuestaLikertNOAS.objects.filter(resultado__acceso=acceso).values_list("pregunta_id", "puntaje")
+    )
+    assert guardadas == {pregunta: 4 if pregunta == preguntas[0] else 2 for pregunta in preguntas}
+
+
+@pytest.mark.parametrize("datos", [[], [{"pregunta": 0, "alternativa": "A"}], {"pregunta": 1, "alternativa": "A"}])
+def test_responder_en_lote_datos_invalidos(client, acceso, datos):
+    respuesta = _responder(client, acceso, datos, URL_LOTE)
+
+    assert respuesta.status_code == 400
+    assert not RespuestaLikertNOAS.objects.exists()
+
+
+def test_acceso_con_entrevista_se_rechaza(client, acceso):
+    pregunta = acceso.acceso_test.test.preguntalikertnoas_set.first()
+    datos = {"pregunta": pregunta.pk, "alternativa": "A"}
+
+    assert _responder(client, acceso, datos).status_code == 201
+
+    inicio = datetime.now(tz=TZ_CHILE) + timedelta(days=1)
+    Entrevista.objects.create(
+        entrevistador=Sicologo.objects.create(usuario=User.objects.create_user(username="sicologo")),
+        acceso=acceso,
+        fecha_inicio=inicio,
+        fecha_fin=inicio + timedelta(minutes=30),
+    )
+
+    respuesta = _responder(client, acceso, datos)
+
+    assert respuesta.status_code == 400
+    assert respuesta.json() == ["Ya has completado este test."]
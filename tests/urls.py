@@ -1,10 +1,15 @@
 from django.urls import path
 
-from tests.views import TestView, RespuestaLikertNOASView, iniciar_test, finalizar_test
+from tests.views import TestView, RespuestaLikertNOASView, RespuestasLikertNOASLoteView, iniciar_test, finalizar_test
 
 urlpatterns = [
     path('tests/', TestView.as_view(), name='test-view'),
     path('tests/iniciar/', iniciar_test, name='iniciar-test'),
     path('tests/finalizar/', finalizar_test, name='finalizar-test'),
     path('respuestas-likert-noas/', RespuestaLikertNOASView.as_view(), name='respuesta-likert-noas-view'),
+    path(
+        'respuestas-likert-noas/lote/',
+        RespuestasLikertNOASLoteView.as_view(),
+        name='respuestas-likert-noas-lote-view',
+    ),
 ]
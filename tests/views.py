@@ -1,15 +1,44 @@
+import hashlib
 from time import sleep
-from typing import Dict, Any
+from typing import Dict, Any, NamedTuple
 
-from django.http import JsonResponse
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.generics import RetrieveAPIView, CreateAPIView
+from rest_framework.renderers import JSONRenderer
 
-from tests.models import Resultado
-from tests.serializers import TestSerializer, RespuestaLikertNOASSerializer
+from tests.compilado import TIMEOUT
+from tests.models import Resultado, Test
+from tests.serializers import TestSerializer, RespuestaLikertNOASSerializer, PreguntaLikertNOASSerializer
 from utils.request import get_and_validate_acceso
 
+MAX_RESPUESTAS_POR_LOTE = 500
+
+
+class Cuestionario(NamedTuple):
+    contenido: bytes
+    etag: str
+
+
+def obtener_cuestionario(test: Test) -> Cuestionario:
+    """
+    Las preguntas del test ya serializadas, con su ETag. Se arman desde el test compilado y se guardan en el cache con
+    la misma fecha_actualizacion en la clave, así que un cambio en el test genera otro contenido y otro ETag.
+    """
+    clave = f"cuestionario:{test.pk}:{test.fecha_actualizacion.isoformat()}"
+    cuestionario = cache.get(clave)
+
+    if cuestionario is None:
+        preguntas = PreguntaLikertNOASSerializer(test.compilado().preguntas.values(), many=True).data
+        contenido = JSONRenderer().render({"preguntalikertnoas_set": preguntas})
+        cuestionario = Cuestionario(contenido, f'"{hashlib.sha256(contenido).hexdigest()}"')
+        cache.set(clave, cuestionario, TIMEOUT)
+
+    return cuestionario
+
 
 @method_decorator(csrf_exempt, name="dispatch")
 class TestView(RetrieveAPIView):
@@ -19,6 +48,19 @@ class TestView(RetrieveAPIView):
         acceso = get_and_validate_acceso(self.request)
         return acceso.acceso_test.test
 
+    def retrieve(self, request, *args, **kwargs):
+        # el acceso se valida siempre, aunque el navegador ya tenga el cuestionario
+        cuestionario = obtener_cuestionario(self.get_object())
+        respuesta = get_conditional_response(request, etag=cuestionario.etag)
+
+        if respuesta is None:
+            respuesta = HttpResponse(cuestionario.contenido, content_type="application/json")
+
+        respuesta["ETag"] = cuestionario.etag
+        # privado (la URL lleva el código del candidato) y revalidado en cada carga, que normalmente termina en un 304
+        patch_cache_control(respuesta, private=True, no_cache=True)
+        return respuesta
+
 
 @method_decorator(csrf_exempt, name="dispatch")
 class RespuestaLikertNOASView(CreateAPIView):
@@ -35,9 +77,20 @@ class RespuestaLikertNOASView(CreateAPIView):
 
         context = super().get_serializer_context()
         context["resultado"] = resultado
+        context["test"] = acceso.acceso_test.test.compilado()
         return context
 
 
+@method_decorator(csrf_exempt, name="dispatch")
+class RespuestasLikertNOASLoteView(RespuestaLikertNOASView):
+    """Recibe una lista de respuestas ({pregunta, alternativa}) y las guarda todas con una sola sentencia."""
+
+    def get_serializer(self, *args, **kwargs):
+        if "data" in kwargs:
+            kwargs.update(many=True, allow_empty=False, max_length=MAX_RESPUESTAS_POR_LOTE)
+        return super().get_serializer(*args, **kwargs)
+
+
 @csrf_exempt
 def iniciar_test(request):
     acceso = get_and_validate_acceso(request)
@@ -0,0 +1,51 @@
+import struct
+import zlib
+from io import BytesIO
+from typing import Sequence
+
+from PIL import Image
+
+
+def reducir_imagen(archivo, alto: int) -> bytes:
+    """
+    La imagen escalada (sin agrandarla) a `alto` píxeles de alto, como PNG optimizado. Conserva la transparencia y
+    descarta los metadatos.
+    """
+    with Image.open(archivo) as imagen:
+        imagen.load()
+
+    if imagen.mode not in ("L", "LA", "RGB", "RGBA"):
+        imagen = imagen.convert("RGBA")
+
+    if imagen.height > alto:
+        imagen = imagen.resize((max(round(imagen.width * alto / imagen.height), 1), alto), Image.LANCZOS)
+
+    salida = BytesIO()
+    imagen.save(salida, format="PNG", optimize=True)
+    return salida.getvalue()
+
+
+def png_monocromo(filas: Sequence[Sequence[bool]], escala: int = 1) -> bytes:
+    """
+    PNG de 1 bit por píxel a partir de una matriz (True es negro), con cada celda de `escala` x `escala` píxeles.
+    Para imágenes como un código QR es bastante más chico y rápido que pasar por PIL.
+    """
+    ancho = len(filas[0]) * escala
+    bytes_por_fila = (ancho + 7) // 8
+    datos = bytearray()
+
+    for fila in filas:
+        bits = "".join(("0" if negro else "1") * escala for negro in fila).ljust(bytes_por_fila * 8, "1")
+        # cada fila parte con el tipo de filtro (0: ninguno)
+        datos += (b"\x00" + int(bits, 2).to_bytes(bytes_por_fila, "big")) * escala
+
+    def _chunk(tipo: bytes, contenido: bytes) -> bytes:
+        return struct.pack(">I", len(contenido)) + tipo + contenido + struct.pack(">I", zlib.crc32(tipo + contenido))
+
+    return b"".join([
+        b"\x89PNG\r\n\x1a\n",
+        # ancho, alto, profundidad de 1 bit, escala de grises, compresión, filtro y sin entrelazado
+        _chunk(b"IHDR", struct.pack(">IIBBBBB", ancho, len(filas) * escala, 1, 0, 0, 0, 0)),
+        _chunk(b"IDAT", zlib.compress(bytes(datos), 9)),
+        _chunk(b"IEND", b""),
+    ])
@@ -0,0 +1,134 @@
+"""
+Entrega de archivos de media protegidos. Con MEDIA_ENTREGA el proxy envía el archivo (X-Accel-Redirect en nginx,
+X-Sendfile en lighttpd) y Django solo autoriza; sin él, FileResponse lo transmite por bloques y atiende Range.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from pathlib import Path
+from typing import Optional
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+ENTREGA_NGINX = "x-accel-redirect"
+ENTREGA_LIGHTTPD = "x-sendfile"
+
+RE_RANGO = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class _Tramo:
+    """Lector que entrega solo `largo` bytes del archivo desde su posición actual."""
+
+    def __init__(self, archivo, largo: int):
+        self.archivo = archivo
+        self.restante = largo
+
+    def read(self, tamanho: int = -1) -> bytes:
+        if tamanho < 0 or tamanho > self.restante:
+            tamanho = self.restante
+
+        datos = self.archivo.read(tamanho)
+        self.restante -= len(datos)
+        return datos
+
+    def close(self):
+        self.archivo.close()
+
+
+def _rango(encabezado: Optional[str], tamanho: int) -> Optional[tuple[int, int]]:
+    """
+    El rango pedido como (inicio, fin) inclusivos, None si no hay o no se entiende (se responde el archivo completo,
+    como permite la RFC 9110) y (tamanho, tamanho) si no se puede satisfacer. Solo se atiende un rango por petición.
+    """
+    coincidencia = RE_RANGO.match(encabezado or "")
+
+    if not coincidencia or coincidencia.groups() == ("", ""):
+        return None
+
+    inicio, fin = coincidencia.groups()
+
+    if not inicio:
+        # sufijo: los últimos `fin` bytes
+        largo = int(fin)
+        return (max(tamanho - largo, 0), tamanho - 1) if largo and tamanho else (tamanho, tamanho)
+
+    inicio = int(inicio)
+    fin = min(int(fin), tamanho - 1) if fin else tamanho - 1
+
+    if inicio > fin:
+        return None if inicio < tamanho else (tamanho, tamanho)
+
+    return inicio, fin
+
+
+def servir_media(request, path: str) -> HttpResponse:
+    """El archivo `path` de MEDIA_ROOT; 404 si no existe o queda fuera de MEDIA_ROOT."""
+    path = posixpath.normpath(path).lstrip("/")
+
+    try:
+        ruta = Path(safe_join(settings.MEDIA_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404("Archivo no encontrado")
+
+    if not ruta.is_file():
+        raise Http404("Archivo no encontrado")
+
+    estado = ruta.stat()
+
+    if not was_modified_since(request.META.get("HTTP_IF_MODIFIED_SINCE"), estado.st_mtime):
+        return HttpResponseNotModified()
+
+    content_type, encoding = mimetypes.guess_type(ruta.name)
+    content_type = content_type or "application/octet-stream"
+    ultima_modificacion = http_date(estado.st_mtime)
+
+    if settings.MEDIA_ENTREGA == ENTREGA_NGINX:
+        respuesta = HttpResponse(content_type=content_type)
+        respuesta["X-Accel-Redirect"] = settings.MEDIA_PREFIJO_INTERNO + quote(path)
+    elif settings.MEDIA_ENTREGA == ENTREGA_LIGHTTPD:
+        respuesta = HttpResponse(content_type=content_type)
+        respuesta["X-Sendfile"] = os.fspath(ruta)
+    else:
+        respuesta = _respuesta_archivo(request, ruta, estado.st_size, content_type, ultima_modificacion)
+
+    respuesta["Last-Modified"] = ultima_modificacion
+
+    if encoding:
+        respuesta["Content-Encoding"] = encoding
+
+    return respuesta
+
+
+def _respuesta_archivo(request, ruta: Path, tamanho: int, content_type: str, ultima_modificacion: str) -> HttpResponse:
+    rango = None
+
+    # If-Range: si el archivo cambió desde la copia parcial del cliente, se responde completo
+    if request.META.get("HTTP_IF_RANGE", ultima_modificacion) == ultima_modificacion:
+        rango = _rango(request.META.get("HTTP_RANGE"), tamanho)
+
+    if rango == (tamanho, tamanho):
+        respuesta = HttpResponse(status=416)
+        respuesta["Content-Range"] = f"bytes */{tamanho}"
+        respuesta["Accept-Ranges"] = "bytes"
+        return respuesta
+
+    archivo = ruta.open("rb")
+
+    if rango is None:
+        respuesta = FileResponse(archivo, content_type=content_type)
+    else:
+        inicio, fin = rango
+        archivo.seek(inicio)
+        respuesta = FileResponse(_Tramo(archivo, fin - inicio + 1), status=206, content_type=content_type)
+        respuesta["Content-Length"] = fin - inicio + 1
+        respuesta["Content-Range"] = f"bytes {inicio}-{fin}/{tamanho}"
+
+    respuesta["Accept-Ranges"] = "bytes"
+    return respuesta
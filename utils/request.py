@@ -4,12 +4,24 @@ from tests.models import AccesoTestPersona
 
 
 def get_and_validate_acceso(request) -> AccesoTestPersona:
+    """
+    El acceso del código indicado en la URL, siempre que aún no tenga entrevista. Se memoiza solo en la petición:
+    entre peticiones se vuelve a leer de la base de datos, para no servir un acceso que otro proceso ya cambió.
+    """
+    http_request = getattr(request, "_request", request)  # la HttpRequest detrás de una Request de DRF
+    acceso = getattr(http_request, "_acceso_validado", None)
+
+    if acceso:
+        return acceso
+
     try:
-        acceso = AccesoTestPersona.objects.get(codigo=request.GET.get('codigo'))
+        acceso = AccesoTestPersona.objects.select_related("acceso_test__test").get(codigo=request.GET.get('codigo'))
     except AccesoTestPersona.DoesNotExist:
         raise AuthenticationFailed("No parece que tengas acceso a un test.")
 
     if acceso.entrevistas.exists():
         raise ValidationError("Ya has completado este test.")
 
+    http_request._acceso_validado = acceso
+
     return acceso